@@ -1,3 +1,9 @@
 from .core.detector import FlashDetectorBuffer, detect_flash
 from .interface.cli import run_cli
-from .interface.gui import create_gradio_interface
+
+def __getattr__(name):
+    # 图形界面依赖 gradio，只在用到时导入
+    if name == 'create_gradio_interface':
+        from .interface.gui import create_gradio_interface
+        return create_gradio_interface
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -8,7 +8,19 @@ setup(
     install_requires=[
         "opencv-python>=4.5.0",
         "numpy>=1.19.0",
-        "gradio>=3.0.0",
-        "psutil>=5.8.0",
     ],
+    extras_require={
+        "gui": [
+            "gradio>=3.0.0",
+            "psutil>=5.8.0",
+        ],
+        "jit": [
+            "numba>=0.56.0",
+        ],
+    },
+    entry_points={
+        "console_scripts": [
+            "flash-detector=flash_detector.main:main",
+        ],
+    },
 )
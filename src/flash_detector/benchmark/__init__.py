@@ -0,0 +1,6 @@
+"""Benchmark suite for flash detection."""
+from .synthetic import synthetic_frames, write_synthetic_video, match_flashes
+from .runner import run_benchmarks, compare_to_baseline
+
+__all__ = ['synthetic_frames', 'write_synthetic_video', 'match_flashes',
+           'run_benchmarks', 'compare_to_baseline']
@@ -0,0 +1,143 @@
+import argparse
+import os
+import sys
+
+from ..benchmark.runner import (DEFAULT_TOLERANCE, bench_backends, compare_to_baseline,
+                                load_results, run_benchmarks, save_results)
+from ..benchmark.synthetic import RESOLUTIONS, write_synthetic_video
+
+def parse_arguments():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='闪光检测性能基准测试')
+    parser.add_argument('--resolutions', type=str, default='480p,1080p,4k',
+                      help='测试的分辨率，逗号分隔，可为 480p/1080p/4k 或 宽x高 (默认: 480p,1080p,4k)')
+    parser.add_argument('--region_sizes', type=str, default='16,20,32',
+                      help='测试的检测区域大小，逗号分隔 (默认: 16,20,32)')
+    parser.add_argument('--frame_steps', type=str, default='1,2',
+                      help='测试的帧步长，逗号分隔 (默认: 1,2)')
+    parser.add_argument('--frames', type=int, default=60,
+                      help='每段合成视频的帧数 (默认: 60)')
+    parser.add_argument('--seed', type=int, default=0,
+                      help='合成视频的随机种子 (默认: 0)')
+    parser.add_argument('--low_memory', choices=['uint8', 'float16'], default=None,
+                      help='以低内存模式测量，亮度历史量化存储为指定类型')
+    parser.add_argument('--output', type=str, default=None,
+                      help='将本次结果写入 JSON 文件')
+    parser.add_argument('--baseline', type=str, default=None,
+                      help='与基线结果文件比较，出现回归时以状态码 1 退出')
+    parser.add_argument('--save_baseline', action='store_true',
+                      help='将本次结果保存为基线（写入 --baseline 指定的文件）')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                      help='回归判定的容差比例 (默认: 0.2)')
+    parser.add_argument('--backends', action='store_true',
+                      help='只比较各计算后端（numpy/opencv/numba）的逐帧计算核耗时，给出本机最快的后端')
+    parser.add_argument('--generate', type=str, default=None, metavar='DIR',
+                      help='只生成各分辨率的合成示例视频到目录中，如 examples/sample_videos')
+    return parser.parse_args()
+
+def parse_resolution(value: str):
+    """解析分辨率：预设名称或 宽x高"""
+    if value.lower() in RESOLUTIONS:
+        return value.lower()
+    width, height = value.lower().split('x')
+    return (int(width), int(height))
+
+def print_results(results):
+    """输出基准测试结果表"""
+    print(f"\n{'逐帧FPS':>8}{'p50(毫秒)':>10}{'p95(毫秒)':>10}{'内存(MB)':>9}{'KB/百万像素':>10}"
+          f"{'扫描FPS':>8}{'检出':>6}{'首个闪光(秒)':>10}  用例")
+    for case, metrics in results['results'].items():
+        frame = metrics['process_frame']
+        scan = metrics['scan_flashes']
+        print(f"{frame['fps']:>11.1f}{frame['latency_ms']['p50']:>12.2f}"
+              f"{frame['latency_ms']['p95']:>12.2f}{frame['peak_memory_mb']:>11.1f}"
+              f"{frame['bytes_per_megapixel'] / 1024:>16.1f}"
+              f"{scan['fps']:>11.1f}{scan['found']:>6d}/{scan['expected']:<2d}"
+              f"{metrics['detect_flash']['seconds']:>13.3f}  {case}")
+
+def print_backend_results(results):
+    """输出计算后端比较表和每个用例最快的后端"""
+    print(f"\n{'灰度(毫秒)':>10}{'网格(毫秒)':>10}{'时序(毫秒)':>10}{'每帧(毫秒)':>10}{'FPS':>8}"
+          f"{'结果一致':>6}  用例/后端")
+    for case, backends in results['results'].items():
+        for name, metrics in backends.items():
+            print(f"{metrics['gray_ms']:>14.2f}{metrics['grid_ms']:>14.2f}"
+                  f"{metrics['temporal_ms']:>14.2f}{metrics['frame_ms']:>14.2f}"
+                  f"{metrics['fps']:>9.1f}{'是' if metrics['matches'] else '否':>8}  {case}/{name}")
+    print()
+    for case, name in results['fastest'].items():
+        print(f"最快的后端 {case}: {name}")
+    names = set(results['fastest'].values())
+    if len(names) == 1:
+        name = names.pop()
+        print(f"使用 --backend {name} 或设置环境变量 FLASH_DETECTOR_BACKEND={name}")
+
+def main():
+    args = parse_arguments()
+    resolutions = [parse_resolution(value) for value in args.resolutions.split(',')]
+
+    if args.generate:
+        os.makedirs(args.generate, exist_ok=True)
+        for resolution in resolutions:
+            name = resolution if isinstance(resolution, str) else f"{resolution[0]}x{resolution[1]}"
+            path = os.path.join(args.generate, f"synthetic_{name}.avi")
+            flashes = write_synthetic_video(path, resolution, args.frames, seed=args.seed)
+            print(f"已生成: {path}")
+            for flash in flashes:
+                print(f"  帧 {flash['start_frame']}-{flash['end_frame']} | "
+                      f"位置: {flash['position']} | 半径: {flash['radius']} | "
+                      f"频率: {flash['frequency']}Hz | 形状: {flash['shape']}")
+        return
+
+    if args.backends:
+        results = bench_backends(
+            resolutions=resolutions,
+            region_sizes=[int(v) for v in args.region_sizes.split(',')],
+            num_frames=args.frames,
+            seed=args.seed,
+            progress=lambda case: print(f"完成: {case}")
+        )
+        print_backend_results(results)
+        if not all(metrics['matches'] for backends in results['results'].values()
+                   for metrics in backends.values()):
+            print("错误: 各后端的检测结果不一致")
+            sys.exit(1)
+        return
+
+    results = run_benchmarks(
+        resolutions=resolutions,
+        region_sizes=[int(v) for v in args.region_sizes.split(',')],
+        frame_steps=[int(v) for v in args.frame_steps.split(',')],
+        num_frames=args.frames,
+        seed=args.seed,
+        progress=lambda case: print(f"完成: {case}"),
+        low_memory=args.low_memory
+    )
+    print_results(results)
+
+    if args.output:
+        save_results(results, args.output)
+        print(f"\n结果已写入: {args.output}")
+
+    if not args.baseline:
+        return
+    if args.save_baseline:
+        save_results(results, args.baseline)
+        print(f"基线已保存: {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"错误: 基线文件不存在: {args.baseline}")
+        sys.exit(2)
+
+    regressions = compare_to_baseline(results, load_results(args.baseline), args.tolerance)
+    if not regressions:
+        print(f"\n与基线相比没有回归 (容差 {args.tolerance:.0%})")
+        return
+    print(f"\n发现 {len(regressions)} 项回归:")
+    for item in regressions:
+        print(f"  {item['case']} {item['metric']}: "
+              f"{item['baseline']:.2f} -> {item['current']:.2f} ({item['change']:+.0%})")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
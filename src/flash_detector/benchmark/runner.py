@@ -0,0 +1,276 @@
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from ..core.backends import available_backends, get_backend
+from ..core.detector import create_detector, detect_flash, scan_flashes
+from ..benchmark.synthetic import (default_flashes, match_flashes, resolve_resolution,
+                                   synthetic_frames, write_synthetic_video)
+
+BENCHMARK_VERSION = 1
+
+# 回归判定的默认容差：吞吐下降或延迟上升超过 20% 视为回归
+DEFAULT_TOLERANCE = 0.2
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """每帧延迟的分位数（毫秒）"""
+    if not latencies:
+        return {'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    values = np.asarray(latencies) * 1000
+    p50, p95 = np.percentile(values, [50, 95])
+    return {'p50': float(p50), 'p95': float(p95), 'max': float(values.max())}
+
+def _peak_memory(function) -> float:
+    """运行 function 期间 Python 与 NumPy 分配的峰值内存（MB）"""
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / (1024 * 1024)
+
+def bench_process_frame(make_frames: Callable[[], Iterator[np.ndarray]], region_size: int,
+                        frame_step: int = 1, low_memory: Optional[str] = None) -> Dict:
+    """
+    测量 FlashDetectorBuffer.process_frame 的吞吐、每帧延迟和峰值内存
+    make_frames: 返回 BGR 帧迭代器的函数，帧在计时之外生成，不包含解码开销
+    峰值内存为检测器常驻数组加上处理单帧时的最大临时分配，只在窗口填满后的前几帧上测量
+    low_memory: 低内存模式的亮度历史存储类型，见 create_detector
+    """
+    detector = create_detector(region_size, low_memory=low_memory)
+    latencies = []
+    detections = 0
+    for frame_num, frame in enumerate(make_frames()):
+        if frame_num % frame_step:
+            continue
+        start = time.perf_counter()
+        if detector.process_frame(frame, frame_num):
+            detections += 1
+        latencies.append(time.perf_counter() - start)
+
+    detector = create_detector(region_size, low_memory=low_memory)
+    transient = 0
+    for frame_num, frame in enumerate(make_frames()):
+        if frame_num % frame_step:
+            continue
+        tracemalloc.start()
+        try:
+            detector.process_frame(frame, frame_num)
+            transient = max(transient, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        if detector.frames_seen >= 3 * detector.buffer_size:
+            break
+
+    total = sum(latencies)
+    return {
+        'frames': len(latencies),
+        'fps': len(latencies) / total if total > 0 else 0.0,
+        'latency_ms': _latency_summary(latencies),
+        'peak_memory_mb': (transient + detector.memory_bytes()) / (1024 * 1024),
+        'bytes_per_megapixel': detector.bytes_per_megapixel(),
+        'detections': detections
+    }
+
+def bench_scan(video_path: str, flashes: List[Dict], region_size: int,
+               frame_step: int = 1, low_memory: Optional[str] = None) -> Dict:
+    """测量 scan_flashes 整段扫描（含解码）的吞吐、峰值内存和检出的注入闪光数"""
+    stats = {}
+    start = time.perf_counter()
+    events = list(scan_flashes(video_path, region_size=region_size,
+                               frame_step=frame_step, stats=stats, low_memory=low_memory))
+    elapsed = time.perf_counter() - start
+    return {
+        'frames': stats.get('decoded_frames', 0),
+        'fps': stats.get('decoded_frames', 0) / elapsed if elapsed > 0 else 0.0,
+        'seconds': elapsed,
+        'peak_memory_mb': _peak_memory(lambda: list(scan_flashes(
+            video_path, region_size=region_size, frame_step=frame_step,
+            low_memory=low_memory))),
+        'events': len(events),
+        'found': match_flashes(events, flashes, tolerance=region_size),
+        'expected': len(flashes)
+    }
+
+def bench_detect_flash(video_path: str, region_size: int, frame_step: int = 1) -> Dict:
+    """测量 detect_flash 找到第一个闪光的用时"""
+    start = time.perf_counter()
+    result = detect_flash(video_path, region_size=region_size, frame_step=frame_step)
+    elapsed = time.perf_counter() - start
+    return {
+        'seconds': elapsed,
+        'first_flash_frame': result[0][0] if result else None
+    }
+
+def run_benchmarks(
+    resolutions: Sequence = ('480p', '1080p', '4k'),
+    region_sizes: Sequence[int] = (16, 20, 32),
+    frame_steps: Sequence[int] = (1, 2),
+    num_frames: int = 60,
+    fps: float = 30.0,
+    seed: int = 0,
+    work_dir: Optional[str] = None,
+    progress=None,
+    low_memory: Optional[str] = None
+) -> Dict:
+    """
+    在合成视频上运行基准测试
+    每种分辨率生成一段带已知闪光的视频，对每组 region_size 和 frame_step 测量
+    process_frame（不含解码）、scan_flashes（整段扫描）和 detect_flash（首个闪光）
+    work_dir: 合成视频的存放目录，默认使用临时目录并在结束后删除
+    progress: 可选的回调，每完成一组参数调用一次 progress(用例名称)
+    low_memory: 给出时以低内存模式测量，用例名称附加存储类型（如 480p/r20/s1/uint8）
+    返回: {'version', 'environment', 'results': {用例名称: 指标}}
+    """
+    results = {}
+    tmpdir = work_dir or tempfile.mkdtemp()
+    try:
+        for resolution in resolutions:
+            size = resolve_resolution(resolution)
+            name = resolution if isinstance(resolution, str) else f"{size[0]}x{size[1]}"
+            flashes = default_flashes(size, num_frames)
+            video_path = os.path.join(tmpdir, f"synthetic_{name}.avi")
+            write_synthetic_video(video_path, size, num_frames, fps, flashes, seed)
+            make_frames = lambda: synthetic_frames(size, num_frames, fps, flashes, seed)
+
+            for region_size in region_sizes:
+                for frame_step in frame_steps:
+                    case = f"{name}/r{region_size}/s{frame_step}"
+                    if low_memory:
+                        case += f"/{low_memory}"
+                    results[case] = {
+                        'process_frame': bench_process_frame(make_frames, region_size,
+                                                             frame_step, low_memory),
+                        'scan_flashes': bench_scan(video_path, flashes, region_size, frame_step,
+                                                   low_memory),
+                        'detect_flash': bench_detect_flash(video_path, region_size, frame_step)
+                    }
+                    if progress is not None:
+                        progress(case)
+    finally:
+        if work_dir is None:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    return {
+        'version': BENCHMARK_VERSION,
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'opencv': cv2.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor()
+        },
+        'results': results
+    }
+
+def bench_backends(
+    resolutions: Sequence = ('480p', '1080p', '4k'),
+    region_sizes: Sequence[int] = (20,),
+    num_frames: int = 30,
+    seed: int = 0,
+    backends: Optional[Sequence[str]] = None,
+    progress=None
+) -> Dict:
+    """
+    比较各计算后端的逐帧计算核：灰度转换、网格亮度和时序检验（含写入亮度历史）的每帧耗时
+    帧在计时之外生成；numba 的编译在计时前完成。同时检查各后端的检测结果与第一个后端一致
+    backends: 参与比较的后端，默认为当前环境中可用的全部后端
+    返回: {'results': {用例名称: {后端: 指标}}, 'fastest': {用例名称: 后端}}
+    """
+    backends = list(backends or available_backends())
+    results = {}
+    fastest = {}
+    for resolution in resolutions:
+        size = resolve_resolution(resolution)
+        name = resolution if isinstance(resolution, str) else f"{size[0]}x{size[1]}"
+        for region_size in region_sizes:
+            case = f"{name}/r{region_size}"
+            results[case] = {}
+            reference = None
+            for backend_name in backends:
+                backend = get_backend(backend_name)
+                detector = create_detector(region_size, backend=backend_name)
+                timings = {'gray': 0.0, 'grid': 0.0, 'temporal': 0.0}
+                detections = []
+                for frame_num, frame in enumerate(synthetic_frames(size, num_frames, seed=seed)):
+                    if frame_num == 0:
+                        # 预热：numba 首次调用时编译
+                        backend.grid_brightness(backend.to_gray(frame), region_size)
+                        backend.window_test(np.zeros((2, 1), dtype=np.float32), 0, 1.0,
+                                            backend.allocate(2, (1,), np.dtype(np.float32),
+                                                             False), False)
+                    start = time.perf_counter()
+                    gray = backend.to_gray(frame)
+                    gray_end = time.perf_counter()
+                    brightness = backend.grid_brightness(gray, region_size)
+                    grid_end = time.perf_counter()
+                    detections.append(detector.process_brightness(brightness, frame_num))
+                    end = time.perf_counter()
+                    timings['gray'] += gray_end - start
+                    timings['grid'] += grid_end - gray_end
+                    timings['temporal'] += end - grid_end
+
+                if reference is None:
+                    reference = detections
+                total = sum(timings.values())
+                metrics = {key + '_ms': value * 1000 / num_frames
+                           for key, value in timings.items()}
+                metrics['frame_ms'] = total * 1000 / num_frames
+                metrics['fps'] = num_frames / total if total > 0 else 0.0
+                metrics['matches'] = detections == reference
+                results[case][backend_name] = metrics
+            fastest[case] = min(results[case], key=lambda item: results[case][item]['frame_ms'])
+            if progress is not None:
+                progress(case)
+    return {'results': results, 'fastest': fastest}
+
+def compare_to_baseline(current: Dict, baseline: Dict,
+                        tolerance: float = DEFAULT_TOLERANCE) -> List[Dict]:
+    """
+    与基线比较，返回回归列表
+    吞吐（fps）下降或 p50 延迟上升超过 tolerance 的比例，或检出的注入闪光变少时视为回归
+    """
+    regressions = []
+    for case, metrics in current['results'].items():
+        base = baseline.get('results', {}).get(case)
+        if base is None:
+            continue
+
+        checks = [
+            ('process_frame.fps', metrics['process_frame']['fps'],
+             base['process_frame']['fps'], False),
+            ('process_frame.latency_ms.p50', metrics['process_frame']['latency_ms']['p50'],
+             base['process_frame']['latency_ms']['p50'], True),
+            ('scan_flashes.fps', metrics['scan_flashes']['fps'],
+             base['scan_flashes']['fps'], False),
+        ]
+        for metric, value, reference, lower_is_better in checks:
+            if reference <= 0:
+                continue
+            change = (value - reference) / reference
+            if (change > tolerance) if lower_is_better else (change < -tolerance):
+                regressions.append({'case': case, 'metric': metric, 'baseline': reference,
+                                    'current': value, 'change': change})
+
+        if metrics['scan_flashes']['found'] < base['scan_flashes']['found']:
+            regressions.append({'case': case, 'metric': 'scan_flashes.found',
+                                'baseline': base['scan_flashes']['found'],
+                                'current': metrics['scan_flashes']['found'],
+                                'change': -1.0})
+    return regressions
+
+def load_results(path: str) -> Dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_results(results: Dict, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,130 @@
+import cv2
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# 预设分辨率 (宽, 高)
+RESOLUTIONS = {
+    '480p': (854, 480),
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160)
+}
+
+FLASH_SHAPES = ('circle', 'square')
+
+def resolve_resolution(resolution: Union[str, Tuple[int, int]]) -> Tuple[int, int]:
+    """将预设名称或 (宽, 高) 转换为 (宽, 高)"""
+    if isinstance(resolution, str):
+        key = resolution.lower()
+        if key not in RESOLUTIONS:
+            raise ValueError(f"未知的分辨率: {resolution}")
+        return RESOLUTIONS[key]
+    return tuple(resolution)
+
+def default_flashes(size: Tuple[int, int], num_frames: int) -> List[Dict]:
+    """
+    按画面大小生成默认的闪光列表：两个不同位置和形状、逐帧亮暗交替（30 FPS 下 15Hz）的闪光
+    radius 与画面高度成比例，保证不同分辨率下闪光覆盖的区域比例相同
+    """
+    width, height = size
+    radius = max(6, height // 40)
+    span = max(12, num_frames // 4)
+    return [
+        {'start_frame': span // 2, 'end_frame': span // 2 + span,
+         'position': (width // 4, height // 3), 'radius': radius,
+         'frequency': 15.0, 'shape': 'circle'},
+        {'start_frame': span * 2, 'end_frame': span * 3,
+         'position': (width * 2 // 3, height * 2 // 3), 'radius': radius,
+         'frequency': 15.0, 'shape': 'square'},
+    ]
+
+def _flash_on(flash: Dict, frame_num: int, fps: float) -> bool:
+    """闪光在该帧是否点亮：按频率在亮/暗之间切换，每个周期亮暗各占一半"""
+    if not flash['start_frame'] <= frame_num < flash['end_frame']:
+        return False
+    phase = (frame_num - flash['start_frame']) * flash['frequency'] * 2 / fps
+    return int(phase) % 2 == 0
+
+def synthetic_frames(
+    resolution: Union[str, Tuple[int, int]] = '480p',
+    num_frames: int = 90,
+    fps: float = 30.0,
+    flashes: Optional[List[Dict]] = None,
+    seed: int = 0,
+    noise: int = 3
+) -> Iterator[np.ndarray]:
+    """
+    生成确定性的合成视频帧（BGR）
+    背景为固定的纹理，每帧叠加 [-noise, noise] 内均匀分布的随机噪声；
+    相同参数和 seed 生成完全相同的帧
+    flashes: 闪光列表，每项包含 start_frame、end_frame、position、radius、
+             frequency（Hz）和 shape（'circle' 或 'square'），默认使用 default_flashes
+    """
+    width, height = resolve_resolution(resolution)
+    if flashes is None:
+        flashes = default_flashes((width, height), num_frames)
+
+    rng = np.random.default_rng(seed)
+    # 低频渐变加纹理的背景，亮度在 40-100 之间
+    y, x = np.mgrid[0:height, 0:width]
+    background = 60 + 20 * np.sin(x / 97.0) * np.cos(y / 61.0)
+    background += rng.normal(0, 8, (height, width))
+    background = np.clip(background, 40, 100).astype(np.int16)
+
+    for frame_num in range(num_frames):
+        gray = background + rng.integers(-noise, noise + 1, (height, width), dtype=np.int16)
+        gray = gray.astype(np.uint8)
+        for flash in flashes:
+            if not _flash_on(flash, frame_num, fps):
+                continue
+            cx, cy = flash['position']
+            r = flash['radius']
+            if flash['shape'] == 'circle':
+                cv2.circle(gray, (cx, cy), r, 255, -1)
+            elif flash['shape'] == 'square':
+                cv2.rectangle(gray, (cx - r, cy - r), (cx + r, cy + r), 255, -1)
+            else:
+                raise ValueError(f"未知的闪光形状: {flash['shape']}")
+        yield cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+def write_synthetic_video(
+    path: str,
+    resolution: Union[str, Tuple[int, int]] = '480p',
+    num_frames: int = 90,
+    fps: float = 30.0,
+    flashes: Optional[List[Dict]] = None,
+    seed: int = 0
+) -> List[Dict]:
+    """
+    将合成视频写入文件（MJPG 编码的 avi）
+    返回: 注入的闪光列表（真值）
+    """
+    size = resolve_resolution(resolution)
+    if flashes is None:
+        flashes = default_flashes(size, num_frames)
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    if not writer.isOpened():
+        raise IOError(f"无法写入视频文件: {path}")
+    try:
+        for frame in synthetic_frames(size, num_frames, fps, flashes, seed):
+            writer.write(frame)
+    finally:
+        writer.release()
+    return flashes
+
+def match_flashes(events: List[Dict], flashes: List[Dict], tolerance: int = 0) -> int:
+    """
+    统计被检测到的注入闪光个数
+    事件的峰值帧落在闪光的帧区间内、位置落在闪光半径（加 tolerance 像素）内时视为检测到
+    """
+    found = 0
+    for flash in flashes:
+        cx, cy = flash['position']
+        reach = flash['radius'] + tolerance
+        for event in events:
+            x, y = event['position']
+            if (flash['start_frame'] <= event['peak_frame'] < flash['end_frame'] + 2 and
+                    abs(x - cx) <= reach and abs(y - cy) <= reach):
+                found += 1
+                break
+    return found
@@ -0,0 +1,239 @@
+import importlib.util
+import os
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from ..core.grid import grid_brightness, grid_shape
+from ..core.pipeline import to_gray
+
+# 选择计算后端的环境变量，命令行的 --backend 也通过它传给工作进程
+BACKEND_ENV = 'FLASH_DETECTOR_BACKEND'
+DEFAULT_BACKEND = 'opencv'
+
+# BGR 转灰度的定点系数 (B, G, R) 和移位，与 cv2.COLOR_BGR2GRAY 逐位一致
+GRAY_WEIGHTS = (3735, 19235, 9798)
+GRAY_SHIFT = 15
+
+class NumpyBackend:
+    """
+    纯 NumPy 实现的逐帧计算核：灰度转换、网格区域均值和时序窗口检验
+    结果与逐区域循环的参考实现逐位一致，不依赖 OpenCV 的实现细节
+    """
+    name = 'numpy'
+
+    def to_gray(self, frame: np.ndarray) -> np.ndarray:
+        """按 OpenCV 的定点系数转换为灰度图，已经是灰度图时直接返回"""
+        if frame.ndim != 3:
+            return frame
+        b, g, r = GRAY_WEIGHTS
+        gray = frame[..., 0] * np.uint32(b)
+        gray += frame[..., 1] * np.uint32(g)
+        gray += frame[..., 2] * np.uint32(r)
+        gray += 1 << (GRAY_SHIFT - 1)
+        gray >>= GRAY_SHIFT
+        return gray.astype(np.uint8)
+
+    def grid_brightness(self, gray: np.ndarray, region_size: int) -> np.ndarray:
+        """
+        按区域的行、列偏移累加跨步切片求区域和（int32 精确），再除以像素数
+        结果与 grid.grid_brightness 逐位一致
+        """
+        height, width = gray.shape[:2]
+        grid_step = region_size // 2
+        grid_h, grid_w = grid_shape(height, width, region_size)
+        if grid_h == 0 or grid_w == 0:
+            return np.zeros((grid_h, grid_w), dtype=np.float64)
+
+        used_w = (grid_w - 1) * grid_step + region_size
+        rows = np.zeros((grid_h, used_w), dtype=np.int32)
+        for k in range(region_size):
+            rows += gray[k:k + (grid_h - 1) * grid_step + 1:grid_step, :used_w]
+        sums = np.zeros((grid_h, grid_w), dtype=np.int32)
+        for k in range(region_size):
+            sums += rows[:, k:k + (grid_w - 1) * grid_step + 1:grid_step]
+        return sums / (region_size * region_size)
+
+    def allocate(self, buffer_size: int, shape: Tuple[int, ...], dtype: np.dtype,
+                 compact: bool) -> Dict[str, np.ndarray]:
+        """
+        预分配时序检验的工作数组
+        返回: 至少包含 range（窗口内亮度范围）、sign_changes（方向改变次数）
+              和 candidates（检出的区域）
+        """
+        work = {
+            'max': np.empty(shape, dtype=dtype),
+            'min': np.empty(shape, dtype=dtype),
+            'range': np.empty(shape, dtype=np.float32),
+            'sign_changes': np.empty(shape, dtype=np.int64),
+            'candidates': np.empty(shape, dtype=bool),
+            'mask': np.empty(shape, dtype=bool)
+        }
+        if compact:
+            # 量化存储时按时间逐层统计方向改变，临时数组只有网格大小
+            work['diffs'] = np.empty((2,) + shape, dtype=np.float32)
+            work['products'] = np.empty(shape, dtype=np.float32)
+            work['negative'] = np.empty(shape, dtype=bool)
+        else:
+            work['diffs'] = np.empty((buffer_size,) + shape, dtype=dtype)
+            work['products'] = np.empty((buffer_size,) + shape, dtype=dtype)
+            work['negative'] = np.empty((buffer_size,) + shape, dtype=bool)
+        return work
+
+    def window_test(self, history: np.ndarray, head: int, threshold: float,
+                    work: Dict[str, np.ndarray], compact: bool) -> bool:
+        """
+        对环形缓冲区中的整个窗口做时序检验：亮度范围超过阈值且方向改变至少两次的区域为候选
+        history: (buffer_size, ...) 的环形缓冲区，head 为最旧一帧的位置
+        返回: 是否存在候选区域
+        """
+        np.max(history, axis=0, out=work['max'])
+        np.min(history, axis=0, out=work['min'])
+        np.subtract(work['max'], work['min'], out=work['range'], dtype=np.float32)
+
+        # 只对超过阈值的区域统计方向改变次数
+        candidates = work['candidates']
+        np.greater(work['range'], threshold, out=candidates)
+        if not candidates.any():
+            return False
+
+        if compact:
+            self._count_sign_changes_compact(history, head, work)
+        else:
+            self._count_sign_changes(history, head, work)
+        np.greater_equal(work['sign_changes'], 2, out=work['mask'])
+        np.logical_and(candidates, work['mask'], out=candidates)
+        return bool(candidates.any())
+
+    @staticmethod
+    def _count_sign_changes(history: np.ndarray, head: int, work: Dict[str, np.ndarray]):
+        """
+        在环形缓冲区上直接统计每个区域一阶差分的正负交替次数
+        环形相邻两项的差分中，最新帧到最旧帧的一项跨越了时间起点，
+        涉及它的两个乘积不参与计数
+        """
+        diffs, products, negative = work['diffs'], work['products'], work['negative']
+        size = history.shape[0]
+
+        np.subtract(history[1:], history[:-1], out=diffs[:-1])
+        np.subtract(history[0], history[-1], out=diffs[-1])
+        np.multiply(diffs[:-1], diffs[1:], out=products[:-1])
+        np.multiply(diffs[-1], diffs[0], out=products[-1])
+        np.less(products, 0, out=negative)
+
+        negative[(head - 1) % size] = False
+        negative[(head - 2) % size] = False
+        np.sum(negative, axis=0, out=work['sign_changes'])
+
+    @staticmethod
+    def _count_sign_changes_compact(history: np.ndarray, head: int,
+                                    work: Dict[str, np.ndarray]):
+        """
+        量化存储时的方向改变统计：按时间顺序逐层计算相邻两帧的差分（float32），
+        每次只保留两层差分，临时内存与窗口长度无关
+        """
+        size = history.shape[0]
+        order = [(head + i) % size for i in range(size)]
+        previous, current = work['diffs']
+        sign_changes = work['sign_changes']
+        sign_changes.fill(0)
+        np.subtract(history[order[1]], history[order[0]], out=previous, dtype=np.float32)
+        for k in range(2, size):
+            np.subtract(history[order[k]], history[order[k - 1]], out=current, dtype=np.float32)
+            np.multiply(previous, current, out=work['products'])
+            np.less(work['products'], 0, out=work['negative'])
+            sign_changes += work['negative']
+            previous, current = current, previous
+
+class OpenCVBackend(NumpyBackend):
+    """
+    OpenCV 实现：cvtColor 灰度转换和 int32 积分图的网格均值
+    OpenCV 没有方向改变统计的对应函数，时序检验沿用 NumPy 实现
+    """
+    name = 'opencv'
+
+    def to_gray(self, frame: np.ndarray) -> np.ndarray:
+        return to_gray(frame)
+
+    def grid_brightness(self, gray: np.ndarray, region_size: int) -> np.ndarray:
+        return grid_brightness(gray, region_size)
+
+class NumbaBackend(NumpyBackend):
+    """
+    Numba JIT 实现：逐像素的灰度转换和网格均值，时序检验先逐层求范围，
+    只对超过阈值的区域统计方向改变，不需要与窗口长度成正比的临时数组。
+    需要安装 numba，首次调用时编译（结果缓存在磁盘上）
+    """
+    name = 'numba'
+
+    def __init__(self):
+        if importlib.util.find_spec('numba') is None:
+            raise ValueError("计算后端 numba 需要安装 numba: pip install flash_detector[jit]")
+        from ..core import jit
+        self.kernels = jit
+
+    def to_gray(self, frame: np.ndarray) -> np.ndarray:
+        if frame.ndim != 3:
+            return frame
+        gray = np.empty(frame.shape[:2], dtype=np.uint8)
+        self.kernels.gray_kernel(frame, gray)
+        return gray
+
+    def grid_brightness(self, gray: np.ndarray, region_size: int) -> np.ndarray:
+        height, width = gray.shape[:2]
+        brightness = np.zeros(grid_shape(height, width, region_size), dtype=np.float64)
+        if brightness.size:
+            self.kernels.grid_kernel(gray, region_size, brightness)
+        return brightness
+
+    def allocate(self, buffer_size: int, shape: Tuple[int, ...], dtype: np.dtype,
+                 compact: bool) -> Dict[str, np.ndarray]:
+        if dtype == np.float16:
+            # numba 不支持 float16，float16 历史的时序检验沿用 NumPy 实现
+            return super().allocate(buffer_size, shape, dtype, compact)
+        return {
+            'range': np.empty(shape, dtype=np.float32),
+            'min': np.empty(shape, dtype=np.float32),
+            'sign_changes': np.empty(shape, dtype=np.int64),
+            'candidates': np.empty(shape, dtype=bool)
+        }
+
+    def window_test(self, history: np.ndarray, head: int, threshold: float,
+                    work: Dict[str, np.ndarray], compact: bool) -> bool:
+        if history.dtype == np.float16:
+            return super().window_test(history, head, threshold, work, compact)
+        # 阈值按 float32 比较，与 NumPy 中 float32 数组和 Python 标量的比较一致
+        return bool(self.kernels.window_kernel(
+            history.reshape(history.shape[0], -1), head, np.float32(threshold),
+            work['range'].reshape(-1), work['min'].reshape(-1), work['sign_changes'].reshape(-1),
+            work['candidates'].reshape(-1)))
+
+BACKENDS = {
+    'numpy': NumpyBackend,
+    'opencv': OpenCVBackend,
+    'numba': NumbaBackend
+}
+
+_instances = {}
+
+def available_backends() -> List[str]:
+    """当前环境中可用的计算后端"""
+    return [name for name in BACKENDS
+            if name != 'numba' or importlib.util.find_spec('numba') is not None]
+
+def get_backend(name: Optional[str] = None):
+    """
+    取得计算后端
+    name: 后端名称，默认读取环境变量 FLASH_DETECTOR_BACKEND，未设置时为 opencv
+    后端不存在或依赖未安装时抛出 ValueError
+    """
+    name = name or os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"未知的计算后端: {name}（可选: {', '.join(BACKENDS)}）")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
+
+def select_backend(name: str):
+    """设置本进程及其子进程默认使用的计算后端"""
+    get_backend(name)
+    os.environ[BACKEND_ENV] = name
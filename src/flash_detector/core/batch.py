@@ -0,0 +1,280 @@
+import csv
+import glob
+import json
+import multiprocessing as mp
+import os
+import queue
+import time
+import cv2
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from ..core.detector import scan_flashes
+from ..core.temporal import RATE_KEYS
+from ..core.utils import format_time
+
+# 目录和通配符中识别为视频的扩展名
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.m4v', '.wmv', '.flv', '.webm',
+                    '.mpg', '.mpeg', '.ts', '.mts')
+
+# 清单文件的扩展名，每行一个视频路径，# 开头为注释
+MANIFEST_EXTENSIONS = ('.txt', '.lst', '.list')
+
+# CSV 输出的列，每个事件一行，没有事件或处理失败的视频也输出一行
+CSV_FIELDS = ['video_path', 'status', 'start_frame', 'end_frame', 'peak_frame',
+              'peak_time', 'intensity', 'x', 'y', 'frequency', 'flash_rate', 'transitions',
+              'swing', 'error']
+
+# 等待工作进程结果时检查进程是否异常退出的间隔（秒）
+_POLL_INTERVAL = 0.1
+
+def _is_video(path: str) -> bool:
+    return path.lower().endswith(VIDEO_EXTENSIONS)
+
+def _read_manifest(path: str) -> List[str]:
+    """读取清单文件，相对路径按清单所在目录解析"""
+    base = os.path.dirname(os.path.abspath(path))
+    videos = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                videos.append(os.path.join(base, line))
+    return videos
+
+def collect_videos(inputs: Iterable[str]) -> List[str]:
+    """
+    将输入展开为视频文件列表，去重并保持输入顺序
+    inputs: 视频文件、目录（递归查找视频）、通配符或清单文件
+    """
+    videos = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                videos.extend(os.path.join(root, name) for name in sorted(files)
+                              if _is_video(name))
+        elif glob.has_magic(item):
+            videos.extend(path for path in sorted(glob.glob(item, recursive=True))
+                          if os.path.isfile(path) and _is_video(path))
+        elif item.lower().endswith(MANIFEST_EXTENSIONS):
+            videos.extend(_read_manifest(item))
+        else:
+            videos.append(item)
+
+    seen = set()
+    unique = []
+    for path in videos:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+def probe_video(video_path: str) -> Optional[Dict]:
+    """
+    读取视频的帧数和帧率
+    返回: {'frames', 'fps'}，无法打开或没有可读帧时返回 None
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return None
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        if frames <= 0 or fps <= 0:
+            return None
+        return {'frames': frames, 'fps': fps}
+    finally:
+        cap.release()
+
+def plan_jobs(videos: List[str]) -> List[Dict]:
+    """
+    探测每个视频并按帧数从多到少排序（最长任务优先），使工作进程的负载更均衡
+    返回: 任务列表，无法探测的视频 probe 为 None，排在最后
+    """
+    jobs = [{'video_path': path, 'probe': probe_video(path)} for path in videos]
+    jobs.sort(key=lambda job: -job['probe']['frames'] if job['probe'] else 1)
+    return jobs
+
+def _event_record(event: Dict, fps: float) -> Dict:
+    """将事件转换为可序列化的记录"""
+    x, y = event['position']
+    record = {
+        'start_frame': event['start_frame'],
+        'end_frame': event['end_frame'],
+        'peak_frame': event['peak_frame'],
+        'peak_time': format_time(event['peak_frame'] / fps),
+        'intensity': round(float(event['intensity']), 4),
+        'position': [int(x), int(y)],
+        'frequency': event['frequency'],
+        'detections': event['detections']
+    }
+    # 启用闪烁频率分析时附加的指标
+    for key in RATE_KEYS:
+        if key in event:
+            record[key] = round(event[key], 4)
+    return record
+
+def run_job(video_path: str, probe: Optional[Dict], params: Dict, retries: int = 1) -> Dict:
+    """
+    扫描一个视频，失败时重试
+    params: 传给 scan_flashes 的检测参数
+    retries: 失败后的重试次数
+    返回: 结果记录，status 为 'ok'、'failed'（重试后仍失败）或 'skipped'（无法打开）
+    """
+    result = {'video_path': video_path, 'status': 'skipped', 'frames': 0, 'fps': 0.0,
+              'events': [], 'attempts': 0, 'process_time': 0.0, 'error': None}
+    if probe is None:
+        result['error'] = "无法打开视频文件"
+        return result
+
+    result['frames'] = probe['frames']
+    result['fps'] = probe['fps']
+    start = time.time()
+    for attempt in range(1, retries + 2):
+        result['attempts'] = attempt
+        try:
+            result['events'] = [_event_record(event, probe['fps'])
+                                for event in scan_flashes(video_path, **params)]
+            result['status'] = 'ok'
+            result['error'] = None
+            break
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = str(e)
+    result['process_time'] = time.time() - start
+    return result
+
+def _job_worker(index: int, job: Dict, params: Dict, retries: int, results):
+    """在独立的子进程中处理一个视频，结果按任务序号放入结果队列"""
+    results.put((index, run_job(job['video_path'], job['probe'], params, retries)))
+
+def _crashed_result(job: Dict, attempts: int, exitcode: int) -> Dict:
+    """工作进程异常退出（如解码器崩溃、内存不足被杀死）时的失败记录"""
+    probe = job['probe']
+    return {'video_path': job['video_path'], 'status': 'failed',
+            'frames': probe['frames'] if probe else 0,
+            'fps': probe['fps'] if probe else 0.0,
+            'events': [], 'attempts': attempts, 'process_time': 0.0,
+            'error': f"工作进程异常退出（退出码 {exitcode}）"}
+
+def _run_jobs_parallel(jobs: List[Dict], params: Dict, workers: int,
+                       retries: int) -> Iterator[Dict]:
+    """
+    每个视频在各自的子进程中处理，同时最多运行 workers 个，按完成顺序产出结果
+    某个子进程异常退出只影响它正在处理的视频：按 retries 重新处理，仍崩溃则记录为 failed
+    """
+    results = mp.Queue()
+    pending = deque((index, job, 0) for index, job in enumerate(jobs))
+    running = {}
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                index, job, crashes = pending.popleft()
+                process = mp.Process(target=_job_worker, daemon=True,
+                                     args=(index, job, params, retries, results))
+                process.start()
+                running[index] = (process, job, crashes)
+
+            try:
+                index, result = results.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                for index, (process, job, crashes) in list(running.items()):
+                    if process.exitcode is None or process.exitcode == 0:
+                        continue
+                    del running[index]
+                    crashes += 1
+                    if crashes <= retries:
+                        pending.append((index, job, crashes))
+                    else:
+                        yield _crashed_result(job, crashes, process.exitcode)
+                continue
+
+            if index not in running:
+                continue
+            process, job, crashes = running.pop(index)
+            process.join()
+            # 之前崩溃的次数也计入尝试次数
+            result['attempts'] += crashes
+            yield result
+    finally:
+        for process, _, _ in running.values():
+            process.terminate()
+            process.join()
+
+class BatchWriter:
+    def __init__(self, output_path: str, output_format: Optional[str] = None):
+        """
+        逐个写入批处理结果，每写一条就刷新到磁盘，中断时已完成的结果不会丢失
+        output_path: 输出文件路径
+        output_format: 'jsonl' 或 'csv'，默认按扩展名判断
+        """
+        if output_format is None:
+            output_format = 'csv' if output_path.lower().endswith('.csv') else 'jsonl'
+        if output_format not in ('jsonl', 'csv'):
+            raise ValueError(f"未知的输出格式: {output_format}")
+
+        self.output_format = output_format
+        self.file = open(output_path, 'w', encoding='utf-8', newline='')
+        self.csv = None
+        if output_format == 'csv':
+            self.csv = csv.DictWriter(self.file, fieldnames=CSV_FIELDS)
+            self.csv.writeheader()
+
+    def write(self, result: Dict):
+        if self.csv is None:
+            self.file.write(json.dumps(result, ensure_ascii=False) + '\n')
+        else:
+            base = {'video_path': result['video_path'], 'status': result['status'],
+                    'error': result['error'] or ''}
+            if not result['events']:
+                self.csv.writerow(base)
+            for event in result['events']:
+                row = dict(base)
+                row.update({key: event[key] for key in
+                            ('start_frame', 'end_frame', 'peak_frame', 'peak_time',
+                             'intensity', 'frequency')})
+                row.update({key: event[key] for key in RATE_KEYS if key in event})
+                row['x'], row['y'] = event['position']
+                self.csv.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def run_batch(
+    inputs: Iterable[str],
+    params: Dict,
+    output_path: Optional[str] = None,
+    output_format: Optional[str] = None,
+    workers: int = 1,
+    retries: int = 1
+) -> Iterator[Dict]:
+    """
+    批量扫描多个视频，按完成顺序逐个产出结果记录
+    inputs: 视频文件、目录、通配符或清单文件
+    params: 传给 scan_flashes 的检测参数（不含 video_path）
+    output_path: 结果文件路径，给出时每完成一个视频就追加写入
+    output_format: 'jsonl' 或 'csv'，默认按扩展名判断
+    workers: 工作进程数，大于1时每个视频在独立的子进程中并行处理，最长的任务最先开始
+    retries: 扫描失败（或工作进程崩溃）后的重试次数，仍失败的视频记录为 failed 并继续处理其余视频
+    """
+    jobs = plan_jobs(collect_videos(inputs))
+    writer = BatchWriter(output_path, output_format) if output_path else None
+    try:
+        if workers <= 1:
+            for job in jobs:
+                result = run_job(job['video_path'], job['probe'], params, retries)
+                if writer:
+                    writer.write(result)
+                yield result
+            return
+
+        for result in _run_jobs_parallel(jobs, params, workers, retries):
+            if writer:
+                writer.write(result)
+            yield result
+    finally:
+        if writer:
+            writer.close()
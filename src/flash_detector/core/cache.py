@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from ..core.utils import CIRCULARITY_VERSION, time_str_to_seconds, video_fingerprint
+from ..core.detector import create_debug_images, read_frame, scan_flashes
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只在进程内加锁
+    fcntl = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'flash_detector', 'results')
+# 结果缓存的默认容量（字节）
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# 同一进程内多个线程（如作业服务）共用缓存目录时，统计文件的读写互斥
+_stats_lock = threading.Lock()
+
+# 影响检测结果的参数及默认值，其余参数（并行、预取、门限等）不改变结果，不参与缓存键
+RESULT_PARAMETERS = {
+    'abs_threshold': 20,
+    'region_size': 20,
+    'frame_step': 1,
+    'start_time': "0:00",
+    'circularity_threshold': 0.5,
+    'merge_gap': None,
+    'analysis_scale': 1.0,
+    'ingest': 'opencv',
+    'buffer_size': 5,
+    'rate_window': 0.0,
+    'low_memory': None,
+    'mask': None
+}
+
+def normalize_params(params: Dict) -> Dict:
+    """将检测参数规范化，使等价的参数组合得到相同的缓存键"""
+    values = dict(RESULT_PARAMETERS)
+    values.update({key: value for key, value in params.items() if key in RESULT_PARAMETERS})
+    frame_step = int(values['frame_step'])
+    merge_gap = values['merge_gap'] or int(values['buffer_size']) * frame_step
+    return {
+        'abs_threshold': float(values['abs_threshold']),
+        'region_size': int(values['region_size']),
+        'frame_step': frame_step,
+        'start_seconds': float(time_str_to_seconds(str(values['start_time']))),
+        'circularity_threshold': float(values['circularity_threshold']),
+        'merge_gap': int(merge_gap),
+        'analysis_scale': float(values['analysis_scale']),
+        'ingest': values['ingest'],
+        'buffer_size': int(values['buffer_size']),
+        'rate_window': float(values['rate_window']),
+        'low_memory': values['low_memory'],
+        'circularity_version': CIRCULARITY_VERSION,
+        'mask': values['mask'].fingerprint() if values['mask'] else None
+    }
+
+class ResultCache:
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_CACHE_BYTES):
+        """
+        磁盘上的检测结果缓存，按最近使用时间淘汰，总大小不超过 max_bytes
+        缓存键由视频内容指纹和规范化的检测参数组成，命中/未命中次数记录在 stats.json 中
+        cache_dir: 缓存目录，默认 ~/.cache/flash_detector/results
+        max_bytes: 缓存容量（字节）
+        """
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, video_path: str, params: Dict) -> str:
+        """计算缓存键"""
+        normalized = json.dumps(normalize_params(params), sort_keys=True)
+        params_hash = hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+        return f"{video_fingerprint(video_path)}_{params_hash}"
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def _entries(self) -> List[os.DirEntry]:
+        return [entry for entry in os.scandir(self.cache_dir)
+                if entry.is_file() and entry.name.endswith('.json')
+                and entry.name != 'stats.json']
+
+    @contextmanager
+    def _locked_stats(self):
+        """互斥地读写 stats.json：进程内用线程锁，进程间用 stats.lock 上的文件锁"""
+        with _stats_lock, open(os.path.join(self.cache_dir, 'stats.lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _record(self, name: str):
+        """累加命中/未命中次数，多个进程或线程共用缓存目录时不丢失计数"""
+        path = os.path.join(self.cache_dir, 'stats.json')
+        with self._locked_stats():
+            counts = self._counts()
+            counts[name] += 1
+            # 每个写入者使用独立的临时文件，再原子替换
+            fd, tmp_path = tempfile.mkstemp(prefix='stats.', suffix='.tmp', dir=self.cache_dir)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(counts, f)
+            os.replace(tmp_path, path)
+
+    def _counts(self) -> Dict[str, int]:
+        try:
+            with open(os.path.join(self.cache_dir, 'stats.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'hits': 0, 'misses': 0}
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        """读取缓存的事件列表，未命中时返回 None"""
+        path = self._entry_path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                events = json.load(f)['events']
+        except (OSError, ValueError, KeyError):
+            self._record('misses')
+            return None
+
+        # 更新访问时间，用于最近最少使用淘汰
+        os.utime(path)
+        self._record('hits')
+        for event in events:
+            event['position'] = tuple(event['position'])
+        return events
+
+    def put(self, key: str, events: List[Dict]):
+        """写入事件列表（不含调试图像），并淘汰最久未使用的条目"""
+        records = []
+        for event in events:
+            record = {k: v for k, v in event.items() if k != 'debug_images'}
+            record['position'] = [int(v) for v in record['position']]
+            record['intensity'] = float(record['intensity'])
+            records.append(record)
+
+        path = self._entry_path(key)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'events': records}, f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """按最近使用时间从旧到新删除条目，直到总大小不超过容量"""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            os.remove(entry.path)
+
+    def stats(self) -> Dict:
+        """返回累计命中/未命中次数、条目数和总大小（字节）"""
+        entries = self._entries()
+        counts = self._counts()
+        return {
+            'hits': counts['hits'],
+            'misses': counts['misses'],
+            'entries': len(entries),
+            'bytes': sum(entry.stat().st_size for entry in entries)
+        }
+
+    def clear(self) -> int:
+        """清空缓存和统计，返回删除的条目数"""
+        count = len(self._entries())
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        return count
+
+def attach_debug_images(video_path: str, event: Dict, region_size: int,
+                        low_memory: Optional[str] = None) -> Dict:
+    """
+    重新读取事件的峰值帧并生成调试图像
+    low_memory: 与扫描时一致，给出时只保留闪光位置周围的区域
+    """
+    frame = read_frame(video_path, event['peak_frame'])
+    if frame is not None:
+        event['debug_images'] = create_debug_images(frame, event['position'], region_size,
+                                                    roi=bool(low_memory))
+    return event
+
+def scan_flashes_cached(
+    video_path: str,
+    cache: ResultCache,
+    scan: Callable[..., Iterator[Dict]] = scan_flashes,
+    debug_images: bool = False,
+    stats: Optional[Dict] = None,
+    **params
+) -> Iterator[Dict]:
+    """
+    带结果缓存的扫描，命中时直接产出缓存的事件，调试图像按需从峰值帧重新生成
+    未命中时运行 scan 并在完整遍历后写入缓存
+    scan: 扫描函数，scan_flashes 或 scan_flashes_parallel
+    stats: 可选的统计字典，记录 cache_hit（本次是否命中）
+    params: 传给 scan 的其余参数（按名称给出）
+    """
+    key = cache.key(video_path, params)
+    events = cache.get(key)
+    if stats is not None:
+        stats['cache_hit'] = events is not None
+
+    region_size = params.get('region_size', RESULT_PARAMETERS['region_size'])
+    if events is not None:
+        for event in events:
+            if debug_images:
+                attach_debug_images(video_path, event, region_size,
+                                    params.get('low_memory'))
+            yield event
+        return
+
+    events = []
+    for event in scan(video_path, debug_images=debug_images, stats=stats, **params):
+        events.append(event)
+        yield event
+    cache.put(key, events)
@@ -0,0 +1,79 @@
+import json
+import os
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+CHECKPOINT_VERSION = 1
+
+def default_checkpoint_path(video_path: str) -> str:
+    """默认的检查点文件路径（与视频放在一起）"""
+    return video_path + '.checkpoint.npz'
+
+def _event_to_json(event: Dict) -> Dict:
+    """去掉调试图像，转换为可 JSON 序列化的事件"""
+    record = {key: value for key, value in event.items() if key != 'debug_images'}
+    record['position'] = [int(v) for v in record['position']]
+    record['intensity'] = float(record['intensity'])
+    return record
+
+def _event_from_json(record: Dict) -> Dict:
+    event = dict(record)
+    event['position'] = tuple(event['position'])
+    return event
+
+def save_checkpoint(
+    path: str,
+    detector_state: Dict[str, np.ndarray],
+    next_frame: int,
+    events: List[Dict],
+    current: Optional[Dict],
+    params: Dict,
+    stats: Optional[Dict] = None
+):
+    """
+    保存扫描检查点
+    先写入临时文件再替换，进程在写入过程中被终止也不会破坏已有的检查点
+    detector_state: FlashDetectorBuffer.get_state() 导出的状态
+    next_frame: 下一个要分析的帧号
+    events: 已产出的事件
+    current: 尚未结束的事件
+    params: 视频指纹和检测参数，恢复时用于校验
+    stats: 统计字典
+    """
+    metadata = {
+        'version': CHECKPOINT_VERSION,
+        'params': params,
+        'next_frame': next_frame,
+        'events': [_event_to_json(event) for event in events],
+        'current': _event_to_json(current) if current is not None else None,
+        'stats': {key: value for key, value in (stats or {}).items()
+                  if isinstance(value, (int, float))}
+    }
+    arrays = {'state_' + key: value for key, value in detector_state.items()}
+    arrays['metadata'] = np.array(json.dumps(metadata, ensure_ascii=False))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path: str, params: Dict) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    读取扫描检查点
+    params: 当前的视频指纹和检测参数，与检查点不一致时抛出 ValueError
+    返回: (检测器状态, 元数据)，元数据包含 next_frame、events、current 和 stats
+    """
+    with np.load(path, allow_pickle=False) as data:
+        metadata = json.loads(str(data['metadata']))
+        state = {key[len('state_'):]: data[key] for key in data.files
+                 if key.startswith('state_')}
+
+    if metadata.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"不支持的检查点版本: {metadata.get('version')}")
+    if metadata['params'] != json.loads(json.dumps(params)):
+        raise ValueError("检查点与当前视频或检测参数不一致")
+
+    metadata['events'] = [_event_from_json(event) for event in metadata['events']]
+    if metadata['current'] is not None:
+        metadata['current'] = _event_from_json(metadata['current'])
+    return state, metadata
@@ -1,72 +1,472 @@
+import os
 import cv2
+import time
 import numpy as np
 from collections import deque
-from typing import Dict, Optional, List, Tuple
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, Optional, List, Tuple
 
-from ..core.utils import time_str_to_seconds, check_circularity
-from ..visualization.visualizer import create_diff_map
+from ..core.utils import (CIRCULARITY_VERSION, time_str_to_seconds, check_circularity,
+                          video_fingerprint)
+from ..core.grid import (grid_block_means, grid_brightness_banded, grid_brightness_window,
+                         grid_shape)
+from ..core.pipeline import FramePrefetcher
+from ..core.ingest import open_capture, resize_gray, scaled_region_size
+from ..core.checkpoint import load_checkpoint, save_checkpoint
+from ..core.backends import get_backend
+from ..core.mask import CellMask, RegionMask
+from ..core.profiler import Profiler
+from ..core.temporal import RATE_KEYS, FlashRateAnalyzer
+from ..visualization.visualizer import create_diff_map, create_region_detail
+
+ENGINES = ('vectorized', 'loop')
+# 亮度历史可用的存储类型，float16 和 uint8 为低内存模式的量化存储
+HISTORY_DTYPES = ('float32', 'float16', 'uint8')
+# 低内存模式可选的存储类型
+LOW_MEMORY_DTYPES = ('uint8', 'float16')
+# 低内存模式下按条带计算网格亮度时每个条带的区域行数
+LOW_MEMORY_BAND_ROWS = 16
+# 低内存模式下调试图像截取区域的最小边长
+DEBUG_ROI_SIZE = 200
+# 按需绘制的调试图像
+DEBUG_IMAGE_KEYS = ('diff_map', 'region_detail')
+# 变化门限的安全余量，覆盖子块均值的舍入误差
+GATE_MARGIN = 2.0
 
 class FlashDetectorBuffer:
-    def __init__(self, buffer_size=5, region_size=20, diff_threshold=30):
+    def __init__(self, buffer_size=5, region_size=20, diff_threshold=30,
+                 engine='vectorized', keep_frames=False, gate=False,
+                 hierarchical=False, tile_size=8, rate_window=0, rate_fps=30.0,
+                 history_dtype='float32', band_rows=0, backend=None):
         """
         初始化检测器
         buffer_size: 缓存帧数
         region_size: 检测区域大小
         diff_threshold: 差异阈值
+        engine: 计算引擎，'vectorized' 为整帧向量化计算，
+                'loop' 为逐区域循环的参考实现（用于测试对照）
+        keep_frames: 是否在 frame_buffer 中保留最近的灰度帧（默认不保留）
+        gate: 是否启用变化门限。先用半区域大小子块的均值判断窗口内是否有区域
+              可能超过差异阈值，不可能时跳过整帧的网格计算，检测结果不变。
+              只在 vectorized 引擎且 region_size 为偶数时生效
+        hierarchical: 是否启用由粗到细的分层定位。先用子块均值找出窗口内可能超过阈值的区域，
+                      再只对这些区域所在的分块按 region_size 精确计算，结果与整帧扫描一致。
+                      生效条件与 gate 相同，同时启用时以分层定位为准
+        tile_size: 分层定位时精确计算的分块边长（以区域个数计）
+        rate_window: 闪烁频率分析的滑动窗口长度（分析帧数），大于0时对每帧的整个网格统计
+                     跳变次数、每秒闪光次数和亮度摆幅，并附加到检测结果中。
+                     频率分析需要每帧完整的网格亮度，启用时不使用变化门限和分层定位
+        rate_fps: 分析帧率，用于换算每秒闪光次数
+        history_dtype: 亮度历史的存储类型。'float16' 和 'uint8' 为量化存储（uint8 四舍五入到整数亮度），
+                       时序分析只使用网格大小的临时数组；检测结果可能因量化与 float32 存储略有差异。
+                       量化存储只用于 vectorized 引擎，且不保留灰度帧，因此不使用变化门限和分层定位
+        band_rows: 大于0时按每条带 band_rows 行区域分批计算网格亮度，降低积分图的临时内存
+        backend: 灰度转换、网格亮度和时序检验使用的计算后端（'numpy'、'opencv' 或 'numba'），
+                 默认读取环境变量 FLASH_DETECTOR_BACKEND，未设置时为 'opencv'；各后端结果逐位一致
         """
+        if engine not in ENGINES:
+            raise ValueError(f"未知的计算引擎: {engine}")
+        if history_dtype not in HISTORY_DTYPES:
+            raise ValueError(f"未知的亮度历史存储类型: {history_dtype}")
+        if engine == 'loop':
+            history_dtype = 'float32'
+
         self.buffer_size = buffer_size
         self.region_size = region_size
         self.diff_threshold = diff_threshold
+        self.engine = engine
+        self.history_dtype = np.dtype(history_dtype)
+        self.compact = history_dtype != 'float32'
+        self.band_rows = band_rows
+        self.backend = get_backend(backend)
+        # 最近一帧的尺寸 (高, 宽)，用于换算每百万像素的内存占用
+        self.frame_shape = None
+
+        # 帧缓冲区（可选）
+        self.frame_buffer = deque(maxlen=buffer_size) if keep_frames else None
+        # 已接收的帧数，缓冲区未满前不参与分析
+        self.frames_seen = 0
+
+        # 区域亮度历史环形缓冲区，形状为 (buffer_size, grid_h, grid_w)
+        self.history = None
+        # 下一次写入的位置，缓冲区写满后即为最旧的一帧
+        self.history_index = 0
+        # 已写入的历史帧数（不超过 buffer_size）
+        self.history_len = 0
+
+        # 闪烁频率分析，跳变阈值与差异阈值相同
+        self.rate = (FlashRateAnalyzer(rate_window, rate_fps, diff_threshold,
+                                       self.history_dtype if self.compact else np.float32)
+                     if rate_window > 0 else None)
 
-        # 帧缓冲区
-        self.frame_buffer = deque(maxlen=buffer_size)
-        # 区域亮度历史缓存
-        self.brightness_cache = {}
+        # 变化门限：子块均值的环形缓冲区，以及尚未计算网格亮度的灰度帧
+        self.gate = (gate and engine == 'vectorized' and region_size % 2 == 0
+                     and self.rate is None and not self.compact)
+        self._gate_history = None
+        self._gate_index = 0
+        self._gate_len = 0
+        self._pending = deque(maxlen=buffer_size)
+
+        # 分层定位：最近 buffer_size 帧灰度图、已处理帧计数和每个分块已更新到的帧
+        self.hierarchical = (hierarchical and engine == 'vectorized' and region_size % 2 == 0
+                             and self.rate is None and not self.compact)
+        self.tile_size = tile_size
+        self._gray_ring = [None] * buffer_size
+        self._frame_counter = 0
+        self._tile_valid = None
+        # 可选的区域掩码，设置后只计算和记录活跃区域
+        self.cell_mask = None
+        # 可选的性能分析器，记录变化门限、网格亮度和时序分析各阶段的耗时
+        self.profiler = None
+        self.gate_stats = {
+            'gate_frames': 0,    # 经过门限判断的帧数
+            'gate_skipped': 0,   # 门限判断后跳过分析的帧数
+            'grid_frames': 0,    # 实际计算网格亮度的帧数
+            'gate_time': 0.0,    # 门限判断用时
+            'grid_time': 0.0     # 网格亮度计算与时序分析用时
+        }
+
+    @property
+    def warmup_frames(self) -> int:
+        """第一次可能产生检测结果之前需要输入的帧数"""
+        # 前 buffer_size - 1 帧只用于填充帧缓冲区，之后再积累 buffer_size 帧亮度历史
+        return 2 * self.buffer_size - 2
 
     def _calculate_region_brightness(self, frame: np.ndarray, x: int, y: int) -> float:
         """计算指定区域的平均亮度"""
         region = frame[y:y+self.region_size, x:x+self.region_size]
         return np.mean(region)
 
+    def _allocate_history(self, *shape: int):
+        """按网格大小（设置区域掩码时为活跃区域数）预分配环形缓冲区和分析用的临时数组"""
+        self.history = np.zeros((self.buffer_size,) + shape, dtype=self.history_dtype)
+        self.history_index = 0
+        self.history_len = 0
+
+        # 时序检验的工作数组由计算后端分配，其中 range、sign_changes 和 candidates 为检验结果
+        self._work = self.backend.allocate(self.buffer_size, shape, self.history_dtype,
+                                           self.compact)
+        self._scores = np.empty(shape, dtype=np.float32)
+
+    def _push_history(self, brightness: np.ndarray):
+        """将一帧的网格亮度写入环形缓冲区"""
+        if self.history is None or self.history.shape[1:] != brightness.shape:
+            # 分辨率变化时历史记录不再可比
+            self._allocate_history(*brightness.shape)
+
+        if self.history_dtype == np.uint8:
+            np.copyto(self.history[self.history_index], np.rint(brightness), casting='unsafe')
+        else:
+            self.history[self.history_index] = brightness
+        self.history_index = (self.history_index + 1) % self.buffer_size
+        self.history_len = min(self.history_len + 1, self.buffer_size)
+        if self.rate is not None:
+            self.rate.update(brightness)
+
     def process_frame(self, frame: np.ndarray, frame_num: int) -> Optional[Dict]:
         """
         处理新的帧
-        frame: 输入帧
+        frame: 输入帧（BGR 或灰度图）
         frame_num: 帧号
         返回: 如果检测到闪光，返回位置和强度信息
         """
         # 转换为灰度图
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        gray = self.backend.to_gray(frame)
+        self.frame_shape = gray.shape[:2]
 
-        # 将新帧添加到缓冲区
-        self.frame_buffer.append(gray)
+        if self.frame_buffer is not None:
+            self.frame_buffer.append(gray)
 
         # 缓冲区未满时继续收集帧
-        if len(self.frame_buffer) < self.buffer_size:
+        self.frames_seen += 1
+        if self.frames_seen < self.buffer_size:
             return None
 
+        if self.engine == 'loop':
+            if self.profiler is None:
+                return self._process_regions_loop(gray, frame_num)
+            # 逐区域循环中亮度计算与时序分析交织在一起，整体计入网格亮度
+            with self.profiler.stage('grid'):
+                return self._process_regions_loop(gray, frame_num)
+        if self.hierarchical:
+            return self._process_hierarchical(gray, frame_num)
+        if self.gate:
+            return self._process_gated(gray, frame_num)
+        if self.profiler is None:
+            return self._analyze_brightness(self._grid_brightness(gray), frame_num)
+
+        with self.profiler.stage('grid'):
+            brightness = self._grid_brightness(gray)
+        with self.profiler.stage('temporal'):
+            return self._analyze_brightness(brightness, frame_num)
+
+    def set_mask(self, cell_mask: Optional[CellMask]):
+        """
+        设置区域掩码：之后只计算活跃区域的亮度，亮度历史和时序分析也只包含活跃区域，
+        排除区域不会产生检测结果。只用于 vectorized 引擎，不使用变化门限和分层定位
+        """
+        if cell_mask is not None and self.engine != 'vectorized':
+            raise ValueError("区域掩码只用于 vectorized 引擎")
+        self.cell_mask = cell_mask
+        if cell_mask is not None:
+            self.gate = False
+            self.hierarchical = False
+        self.clear_cache()
+
+    def _grid_brightness(self, gray: np.ndarray) -> np.ndarray:
+        """
+        计算整帧的网格亮度，设置了 band_rows 时按条带分批计算；
+        设置了区域掩码时只计算活跃区域，返回一维数组
+        """
+        if self.cell_mask is not None:
+            return self.cell_mask.brightness(gray)
+        if self.band_rows > 0:
+            return grid_brightness_banded(gray, self.region_size, self.band_rows)
+        return self.backend.grid_brightness(gray, self.region_size)
+
+    def _push_blocks(self, gray: np.ndarray) -> Optional[np.ndarray]:
+        """
+        将一帧的子块均值写入环形缓冲区
+        返回: 缓冲区写满后返回窗口内每个子块的亮度变化幅度，否则返回 None
+        """
+        blocks = grid_block_means(gray, self.region_size)
+        if self._gate_history is None or self._gate_history.shape[1:] != blocks.shape:
+            self._gate_history = np.zeros((self.buffer_size,) + blocks.shape, dtype=np.uint8)
+            self._gate_index = 0
+            self._gate_len = 0
+        self._gate_history[self._gate_index] = blocks
+        self._gate_index = (self._gate_index + 1) % self.buffer_size
+        self._gate_len = min(self._gate_len + 1, self.buffer_size)
+
+        if self._gate_len < self.buffer_size:
+            return None
+        return np.max(self._gate_history, axis=0) - np.min(self._gate_history, axis=0)
+
+    def _process_hierarchical(self, gray: np.ndarray, frame_num: int) -> Optional[Dict]:
+        """
+        由粗到细的分层定位
+        粗层：子块均值的变化幅度加余量超过阈值的子块为活跃子块，区域的变化幅度不超过其
+        2x2 子块的最大变化幅度，因此只有包含活跃子块的区域可能被检测到。
+        细层：只对包含候选区域的分块精确计算区域亮度。每个分块记录已更新到的帧，
+        重新变为活跃时用保留的最近 buffer_size 帧灰度图补算缺失的历史
+        """
+        height, width = gray.shape
+        grid_h, grid_w = grid_shape(height, width, self.region_size)
+        if self.history is None or self.history.shape[1:] != (grid_h, grid_w):
+            self._allocate_history(grid_h, grid_w)
+            tiles = (-(-grid_h // self.tile_size), -(-grid_w // self.tile_size))
+            self._tile_valid = np.full(tiles, -self.buffer_size - 1, dtype=np.int64)
+            self._frame_counter = 0
+
+        start = time.perf_counter()
+        counter = self._frame_counter
+        self._gray_ring[counter % self.buffer_size] = gray
+        self._frame_counter += 1
+        block_range = self._push_blocks(gray)
+        if block_range is None or grid_h == 0 or grid_w == 0:
+            return None
+
+        # 粗层：找出可能超过阈值的区域
+        block_active = block_range.astype(np.float32) + GATE_MARGIN > self.diff_threshold
+        cell_active = (block_active[:-1, :-1] | block_active[1:, :-1] |
+                       block_active[:-1, 1:] | block_active[1:, 1:])[:grid_h, :grid_w]
+        refine_start = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.add('gate', refine_start - start)
+        if not cell_active.any():
+            return None
+        grid_time = 0.0
+
+        tile = self.tile_size
+        best = None
+        # 时间顺序（从旧到新）的环形缓冲区下标
+        order = [(counter + 1 + i) % self.buffer_size for i in range(self.buffer_size)]
+        for tile_y, tile_x in zip(*np.nonzero(self._active_tiles(cell_active))):
+            grid_y0, grid_x0 = int(tile_y) * tile, int(tile_x) * tile
+            grid_y1, grid_x1 = min(grid_y0 + tile, grid_h), min(grid_x0 + tile, grid_w)
+
+            # 细层：补算该分块缺失的历史
+            grid_start = time.perf_counter()
+            missing = min(self.buffer_size, counter - self._tile_valid[tile_y, tile_x])
+            for k in range(counter - missing + 1, counter + 1):
+                slot = k % self.buffer_size
+                self.history[slot, grid_y0:grid_y1, grid_x0:grid_x1] = grid_brightness_window(
+                    self._gray_ring[slot], self.region_size,
+                    grid_y0, grid_y1, grid_x0, grid_x1)
+            self._tile_valid[tile_y, tile_x] = counter
+            grid_time += time.perf_counter() - grid_start
+
+            window = self.history[order, grid_y0:grid_y1, grid_x0:grid_x1]
+            max_diff = np.max(window, axis=0) - np.min(window, axis=0)
+            candidates = max_diff > self.diff_threshold
+            if not candidates.any():
+                continue
+            diffs = np.diff(window, axis=0)
+            sign_changes = np.sum(diffs[:-1] * diffs[1:] < 0, axis=0)
+            candidates &= sign_changes >= 2
+            if not candidates.any():
+                continue
+
+            index = np.argmax(np.where(candidates, max_diff, -np.inf))
+            local_y, local_x = np.unravel_index(index, max_diff.shape)
+            intensity = float(max_diff[local_y, local_x])
+            cell = (grid_y0 + int(local_y), grid_x0 + int(local_x))
+            # 强度相同时取行优先顺序中靠前的区域，与整帧扫描一致
+            if best is None or intensity > best[0] or (intensity == best[0] and cell < best[1]):
+                best = (intensity, cell, int(sign_changes[local_y, local_x]))
+
+        if self.profiler is not None:
+            self.profiler.add('grid', grid_time)
+            self.profiler.add('temporal', time.perf_counter() - refine_start - grid_time)
+        if best is None:
+            return None
+
+        intensity, (grid_y, grid_x), frequency = best
+        grid_step = self.region_size // 2
+        x = grid_x * grid_step
+        y = grid_y * grid_step
+        return {
+            'frame_num': frame_num,
+            'position': (x + self.region_size//2, y + self.region_size//2),
+            'intensity': intensity,
+            'frequency': frequency
+        }
+
+    def _active_tiles(self, cell_active: np.ndarray) -> np.ndarray:
+        """将区域级的候选标记汇总到分块"""
+        tile = self.tile_size
+        tiles_h, tiles_w = self._tile_valid.shape
+        padded = np.zeros((tiles_h * tile, tiles_w * tile), dtype=bool)
+        padded[:cell_active.shape[0], :cell_active.shape[1]] = cell_active
+        return padded.reshape(tiles_h, tile, tiles_w, tile).any(axis=(1, 3))
+
+    def _process_gated(self, gray: np.ndarray, frame_num: int) -> Optional[Dict]:
+        """
+        先做子块级的变化判断，窗口内没有区域可能超过阈值时跳过网格计算
+        每个区域的均值是它 2x2 个子块均值的平均，其变化幅度不超过子块变化幅度的最大值，
+        因此子块变化幅度加上舍入余量仍不超过阈值时，任何区域都不可能被检测到。
+        被跳过的帧先保留在待计算队列中，门限打开时按顺序补算，保证亮度历史与不启用门限时一致
+        """
+        start = time.perf_counter()
+        block_range = self._push_blocks(gray)
+        self._pending.append(gray)
+
+        skip = (block_range is not None and
+                float(block_range.max()) + GATE_MARGIN <= self.diff_threshold)
+
+        gate_end = time.perf_counter()
+        self.gate_stats['gate_frames'] += 1
+        self.gate_stats['gate_time'] += gate_end - start
+        if self.profiler is not None:
+            self.profiler.add('gate', gate_end - start)
+        if skip:
+            self.gate_stats['gate_skipped'] += 1
+            return None
+
+        start = time.perf_counter()
+        pending = list(self._pending)
+        self._pending.clear()
+        for pending_gray in pending[:-1]:
+            self._push_history(self.backend.grid_brightness(pending_gray, self.region_size))
+        brightness = self.backend.grid_brightness(gray, self.region_size)
+        grid_end = time.perf_counter()
+        result = self._analyze_brightness(brightness, frame_num)
+        end = time.perf_counter()
+        self.gate_stats['grid_frames'] += len(pending)
+        self.gate_stats['grid_time'] += end - start
+        if self.profiler is not None:
+            self.profiler.add('grid', grid_end - start, len(pending))
+            self.profiler.add('temporal', end - grid_end)
+        return result
+
+    def gate_summary(self) -> Dict:
+        """
+        变化门限的统计
+        返回: gate_skipped（跳过的帧数）和 gate_saved（估计节省的时间，秒）
+        """
+        stats = self.gate_stats
+        saved = 0.0
+        if stats['grid_frames']:
+            per_frame = stats['grid_time'] / stats['grid_frames']
+            saved = (stats['gate_frames'] - stats['grid_frames']) * per_frame - stats['gate_time']
+        return {'gate_skipped': stats['gate_skipped'], 'gate_saved': saved}
+
+    def process_brightness(self, brightness: np.ndarray, frame_num: int) -> Optional[Dict]:
+        """
+        处理预先计算好的网格亮度（例如从亮度索引中读取），结果与 process_frame 一致
+        brightness: (grid_h, grid_w) 的网格亮度
+        frame_num: 帧号
+        """
+        self.frames_seen += 1
+        if self.frames_seen < self.buffer_size:
+            return None
+        return self._analyze_brightness(brightness, frame_num)
+
+    def _analyze_brightness(self, brightness: np.ndarray, frame_num: int) -> Optional[Dict]:
+        """将一帧网格亮度写入历史，并对整个网格进行向量化时序分析"""
+        self._push_history(brightness)
+
+        if self.history_len < self.buffer_size or self.history[0].size == 0:
+            return None
+
+        work = self._work
+        if not self.backend.window_test(self.history, self.history_index, self.diff_threshold,
+                                        work, self.compact):
+            return None
+
+        # 按行优先顺序取第一个最大值，与逐区域循环的 max() 结果一致
+        self._scores.fill(-np.inf)
+        np.copyto(self._scores, work['range'], where=work['candidates'])
+        index = np.argmax(self._scores)
+        if self.cell_mask is not None:
+            # 活跃区域按行优先顺序排列，取第一个最大值与整帧网格一致
+            cell = (index,)
+            grid_y, grid_x = self.cell_mask.cells[index]
+        else:
+            cell = np.unravel_index(index, self._scores.shape)
+            grid_y, grid_x = cell
+        grid_step = self.region_size // 2
+        x = int(grid_x) * grid_step
+        y = int(grid_y) * grid_step
+
+        result = {
+            'frame_num': frame_num,
+            'position': (x + self.region_size//2, y + self.region_size//2),
+            'intensity': float(work['range'][cell]),
+            'frequency': int(work['sign_changes'][cell])
+        }
+        if self.rate is not None:
+            result.update(self.rate.summary(cell))
+        return result
+
+    def _process_regions_loop(self, gray: np.ndarray, frame_num: int) -> Optional[Dict]:
+        """逐区域循环计算亮度并进行时序分析（参考实现）"""
         # 网格划分图像
         height, width = gray.shape
         grid_step = self.region_size // 2  # 网格步长
 
-        flash_regions = []
-        for y in range(0, height - self.region_size, grid_step):
-            for x in range(0, width - self.region_size, grid_step):
-                region_key = (x, y)
+        grid_h = len(range(0, height - self.region_size, grid_step))
+        grid_w = len(range(0, width - self.region_size, grid_step))
+        if self.history is None or self.history.shape[1:] != (grid_h, grid_w):
+            self._allocate_history(grid_h, grid_w)
+
+        slot = self.history_index
+        self.history_index = (slot + 1) % self.buffer_size
+        self.history_len = min(self.history_len + 1, self.buffer_size)
+        # 按时间顺序排列的环形缓冲区下标
+        order = [(self.history_index + i) % self.buffer_size
+                 for i in range(self.buffer_size)]
 
+        flash_regions = []
+        for grid_y, y in enumerate(range(0, height - self.region_size, grid_step)):
+            for grid_x, x in enumerate(range(0, width - self.region_size, grid_step)):
                 # 计算当前区域亮度
                 current_brightness = self._calculate_region_brightness(gray, x, y)
-
-                # 获取或初始化区域历史记录
-                if region_key not in self.brightness_cache:
-                    self.brightness_cache[region_key] = deque(maxlen=self.buffer_size)
-
-                brightness_history = self.brightness_cache[region_key]
-                brightness_history.append(current_brightness)
+                self.history[slot, grid_y, grid_x] = current_brightness
 
                 # 分析亮度变化
-                if len(brightness_history) == self.buffer_size:
-                    brightness_array = np.array(brightness_history)
+                if self.history_len == self.buffer_size:
+                    brightness_array = self.history[order, grid_y, grid_x]
                     max_diff = np.max(brightness_array) - np.min(brightness_array)
 
                     # 检查是否存在显著的周期性变化
@@ -80,19 +480,618 @@ class FlashDetectorBuffer:
                             flash_regions.append({
                                 'frame_num': frame_num,
                                 'position': (x + self.region_size//2, y + self.region_size//2),
-                                'intensity': max_diff,
-                                'frequency': sign_changes
+                                'intensity': float(max_diff),
+                                'frequency': int(sign_changes),
+                                'cell': (grid_y, grid_x)
                             })
 
+        if self.rate is not None:
+            self.rate.update(self.history[slot])
+
         # 返回最强的闪光
         if flash_regions:
-            return max(flash_regions, key=lambda x: x['intensity'])
+            result = max(flash_regions, key=lambda x: x['intensity'])
+            cell = result.pop('cell')
+            if self.rate is not None:
+                result.update(self.rate.summary(cell))
+            return result
         return None
 
+    def _flush_deferred(self):
+        """补算门限和分层定位中延迟计算的亮度历史，使环形缓冲区与整帧扫描一致"""
+        if self.hierarchical:
+            if self._tile_valid is None or self._frame_counter == 0:
+                return
+            last = self._frame_counter - 1
+            grid_h, grid_w = self.history.shape[1:]
+            for k in range(max(0, last - self.buffer_size + 1), last + 1):
+                stale = self._tile_valid < k
+                if not stale.any():
+                    continue
+                slot = k % self.buffer_size
+                mask = np.repeat(np.repeat(stale, self.tile_size, axis=0),
+                                 self.tile_size, axis=1)[:grid_h, :grid_w]
+                brightness = self.backend.grid_brightness(self._gray_ring[slot], self.region_size)
+                self.history[slot][mask] = brightness[mask]
+            self._tile_valid[:] = last
+        elif self.gate:
+            for pending_gray in self._pending:
+                self._push_history(self.backend.grid_brightness(pending_gray, self.region_size))
+            self._pending.clear()
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """
+        导出时序分析状态（用于检查点）
+        延迟计算的部分先补算完整，恢复时不需要保留的灰度帧
+        返回: 名称到数组的字典
+        """
+        self._flush_deferred()
+        state = {
+            'frames_seen': np.array(self.frames_seen),
+            'history_index': np.array(self.history_index),
+            'history_len': np.array(self.history_len)
+        }
+        if self.history is not None:
+            state['history'] = self.history.copy()
+        if self._gate_history is not None:
+            state['gate_history'] = self._gate_history.copy()
+            state['gate_index'] = np.array(self._gate_index)
+            state['gate_len'] = np.array(self._gate_len)
+        if self._tile_valid is not None:
+            state['tile_valid'] = self._tile_valid.copy()
+            state['frame_counter'] = np.array(self._frame_counter)
+        if self.rate is not None:
+            for name, value in self.rate.get_state().items():
+                state['rate_' + name] = value
+        return state
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        """从 get_state 导出的状态恢复，之后的检测结果与未中断时一致"""
+        self.clear_cache()
+        if 'history' in state:
+            self._allocate_history(*state['history'].shape[1:])
+            np.copyto(self.history, state['history'], casting='unsafe')
+        self.frames_seen = int(state['frames_seen'])
+        self.history_index = int(state['history_index'])
+        self.history_len = int(state['history_len'])
+        if 'gate_history' in state:
+            self._gate_history = np.array(state['gate_history'], dtype=np.uint8)
+            self._gate_index = int(state['gate_index'])
+            self._gate_len = int(state['gate_len'])
+        if 'tile_valid' in state:
+            self._tile_valid = np.array(state['tile_valid'], dtype=np.int64)
+            self._frame_counter = int(state['frame_counter'])
+        if self.rate is not None:
+            self.rate.set_state({name[len('rate_'):]: value for name, value in state.items()
+                                 if name.startswith('rate_')})
+
+    def memory_bytes(self) -> int:
+        """检测器常驻数组（亮度历史、临时数组、保留的灰度帧和频率分析状态）占用的字节数"""
+        arrays = [value for value in vars(self).values() if isinstance(value, np.ndarray)]
+        if self.history is not None:
+            arrays += list(self._work.values())
+        arrays += [gray for gray in self._gray_ring if gray is not None]
+        arrays += list(self._pending)
+        if self.frame_buffer is not None:
+            arrays += list(self.frame_buffer)
+        if self.rate is not None:
+            arrays += [value for value in vars(self.rate).values()
+                       if isinstance(value, np.ndarray)]
+        return sum(array.nbytes for array in arrays)
+
+    def bytes_per_megapixel(self) -> float:
+        """每百万像素（按分析分辨率）的常驻内存字节数"""
+        if self.frame_shape is None:
+            return 0.0
+        megapixels = self.frame_shape[0] * self.frame_shape[1] / 1e6
+        return self.memory_bytes() / megapixels if megapixels else 0.0
+
     def clear_cache(self):
         """清除缓存"""
-        self.frame_buffer.clear()
-        self.brightness_cache.clear()
+        if self.frame_buffer is not None:
+            self.frame_buffer.clear()
+        self.frames_seen = 0
+        self.history = None
+        self.history_index = 0
+        self.history_len = 0
+        self._gate_history = None
+        self._gate_index = 0
+        self._gate_len = 0
+        self._pending.clear()
+        self._gray_ring = [None] * self.buffer_size
+        self._frame_counter = 0
+        self._tile_valid = None
+        if self.rate is not None:
+            self.rate.reset()
+
+class EventMerger:
+    def __init__(self, merge_gap: int = 1):
+        """
+        将相邻帧的闪光检测合并为事件
+        启用闪烁频率分析时，事件的 flash_rate、transitions 和 swing 取各次检测的最大值
+        merge_gap: 同一事件中相邻两次检测允许的最大帧距
+        """
+        self.merge_gap = merge_gap
+        self.current = None
+
+    def update(self, frame_num: int, flash_info: Optional[Dict]) -> Optional[Dict]:
+        """
+        输入一个被分析帧的检测结果（未检测到时为 None）
+        返回: 如果有事件已经结束，返回该事件
+        """
+        closed = None
+        if self.current is not None:
+            gap = frame_num - self.current['end_frame']
+            if gap > self.merge_gap or (flash_info is None and gap >= self.merge_gap):
+                closed, self.current = self.current, None
+
+        if flash_info is None:
+            return closed
+
+        if self.current is None:
+            self.current = {
+                'start_frame': frame_num,
+                'end_frame': frame_num,
+                'peak_frame': frame_num,
+                'intensity': flash_info['intensity'],
+                'position': flash_info['position'],
+                'frequency': flash_info['frequency'],
+                'detections': 1
+            }
+            for key in RATE_KEYS:
+                if key in flash_info:
+                    self.current[key] = flash_info[key]
+        else:
+            event = self.current
+            event['end_frame'] = frame_num
+            event['detections'] += 1
+            if flash_info['intensity'] > event['intensity']:
+                event['peak_frame'] = frame_num
+                event['intensity'] = flash_info['intensity']
+                event['position'] = flash_info['position']
+                event['frequency'] = flash_info['frequency']
+            for key in RATE_KEYS:
+                if key in flash_info:
+                    event[key] = max(event.get(key, flash_info[key]), flash_info[key])
+        return closed
+
+    def flush(self) -> Optional[Dict]:
+        """结束并返回当前未完成的事件"""
+        closed, self.current = self.current, None
+        return closed
+
+def create_detector(region_size: int = 20, abs_threshold: float = 20,
+                    gate: bool = False, hierarchical: bool = False,
+                    buffer_size: int = 5, rate_window: float = 0.0,
+                    fps: float = 30.0, low_memory: Optional[str] = None,
+                    backend: Optional[str] = None) -> FlashDetectorBuffer:
+    """
+    按检测参数创建检测器
+    buffer_size: 时序分析窗口的帧数
+    rate_window: 闪烁频率分析的窗口时长（秒），0 表示不启用
+    fps: 分析帧率（源帧率除以帧步长）
+    low_memory: 低内存模式的亮度历史存储类型（'float16' 或 'uint8'），同时按条带计算网格亮度；
+                None 表示不启用
+    backend: 计算后端名称，默认按环境变量 FLASH_DETECTOR_BACKEND 选择
+    """
+    return FlashDetectorBuffer(
+        buffer_size=buffer_size,
+        region_size=region_size,
+        diff_threshold=abs_threshold,
+        gate=gate,
+        hierarchical=hierarchical,
+        rate_window=max(1, int(round(rate_window * fps))) if rate_window > 0 else 0,
+        rate_fps=fps,
+        history_dtype=low_memory or 'float32',
+        band_rows=LOW_MEMORY_BAND_ROWS if low_memory else 0,
+        backend=backend
+    )
+
+def add_gate_stats(stats: Optional[Dict], detector: FlashDetectorBuffer):
+    """将检测器的变化门限统计累加到统计字典中"""
+    if stats is None or not detector.gate or detector.hierarchical:
+        return
+    for key, value in detector.gate_summary().items():
+        stats[key] = stats.get(key, 0) + value
+
+def read_frame(video_path: str, frame_num: int) -> Optional[np.ndarray]:
+    """读取视频中指定帧号的帧"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+        ret, frame = cap.read()
+        return frame if ret else None
+    finally:
+        cap.release()
+
+def open_video(video_path: str, start_time: str = "0:00") -> Tuple[cv2.VideoCapture, float, int]:
+    """打开视频并定位到开始时间，返回 (cap, fps, 开始帧号)"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError("无法打开视频文件")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    start_frame = int(time_str_to_seconds(start_time) * fps)
+    if start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    return cap, fps, start_frame
+
+def iter_frames(
+    cap: cv2.VideoCapture,
+    start_frame: int = 0,
+    frame_step: int = 1,
+    end_frame: Optional[int] = None,
+    stats: Optional[Dict] = None,
+    profiler: Optional[Profiler] = None
+) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    从当前位置读取需要分析的帧
+    跳过的帧只用 grab() 前进，不做 retrieve() 和颜色转换
+    end_frame: 结束帧号（不包含），默认读到视频末尾
+    stats: 可选的统计字典，累加 decoded_frames（读取的帧数）和 analyzed_frames（分析的帧数）
+    profiler: 可选的性能分析器，记录解码耗时和 skipped_frames（按步长跳过的帧数）
+    返回: 产出 (帧号, 帧)
+    """
+    if stats is not None:
+        stats.setdefault('decoded_frames', 0)
+        stats.setdefault('analyzed_frames', 0)
+
+    frame_num = start_frame
+    while end_frame is None or frame_num < end_frame:
+        start = time.perf_counter()
+        if (frame_num - start_frame) % frame_step != 0:
+            if not cap.grab():
+                break
+            if stats is not None:
+                stats['decoded_frames'] += 1
+            if profiler is not None:
+                profiler.add('decode', time.perf_counter() - start)
+                profiler.count('skipped_frames')
+            frame_num += 1
+            continue
+
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if stats is not None:
+            stats['decoded_frames'] += 1
+            stats['analyzed_frames'] += 1
+        if profiler is not None:
+            profiler.add('decode', time.perf_counter() - start)
+            profiler.count('analyzed_frames')
+
+        yield frame_num, frame
+
+        frame_num += 1
+
+def iter_gray_frames(
+    cap: cv2.VideoCapture,
+    start_frame: int = 0,
+    frame_step: int = 1,
+    end_frame: Optional[int] = None,
+    stats: Optional[Dict] = None,
+    prefetch: int = 0,
+    size: Optional[Tuple[int, int]] = None,
+    profiler: Optional[Profiler] = None
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    读取需要分析的帧并转换为灰度图
+    prefetch: 预取队列长度，大于0时在独立线程中解码并转换灰度图
+    size: 分析分辨率 (宽, 高)，默认保持源帧分辨率
+    profiler: 可选的性能分析器，记录解码和颜色转换的耗时
+    返回: 产出 (帧号, 原始帧, 灰度帧) 的生成器
+    """
+    # 灰度转换使用默认的计算后端（见 backends.get_backend）
+    gray = get_backend().to_gray
+    if size is None:
+        convert = gray
+    else:
+        convert = lambda frame: resize_gray(gray(frame), size)
+    if profiler is not None:
+        plain_convert = convert
+
+        def convert(frame):
+            with profiler.stage('color'):
+                return plain_convert(frame)
+
+    frames = iter_frames(cap, start_frame, frame_step, end_frame, stats, profiler)
+    if prefetch > 0:
+        return iter(FramePrefetcher(frames, prefetch, stats, convert))
+    return ((frame_num, frame, convert(frame)) for frame_num, frame in frames)
+
+def flash_region(frame: np.ndarray, position: Tuple[int, int], region_size: int) -> np.ndarray:
+    """截取闪光位置周围用于圆形度检查的区域"""
+    x, y = position
+    return frame[
+        max(0, y-region_size):min(frame.shape[0], y+region_size),
+        max(0, x-region_size):min(frame.shape[1], x+region_size)
+    ]
+
+def analyze_frames(
+    cap: cv2.VideoCapture,
+    detector: FlashDetectorBuffer,
+    start_frame: int = 0,
+    frame_step: int = 1,
+    circularity_threshold: float = 0.5,
+    end_frame: Optional[int] = None,
+    stats: Optional[Dict] = None,
+    prefetch: int = 0,
+    analysis_size: Optional[Tuple[int, int]] = None,
+    source_size: Optional[Tuple[int, int]] = None,
+    profiler: Optional[Profiler] = None
+) -> Iterator[Tuple[int, Optional[Dict], np.ndarray]]:
+    """
+    从当前位置读取视频并逐帧分析
+    end_frame: 结束帧号（不包含），默认读到视频末尾
+    stats: 可选的统计字典，记录读取和分析的帧数，启用预取时还记录两个阶段的等待时间
+    prefetch: 预取队列长度，大于0时在独立线程中解码并转换灰度图
+    analysis_size: 分析分辨率 (宽, 高)，检测器在该分辨率下工作
+    source_size: 源帧分辨率 (宽, 高)，给出时闪光位置换算回源帧像素坐标
+    profiler: 可选的性能分析器，同时交给检测器记录网格亮度和时序分析的耗时
+    返回: 对每个被分析的帧产出 (帧号, 通过圆形度检查的闪光信息或 None, 帧)
+    """
+    frames = iter_gray_frames(cap, start_frame, frame_step, end_frame, stats, prefetch,
+                              analysis_size, profiler)
+    detector.profiler = profiler
+    if analysis_size is not None and source_size is not None:
+        scale_x = source_size[0] / analysis_size[0]
+        scale_y = source_size[1] / analysis_size[1]
+    else:
+        scale_x = scale_y = 1.0
+
+    region_size = detector.region_size
+    try:
+        for frame_num, frame, gray in frames:
+            flash_info = detector.process_frame(gray, frame_num)
+
+            if flash_info:
+                # 检查圆形度
+                region = flash_region(gray, flash_info['position'], region_size)
+                start = time.perf_counter()
+                passed = check_circularity(region, circularity_threshold)
+                if profiler is not None:
+                    profiler.add('circularity', time.perf_counter() - start)
+                    profiler.count('detections')
+                if not passed:
+                    flash_info = None
+                elif scale_x != 1.0 or scale_y != 1.0:
+                    x, y = flash_info['position']
+                    flash_info['position'] = (int(round(x * scale_x)),
+                                              int(round(y * scale_y)))
+
+            yield frame_num, flash_info, frame
+    finally:
+        frames.close()
+
+class DebugImages(Mapping):
+    def __init__(self, frame: np.ndarray, position: Tuple[int, int], region_size: int,
+                 roi: Optional[Tuple[int, int]] = None):
+        """
+        按需生成的调试图像，以只读字典的形式访问
+        curr_frame 为闪光帧本身；diff_map（差异热力图）和 region_detail（区域放大图）
+        在第一次访问时才生成并缓存，只读取数字的调用方不产生绘图开销
+        frame: 闪光帧，按引用保存，调用方之后不应再修改
+        position: 闪光在 frame 中的位置
+        roi: frame 为截取区域时，其左上角在原帧中的坐标 (x, y)
+        """
+        self._frame = frame
+        self._position = position
+        self._region_size = region_size
+        self._images = {'curr_frame': frame}
+        if roi is not None:
+            self._images['roi'] = roi
+
+    def _render(self, key: str):
+        x, y = self._position
+        if key == 'diff_map':
+            return create_diff_map(self._frame, self._position, self._region_size)
+        return create_region_detail(self._frame, x, y, self._region_size)
+
+    def __getitem__(self, key: str):
+        if key not in self._images:
+            if key not in DEBUG_IMAGE_KEYS:
+                raise KeyError(key)
+            self._images[key] = self._render(key)
+        return self._images[key]
+
+    def __iter__(self):
+        yield 'curr_frame'
+        yield from DEBUG_IMAGE_KEYS
+        if 'roi' in self._images:
+            yield 'roi'
+
+    def __len__(self) -> int:
+        return 1 + len(DEBUG_IMAGE_KEYS) + ('roi' in self._images)
+
+    def rendered(self) -> List[str]:
+        """已经生成的图像"""
+        return [key for key in self._images if key in DEBUG_IMAGE_KEYS]
+
+def create_debug_images(frame: np.ndarray, position: Tuple[int, int],
+                        region_size: int, roi: bool = False) -> DebugImages:
+    """
+    生成闪光帧的调试图像（diff_map 和 region_detail 在访问时才绘制）
+    frame 按引用保存，不再复制
+    roi: 只保留闪光位置周围的区域（边长 DEBUG_ROI_SIZE 与 4 倍 region_size 中的较大者），
+         此时 roi 为截取区域左上角在原帧中的坐标 (x, y)
+    """
+    if not roi:
+        return DebugImages(frame, position, region_size)
+
+    x, y = position
+    half = max(DEBUG_ROI_SIZE, 4 * region_size) // 2
+    x0, y0 = max(0, x - half), max(0, y - half)
+    crop = frame[y0:min(frame.shape[0], y + half), x0:min(frame.shape[1], x + half)].copy()
+    return DebugImages(crop, (x - x0, y - y0), region_size, (x0, y0))
+
+def scan_flashes(
+    video_path: str,
+    abs_threshold: float = 20,
+    rel_threshold: float = 0.3,
+    region_size: int = 20,
+    frame_step: int = 1,
+    start_time: str = "0:00",
+    circularity_threshold: float = 0.5,
+    merge_gap: Optional[int] = None,
+    debug_images: bool = False,
+    stats: Optional[Dict] = None,
+    prefetch: int = 0,
+    analysis_scale: float = 1.0,
+    ingest: str = 'opencv',
+    gate: bool = False,
+    hierarchical: bool = False,
+    checkpoint: Optional[str] = None,
+    checkpoint_interval: int = 1000,
+    resume: bool = False,
+    profiler: Optional[Profiler] = None,
+    buffer_size: int = 5,
+    rate_window: float = 0.0,
+    low_memory: Optional[str] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    mask: Optional[RegionMask] = None
+) -> Iterator[Dict]:
+    """
+    单次遍历整段视频，按时间顺序逐个产出闪光事件
+    merge_gap: 合并为同一事件的最大帧距，默认为一个分析窗口（buffer_size * frame_step），
+               以跨过闪烁中的暗帧
+    debug_images: 是否为每个事件附加峰值帧的调试图像（DebugImages，热力图和放大图在访问时才绘制）
+    stats: 可选的统计字典，记录读取和分析的帧数
+    prefetch: 预取队列长度，大于0时解码与分析在两个线程中流水执行
+    analysis_scale: 分析分辨率相对源帧的缩放比例，region_size 按比例换算，
+                    报告的位置仍为源帧像素坐标
+    ingest: 读取模式，'opencv' 解码完整 BGR 帧；'ffmpeg' 只读取亮度通道并在解码端缩放，
+            需要调试图像时再单独解码峰值帧
+    gate: 是否启用变化门限，跳过不可能产生闪光的静态帧的网格计算，
+          统计结果记录在 stats 的 gate_skipped 和 gate_saved 中
+    hierarchical: 是否启用由粗到细的分层定位，只对可能产生闪光的区域做精确计算，
+                  位置和强度与整帧扫描一致
+    checkpoint: 检查点文件路径，给出时每分析 checkpoint_interval 帧保存一次读取位置、
+                检测器状态和已产出的事件，正常结束后删除
+    resume: 检查点存在时从中恢复，先重新产出已保存的事件，再从保存的位置继续扫描，
+            结果与未中断的扫描一致
+    profiler: 可选的性能分析器，记录各阶段耗时和帧计数
+    buffer_size: 时序分析窗口的帧数
+    rate_window: 闪烁频率分析的窗口时长（秒），大于0时事件中附加 flash_rate（每秒闪光次数）、
+                 transitions（窗口内跳变次数）和 swing（平均亮度摆幅），不使用变化门限和分层定位
+    low_memory: 低内存模式，'float16' 或 'uint8' 量化存储亮度历史并按条带计算网格亮度；
+                不保留峰值帧，调试图像在事件结束时从视频中重新读取，只截取闪光位置周围的区域。
+                stats 中记录 detector_bytes（检测器常驻内存）和 bytes_per_megapixel
+    progress: 可选的回调，每分析一帧调用 progress(帧号)，回调抛出异常时扫描中止
+    mask: 可选的分析区域与排除区域（源帧像素坐标），只计算和跟踪完全落在允许范围内的区域，
+          不使用变化门限和分层定位；stats 中记录 active_cells 和 total_cells
+    返回: 事件字典，包含 start_frame / end_frame / peak_frame（视频中的绝对帧号）、
+          intensity、position、frequency、detections，以及可选的 debug_images 和闪烁频率指标
+    """
+    resumed = None
+    if checkpoint:
+        checkpoint_params = {
+            'video': video_fingerprint(video_path),
+            'abs_threshold': abs_threshold,
+            'region_size': region_size,
+            'frame_step': frame_step,
+            'start_time': start_time,
+            'circularity_threshold': circularity_threshold,
+            'merge_gap': merge_gap,
+            'analysis_scale': analysis_scale,
+            'ingest': ingest,
+            'gate': gate,
+            'hierarchical': hierarchical,
+            'buffer_size': buffer_size,
+            'rate_window': rate_window,
+            'low_memory': low_memory,
+            'circularity_version': CIRCULARITY_VERSION,
+            'mask': mask.fingerprint() if mask else None
+        }
+        if resume and os.path.exists(checkpoint):
+            resumed = load_checkpoint(checkpoint, checkpoint_params)
+
+    cap, fps, start_frame, source_size, size = open_capture(
+        video_path, start_time, ingest, analysis_scale,
+        resumed[1]['next_frame'] if resumed else None)
+    scaled = size != source_size
+    detector = create_detector(scaled_region_size(region_size, size[0] / source_size[0])
+                               if scaled else region_size, abs_threshold, gate,
+                               hierarchical, buffer_size, rate_window,
+                               (fps or 30.0) / frame_step, low_memory)
+    if mask:
+        detector.set_mask(mask.compile(size[1], size[0], detector.region_size, source_size))
+    merger = EventMerger(merge_gap or detector.buffer_size * frame_step)
+    # 已产出的事件，保存检查点时一并写入
+    emitted = []
+    if resumed:
+        state, metadata = resumed
+        detector.set_state(state)
+        merger.current = metadata['current']
+        emitted = metadata['events']
+        if stats is not None:
+            for key, value in metadata['stats'].items():
+                stats[key] = stats.get(key, 0) + value
+    # 只有 opencv 读取模式下的帧才是源分辨率的彩色帧，可以直接作为调试图像；
+    # 低内存模式下不保留峰值帧，需要时重新读取
+    keep_frames = debug_images and ingest == 'opencv' and not low_memory
+    peak_frame = None
+
+    def finish(event, frame):
+        if debug_images:
+            start = time.perf_counter()
+            if frame is None:
+                frame = read_frame(video_path, event['peak_frame'])
+            if frame is not None:
+                event['debug_images'] = create_debug_images(
+                    frame, event['position'], region_size, roi=bool(low_memory))
+            if profiler is not None:
+                profiler.add('debug_images', time.perf_counter() - start)
+        if profiler is not None:
+            profiler.count('events')
+        return event
+
+    frames = analyze_frames(cap, detector, start_frame, frame_step,
+                            circularity_threshold, stats=stats, prefetch=prefetch,
+                            analysis_size=size if scaled else None,
+                            source_size=source_size, profiler=profiler)
+    try:
+        for event in list(emitted):
+            yield finish(dict(event), None)
+
+        analyzed = 0
+        for frame_num, flash_info, frame in frames:
+            closed = merger.update(frame_num, flash_info)
+            if closed is not None:
+                emitted.append(dict(closed))
+                yield finish(closed, peak_frame)
+                peak_frame = None
+
+            if keep_frames and flash_info and merger.current['peak_frame'] == frame_num:
+                # 每次读取都得到新的帧数组，直接保留引用即可
+                peak_frame = frame
+
+            analyzed += 1
+            if progress is not None:
+                progress(frame_num)
+            if checkpoint and analyzed % checkpoint_interval == 0:
+                save_checkpoint(checkpoint, detector.get_state(), frame_num + frame_step,
+                                emitted, merger.current, checkpoint_params, stats)
+
+        closed = merger.flush()
+        if closed is not None:
+            yield finish(closed, peak_frame)
+
+        if checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+    finally:
+        frames.close()
+        cap.release()
+        add_gate_stats(stats, detector)
+        if stats is not None and low_memory:
+            stats['detector_bytes'] = detector.memory_bytes()
+            stats['bytes_per_megapixel'] = detector.bytes_per_megapixel()
+        if stats is not None and detector.cell_mask is not None:
+            stats['active_cells'] = detector.cell_mask.size
+            stats['total_cells'] = detector.cell_mask.active.size
+        if profiler is not None and detector.gate and not detector.hierarchical:
+            profiler.count('gate_skipped_frames', detector.gate_stats['gate_skipped'])
+        detector.clear_cache()
 
 def detect_flash(
     video_path: str,
@@ -101,58 +1100,28 @@ def detect_flash(
     region_size: int = 20,
     frame_step: int = 1,
     start_time: str = "0:00",
-    circularity_threshold: float = 0.5
+    circularity_threshold: float = 0.5,
+    buffer_size: int = 5
 ) -> Optional[List]:
-    """使用环形缓冲区方法检测闪光"""
+    """使用环形缓冲区方法检测闪光，返回第一个闪光"""
+    cap = None
+    frames = None
+    detector = create_detector(region_size, abs_threshold, buffer_size=buffer_size)
     try:
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise Exception("无法打开视频文件")
-
-        fps = cap.get(cv2.CAP_PROP_FPS)
-
-        # 设置开始位置
-        start_seconds = time_str_to_seconds(start_time)
-        cap.set(cv2.CAP_PROP_POS_FRAMES, start_seconds * fps)
-
-        detector = FlashDetectorBuffer(
-            buffer_size=5,
-            region_size=region_size,
-            diff_threshold=abs_threshold
-        )
-
-        frame_count = 0
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        cap, fps, start_frame = open_video(video_path, start_time)
 
-            if frame_count % frame_step == 0:
-                flash_info = detector.process_frame(frame, frame_count)
+        frames = analyze_frames(cap, detector, start_frame, frame_step,
+                                circularity_threshold)
+        for frame_num, flash_info, frame in frames:
+            if flash_info:
+                # 准备debug图像
+                debug_images = create_debug_images(
+                    frame, flash_info['position'], region_size)
 
-                if flash_info:
-                    # 检查圆形度
-                    x, y = flash_info['position']
-                    region = frame[
-                        max(0, y-region_size):min(frame.shape[0], y+region_size),
-                        max(0, x-region_size):min(frame.shape[1], x+region_size)
-                    ]
-
-                    if check_circularity(region, circularity_threshold):
-                        # 准备debug图像
-                        debug_images = {
-                            'curr_frame': frame.copy(),
-                            'diff_map': create_diff_map(frame,
-                                                      flash_info['position'],
-                                                      region_size)
-                        }
-
-                        return [(frame_count,
-                                flash_info['intensity'],
-                                flash_info['position']),
-                               debug_images]
-
-            frame_count += 1
+                return [(frame_num - start_frame,
+                        flash_info['intensity'],
+                        flash_info['position']),
+                       debug_images]
 
     except Exception as e:
         print(f"检测失败: {str(e)}")
@@ -161,7 +1130,10 @@ def detect_flash(
         return None
 
     finally:
-        cap.release()
+        if frames is not None:
+            frames.close()
+        if cap is not None:
+            cap.release()
         detector.clear_cache()
 
     return None
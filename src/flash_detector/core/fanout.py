@@ -0,0 +1,299 @@
+import multiprocessing as mp
+import queue
+import time
+import cv2
+import numpy as np
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..core.utils import check_circularity
+from ..core.detector import (EventMerger, create_debug_images, create_detector, flash_region,
+                             iter_gray_frames, read_frame)
+from ..core.grid import grid_shape
+from ..core.ingest import analysis_size, open_capture, scaled_region_size
+
+# 等待队列和空闲槽位时检查停止信号的间隔（秒）
+_POLL_INTERVAL = 0.1
+
+def plan_bands(height: int, region_size: int, bands: int) -> List[Tuple[int, int, int, int]]:
+    """
+    将网格按行划分为水平条带
+    每个条带覆盖 [grid_y0, grid_y1) 行区域，对应像素行 [y0, y1)，
+    相邻条带的像素范围重叠 region_size - region_size // 2 + 1 行（跨边界的一行区域），
+    条带内的网格亮度与整帧网格的对应行逐位一致
+    返回: [(grid_y0, grid_y1, y0, y1), ...]，条带数不超过网格行数
+    """
+    grid_h, _ = grid_shape(height, 1 << 30, region_size)
+    grid_step = region_size // 2
+    bands = max(1, min(bands, grid_h))
+    plan = []
+    for index in range(bands):
+        grid_y0 = grid_h * index // bands
+        grid_y1 = grid_h * (index + 1) // bands
+        # 多留一个像素，使条带的网格恰好包含最后一行区域
+        plan.append((grid_y0, grid_y1, grid_y0 * grid_step,
+                     (grid_y1 - 1) * grid_step + region_size + 1))
+    return plan
+
+def _decode_worker(video_path: str, params: Dict, shm_name: str, ring_shape: Tuple[int, ...],
+                   free_slots, band_queues: List, results, stop):
+    """
+    解码进程：读取帧并转换为分析分辨率的灰度图，写入空闲槽位后通知各条带分析进程
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray(ring_shape, dtype=np.uint8, buffer=shm.buf)
+    stats = {}
+    busy = 0.0
+    cap = None
+    try:
+        cap, _, start_frame, source_size, size = open_capture(
+            video_path, params['start_time'], params['ingest'], params['analysis_scale'])
+        frames = iter_gray_frames(cap, start_frame, params['frame_step'], stats=stats,
+                                  size=size if size != source_size else None)
+        start = time.perf_counter()
+        for frame_num, _, gray in frames:
+            busy += time.perf_counter() - start
+            # 等待空闲槽位（背压）
+            slot = None
+            while slot is None and not stop.is_set():
+                try:
+                    slot = free_slots.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+            if slot is None:
+                break
+
+            start = time.perf_counter()
+            np.copyto(ring[slot], gray)
+            for band_queue in band_queues:
+                band_queue.put((frame_num, slot))
+            busy += time.perf_counter() - start
+            start = time.perf_counter()
+        stats['busy_time'] = busy
+        results.put(('done', 'decode', stats))
+    except Exception as e:
+        results.put(('error', 'decode', str(e)))
+    finally:
+        for band_queue in band_queues:
+            band_queue.put(None)
+        if cap is not None:
+            cap.release()
+        del ring
+        shm.close()
+
+def _band_worker(index: int, band: Tuple[int, int, int, int], params: Dict, shm_name: str,
+                 ring_shape: Tuple[int, ...], band_queue, results):
+    """
+    条带分析进程：直接在共享内存上截取本条带的像素行（不复制），运行该条带的检测器
+    位置换算为整帧坐标后交给合并阶段
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray(ring_shape, dtype=np.uint8, buffer=shm.buf)
+    grid_y0, grid_y1, y0, y1 = band
+    detector = create_detector(params['region_size'], params['abs_threshold'], params['gate'],
+                               params['hierarchical'], params['buffer_size'])
+    frames = 0
+    busy = 0.0
+    try:
+        while True:
+            item = band_queue.get()
+            if item is None:
+                break
+            frame_num, slot = item
+            start = time.perf_counter()
+            flash_info = detector.process_frame(ring[slot, y0:y1], frame_num)
+            if flash_info:
+                x, y = flash_info['position']
+                flash_info['position'] = (x, y + y0)
+            busy += time.perf_counter() - start
+            frames += 1
+            results.put(('band', index, frame_num, slot, flash_info))
+        results.put(('done', index, {'frames': frames, 'busy_time': busy}))
+    except Exception as e:
+        results.put(('error', index, str(e)))
+    finally:
+        detector.clear_cache()
+        del ring
+        shm.close()
+
+def _check_processes(processes: List, done: Dict):
+    """
+    检查尚未结束的解码和条带分析进程是否异常退出（被杀死、段错误等）
+    正常结束的进程总会先发出 done 或 error 消息，退出码为 0；
+    异常退出的进程不再归还槽位，继续等待会使整个扫描卡住，因此直接报错
+    """
+    for index, process in enumerate(processes):
+        source = 'decode' if index == 0 else index - 1
+        if source in done or process.exitcode in (None, 0):
+            continue
+        name = '解码进程' if source == 'decode' else f"条带 {source} 分析进程"
+        raise RuntimeError(f"{name}异常退出（退出码 {process.exitcode}）")
+
+def _throughput(frames: int, seconds: float) -> float:
+    return frames / seconds if seconds > 0 else 0.0
+
+def scan_flashes_shared(
+    video_path: str,
+    abs_threshold: float = 20,
+    rel_threshold: float = 0.3,
+    region_size: int = 20,
+    frame_step: int = 1,
+    start_time: str = "0:00",
+    circularity_threshold: float = 0.5,
+    merge_gap: Optional[int] = None,
+    debug_images: bool = False,
+    stats: Optional[Dict] = None,
+    bands: int = 2,
+    slots: int = 8,
+    analysis_scale: float = 1.0,
+    ingest: str = 'opencv',
+    gate: bool = False,
+    hierarchical: bool = False,
+    buffer_size: int = 5
+) -> Iterator[Dict]:
+    """
+    共享内存分发扫描：一个解码进程把灰度帧写入共享内存中的环形槽位，
+    bands 个分析进程各负责网格的一个水平条带，直接读取槽位中的帧（不经过序列化复制），
+    主进程按帧合并各条带的最强闪光，做圆形度检查并合并为事件，结果与 scan_flashes 一致
+    bands: 条带分析进程数
+    slots: 共享内存中的帧槽位数，所有条带处理完并合并后槽位才被重新使用
+    stats: 可选的统计字典，记录 decoded_frames、analyzed_frames，以及各阶段的吞吐（帧/秒）：
+           decode_fps、band_fps（每个条带一项）和 merge_fps
+    debug_images: 调试图像在事件结束时从视频中重新读取峰值帧生成
+    其余参数与 scan_flashes 相同
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError("无法打开视频文件")
+    source_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                   int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    cap.release()
+
+    size = analysis_size(source_size[0], source_size[1], analysis_scale)
+    scaled = size != source_size
+    analysis_region = (scaled_region_size(region_size, size[0] / source_size[0])
+                       if scaled else region_size)
+    scale_x = source_size[0] / size[0]
+    scale_y = source_size[1] / size[1]
+    plan = plan_bands(size[1], analysis_region, bands)
+
+    params = {
+        'abs_threshold': abs_threshold,
+        'region_size': analysis_region,
+        'frame_step': frame_step,
+        'start_time': start_time,
+        'analysis_scale': analysis_scale,
+        'ingest': ingest,
+        'gate': gate,
+        'hierarchical': hierarchical,
+        'buffer_size': buffer_size
+    }
+    merger = EventMerger(merge_gap or buffer_size * frame_step)
+
+    def finish(event):
+        if debug_images:
+            frame = read_frame(video_path, event['peak_frame'])
+            if frame is not None:
+                event['debug_images'] = create_debug_images(
+                    frame, event['position'], region_size)
+        return event
+
+    slots = max(1, slots)
+    ring_shape = (slots, size[1], size[0])
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(ring_shape)))
+    ring = np.ndarray(ring_shape, dtype=np.uint8, buffer=shm.buf)
+    free_slots = mp.Queue()
+    for slot in range(slots):
+        free_slots.put(slot)
+    band_queues = [mp.Queue() for _ in plan]
+    results = mp.Queue()
+    stop = mp.Event()
+
+    processes = [mp.Process(target=_decode_worker, daemon=True,
+                            args=(video_path, params, shm.name, ring_shape, free_slots,
+                                  band_queues, results, stop))]
+    processes += [mp.Process(target=_band_worker, daemon=True,
+                             args=(index, band, params, shm.name, ring_shape,
+                                   band_queues[index], results))
+                  for index, band in enumerate(plan)]
+
+    pending = {}
+    done = {}
+    merged = 0
+    merge_time = 0.0
+    try:
+        for process in processes:
+            process.start()
+
+        while len(done) < len(processes):
+            try:
+                message = results.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                _check_processes(processes, done)
+                continue
+            kind, source = message[0], message[1]
+            if kind == 'error':
+                raise RuntimeError(f"{'解码' if source == 'decode' else f'条带 {source} 分析'}"
+                                   f"失败: {message[2]}")
+            if kind == 'done':
+                done[source] = message[2]
+                continue
+
+            _, index, frame_num, slot, flash_info = message
+            entry = pending.setdefault(frame_num, [slot, {}])
+            entry[1][index] = flash_info
+            if len(entry[1]) < len(plan):
+                continue
+
+            # 所有条带都处理完的帧按帧序到达，取强度最大的结果；
+            # 强度相同时取靠上的条带，与整帧网格的行优先顺序一致
+            start = time.perf_counter()
+            del pending[frame_num]
+            best = None
+            for index in range(len(plan)):
+                candidate = entry[1][index]
+                if candidate and (best is None or candidate['intensity'] > best['intensity']):
+                    best = candidate
+
+            if best and not check_circularity(
+                    flash_region(ring[slot], best['position'], analysis_region),
+                    circularity_threshold):
+                best = None
+            elif best and scaled:
+                x, y = best['position']
+                best['position'] = (int(round(x * scale_x)), int(round(y * scale_y)))
+            free_slots.put(slot)
+
+            closed = merger.update(frame_num, best)
+            merged += 1
+            merge_time += time.perf_counter() - start
+            if closed is not None:
+                yield finish(closed)
+
+        closed = merger.flush()
+        if closed is not None:
+            yield finish(closed)
+
+        if stats is not None:
+            decode = done['decode']
+            for key in ('decoded_frames', 'analyzed_frames'):
+                stats[key] = stats.get(key, 0) + decode.get(key, 0)
+            stats['decode_fps'] = _throughput(decode.get('analyzed_frames', 0),
+                                              decode['busy_time'])
+            stats['band_fps'] = [_throughput(done[index]['frames'], done[index]['busy_time'])
+                                 for index in range(len(plan))]
+            stats['merge_fps'] = _throughput(merged, merge_time)
+
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for q in [free_slots, results] + band_queues:
+            q.cancel_join_thread()
+            q.close()
+        del ring
+        shm.close()
+        shm.unlink()
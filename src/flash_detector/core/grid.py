@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+from typing import Tuple
+
+# int32 积分图可以精确表示的像素和上限
+INT32_INTEGRAL_LIMIT = 2 ** 31
+
+def grid_shape(height: int, width: int, region_size: int) -> Tuple[int, int]:
+    """
+    计算半重叠网格的行列数
+    与逐区域循环 range(0, height - region_size, region_size // 2) 保持一致
+    """
+    grid_step = region_size // 2
+    grid_h = len(range(0, height - region_size, grid_step))
+    grid_w = len(range(0, width - region_size, grid_step))
+    return grid_h, grid_w
+
+def grid_brightness(gray: np.ndarray, region_size: int) -> np.ndarray:
+    """
+    利用积分图一次性计算所有网格区域的平均亮度
+    gray: 灰度图
+    region_size: 检测区域大小
+    返回: (grid_h, grid_w) 的 float64 数组，第 (i, j) 个元素对应
+          左上角为 (j * grid_step, i * grid_step) 的区域
+    """
+    height, width = gray.shape[:2]
+    grid_step = region_size // 2
+    grid_h, grid_w = grid_shape(height, width, region_size)
+    if grid_h == 0 or grid_w == 0:
+        return np.zeros((grid_h, grid_w), dtype=np.float64)
+
+    # 积分图中的整数和是精确的，除以像素数后与 np.mean 结果逐位一致；
+    # 整帧像素和不会溢出时（到 4K 为止）用 int32 积分图，比 float64 快数倍
+    if height * width * 255 < INT32_INTEGRAL_LIMIT:
+        integral = cv2.integral(gray, sdepth=cv2.CV_32S)
+    else:
+        integral = cv2.integral(gray, sdepth=cv2.CV_64F)
+
+    y0 = slice(0, grid_h * grid_step, grid_step)
+    y1 = slice(region_size, region_size + grid_h * grid_step, grid_step)
+    x0 = slice(0, grid_w * grid_step, grid_step)
+    x1 = slice(region_size, region_size + grid_w * grid_step, grid_step)
+
+    sums = integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+    return sums / (region_size * region_size)
+
+def grid_block_means(gray: np.ndarray, region_size: int) -> np.ndarray:
+    """
+    用区域插值计算 grid_step x grid_step 子块的平均亮度（uint8，舍入误差不超过 0.5）
+    region_size 为偶数时，每个检测区域恰好由 2x2 个相邻子块组成
+    返回: (grid_h + 1, grid_w + 1) 的 uint8 数组
+    """
+    height, width = gray.shape[:2]
+    grid_step = region_size // 2
+    grid_h, grid_w = grid_shape(height, width, region_size)
+    blocks = gray[:(grid_h + 1) * grid_step, :(grid_w + 1) * grid_step]
+    return cv2.resize(blocks, (grid_w + 1, grid_h + 1), interpolation=cv2.INTER_AREA)
+
+def grid_brightness_window(gray: np.ndarray, region_size: int,
+                           grid_y0: int, grid_y1: int,
+                           grid_x0: int, grid_x1: int) -> np.ndarray:
+    """
+    只计算网格中 [grid_y0, grid_y1) x [grid_x0, grid_x1) 范围内区域的平均亮度
+    结果与 grid_brightness(gray, region_size)[grid_y0:grid_y1, grid_x0:grid_x1] 逐位一致
+    """
+    grid_step = region_size // 2
+    # 多留一个像素，使截取部分的网格恰好包含最后一行/列区域
+    crop = gray[grid_y0 * grid_step:(grid_y1 - 1) * grid_step + region_size + 1,
+                grid_x0 * grid_step:(grid_x1 - 1) * grid_step + region_size + 1]
+    return grid_brightness(crop, region_size)
+
+def grid_brightness_banded(gray: np.ndarray, region_size: int, band_rows: int) -> np.ndarray:
+    """
+    按水平条带分批计算网格亮度，每次只为 band_rows 行区域建立积分图
+    结果与 grid_brightness 逐位一致，积分图的临时内存从整帧降为一个条带
+    """
+    height, width = gray.shape[:2]
+    grid_h, grid_w = grid_shape(height, width, region_size)
+    if grid_h <= band_rows:
+        return grid_brightness(gray, region_size)
+
+    brightness = np.empty((grid_h, grid_w), dtype=np.float64)
+    for grid_y0 in range(0, grid_h, band_rows):
+        grid_y1 = min(grid_y0 + band_rows, grid_h)
+        brightness[grid_y0:grid_y1] = grid_brightness_window(
+            gray, region_size, grid_y0, grid_y1, 0, grid_w)
+    return brightness
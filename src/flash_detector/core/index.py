@@ -0,0 +1,247 @@
+import os
+import json
+import struct
+import cv2
+import numpy as np
+from typing import Dict, Iterator, Optional, Tuple
+
+from ..core.utils import (CIRCULARITY_VERSION, time_str_to_seconds, video_fingerprint,
+                          calculate_circularity)
+from ..core.grid import grid_brightness
+from ..core.detector import (EventMerger, create_debug_images, create_detector,
+                             flash_region, iter_gray_frames)
+
+INDEX_VERSION = 1
+# 预留的 .npy 文件头长度，写完数据后按实际帧数原地改写
+NPY_HEADER_SIZE = 256
+DEFAULT_INDEX_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'flash_detector', 'index')
+
+def index_base_path(video_path: str, region_size: int, index_dir: Optional[str] = None) -> str:
+    """返回索引文件的公共路径前缀，由视频内容指纹、区域大小和网格步长决定"""
+    fingerprint = video_fingerprint(video_path)
+    name = f"{fingerprint}_r{region_size}_g{region_size // 2}"
+    return os.path.join(index_dir or DEFAULT_INDEX_DIR, name)
+
+def _write_npy_header(f, shape: Tuple[int, ...]):
+    """在文件开头写入固定长度的 float32 .npy 文件头"""
+    header = repr({'descr': '<f4', 'fortran_order': False, 'shape': tuple(shape)})
+    header = header.ljust(NPY_HEADER_SIZE - 11) + '\n'
+    f.seek(0)
+    f.write(b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1'))
+
+def build_index(
+    video_path: str,
+    region_size: int = 20,
+    index_dir: Optional[str] = None,
+    stats: Optional[Dict] = None,
+    prefetch: int = 0
+) -> str:
+    """
+    解码整段视频，将每一帧的网格亮度写入磁盘索引
+    索引由 <前缀>.npy（形状为 (帧数, grid_h, grid_w) 的 float32 数组）
+    和 <前缀>.json（元数据）组成
+    返回: 索引文件的路径前缀
+    """
+    base = index_base_path(video_path, region_size, index_dir)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError("无法打开视频文件")
+
+    tmp_path = base + '.npy.tmp'
+    frame_count = 0
+    grid = None
+    frame_shape = None
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        with open(tmp_path, 'wb') as f:
+            _write_npy_header(f, (0, 0, 0))
+            frames = iter_gray_frames(cap, stats=stats, prefetch=prefetch)
+            try:
+                for _, _, gray in frames:
+                    brightness = grid_brightness(gray, region_size).astype(np.float32)
+                    if grid is None:
+                        grid = brightness.shape
+                        frame_shape = gray.shape
+                    elif brightness.shape != grid:
+                        raise ValueError("视频分辨率发生变化，无法建立索引")
+                    f.write(brightness.tobytes())
+                    frame_count += 1
+            finally:
+                frames.close()
+
+            if grid is None:
+                raise ValueError("视频中没有可读取的帧")
+            _write_npy_header(f, (frame_count,) + grid)
+
+        os.replace(tmp_path, base + '.npy')
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        cap.release()
+
+    metadata = {
+        'version': INDEX_VERSION,
+        'video_path': os.path.abspath(video_path),
+        'region_size': region_size,
+        'grid_step': region_size // 2,
+        'fps': fps,
+        'frame_count': frame_count,
+        'grid_shape': list(grid),
+        'frame_shape': list(frame_shape)
+    }
+    with open(base + '.json', 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    return base
+
+def load_index(
+    video_path: str,
+    region_size: int = 20,
+    index_dir: Optional[str] = None
+) -> Optional[Tuple[np.ndarray, Dict, str]]:
+    """
+    打开已有的亮度索引
+    返回: (内存映射的亮度数组, 元数据, 路径前缀)，索引不存在或版本不符时返回 None
+    """
+    base = index_base_path(video_path, region_size, index_dir)
+    if not (os.path.exists(base + '.npy') and os.path.exists(base + '.json')):
+        return None
+
+    with open(base + '.json') as f:
+        metadata = json.load(f)
+    if metadata.get('version') != INDEX_VERSION or metadata.get('region_size') != region_size:
+        return None
+
+    brightness = np.load(base + '.npy', mmap_mode='r')
+    return brightness, metadata, base
+
+class _FrameReader:
+    """按需读取候选帧，目标帧在当前位置之后不远时顺序前进而不是重新定位"""
+    def __init__(self, video_path: str, max_skip: int = 30):
+        self.video_path = video_path
+        self.max_skip = max_skip
+        self.cap = None
+        self.position = 0
+
+    def read(self, frame_num: int) -> Optional[np.ndarray]:
+        if self.cap is None:
+            self.cap = cv2.VideoCapture(self.video_path)
+            if not self.cap.isOpened():
+                raise IOError("无法打开视频文件")
+
+        if not 0 <= frame_num - self.position <= self.max_skip:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_num)
+            self.position = frame_num
+        while self.position < frame_num:
+            self.cap.grab()
+            self.position += 1
+
+        ret, frame = self.cap.read()
+        self.position += 1
+        return frame if ret else None
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+def scan_index(
+    video_path: str,
+    abs_threshold: float = 20,
+    rel_threshold: float = 0.3,
+    region_size: int = 20,
+    frame_step: int = 1,
+    start_time: str = "0:00",
+    circularity_threshold: float = 0.5,
+    merge_gap: Optional[int] = None,
+    debug_images: bool = False,
+    stats: Optional[Dict] = None,
+    index_dir: Optional[str] = None,
+    prefetch: int = 0,
+    buffer_size: int = 5
+) -> Iterator[Dict]:
+    """
+    基于亮度索引扫描闪光事件，结果与 scan_flashes 一致
+    索引不存在时先解码整段视频建立索引；之后只读取索引文件，
+    解码器仅用于读取从未检查过的候选帧做圆形度验证。
+    圆形度只取决于帧号和位置，计算结果缓存在 <前缀>.circularity<版本>.json 中，
+    更换阈值后重新分析不需要再次解码
+    """
+    if stats is not None:
+        stats.setdefault('decoded_frames', 0)
+        stats.setdefault('analyzed_frames', 0)
+
+    index = load_index(video_path, region_size, index_dir)
+    if index is None:
+        build_stats = {}
+        build_index(video_path, region_size, index_dir, build_stats, prefetch)
+        if stats is not None:
+            stats['decoded_frames'] += build_stats['decoded_frames']
+        index = load_index(video_path, region_size, index_dir)
+    brightness, metadata, base = index
+
+    circularity_path = base + f'.circularity{CIRCULARITY_VERSION}.json'
+    circularity_cache = {}
+    if os.path.exists(circularity_path):
+        with open(circularity_path) as f:
+            circularity_cache = json.load(f)
+    cache_size = len(circularity_cache)
+
+    detector = create_detector(region_size, abs_threshold, buffer_size=buffer_size)
+    merger = EventMerger(merge_gap or detector.buffer_size * frame_step)
+    reader = _FrameReader(video_path)
+    start_frame = int(time_str_to_seconds(start_time) * metadata['fps'])
+
+    def circularity_of(frame_num, position):
+        key = f"{frame_num}:{position[0]}:{position[1]}"
+        if key not in circularity_cache:
+            frame = reader.read(frame_num)
+            if stats is not None:
+                stats['decoded_frames'] += 1
+            value = None
+            if frame is not None:
+                try:
+                    # 先截取区域再转换灰度，不转换整帧
+                    value = calculate_circularity(flash_region(frame, position, region_size))
+                except Exception as e:
+                    print(f"圆形度检查失败: {str(e)}")
+            circularity_cache[key] = value
+        return circularity_cache[key]
+
+    def finish(event):
+        if debug_images:
+            frame = reader.read(event['peak_frame'])
+            if frame is not None:
+                event['debug_images'] = create_debug_images(
+                    frame, event['position'], region_size)
+        return event
+
+    try:
+        for frame_num in range(start_frame, metadata['frame_count'], frame_step):
+            if stats is not None:
+                stats['analyzed_frames'] += 1
+
+            flash_info = detector.process_brightness(brightness[frame_num], frame_num)
+            if flash_info:
+                circularity = circularity_of(frame_num, flash_info['position'])
+                if circularity is None or circularity < circularity_threshold:
+                    flash_info = None
+
+            closed = merger.update(frame_num, flash_info)
+            if closed is not None:
+                yield finish(closed)
+
+        closed = merger.flush()
+        if closed is not None:
+            yield finish(closed)
+
+    finally:
+        reader.release()
+        detector.clear_cache()
+        if len(circularity_cache) != cache_size:
+            with open(circularity_path, 'w') as f:
+                json.dump(circularity_cache, f)
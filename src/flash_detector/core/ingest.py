@@ -0,0 +1,116 @@
+import shutil
+import subprocess
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+from ..core.utils import time_str_to_seconds
+
+INGEST_MODES = ('opencv', 'ffmpeg')
+
+def analysis_size(width: int, height: int, scale: float) -> Tuple[int, int]:
+    """按缩放比例计算分析分辨率 (宽, 高)"""
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+def scaled_region_size(region_size: int, scale: float) -> int:
+    """将源帧像素下的区域大小换算到分析分辨率"""
+    return max(2, int(round(region_size * scale)))
+
+def resize_gray(gray: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """用区域插值缩放灰度图，尺寸已一致时直接返回"""
+    if (gray.shape[1], gray.shape[0]) == tuple(size):
+        return gray
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+class FFmpegGrayCapture:
+    def __init__(self, video_path: str, size: Tuple[int, int],
+                 start_seconds: float = 0.0):
+        """
+        通过 ffmpeg 子进程只输出亮度通道，并在解码端缩放到分析分辨率
+        接口与 cv2.VideoCapture 的 grab()/read()/release() 一致，read() 返回灰度帧
+        size: 输出分辨率 (宽, 高)
+        start_seconds: 开始时间（秒）
+        """
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise IOError("未找到 ffmpeg，无法使用 ffmpeg 读取模式")
+
+        self.size = size
+        self.frame_bytes = size[0] * size[1]
+
+        command = [ffmpeg, '-v', 'error', '-nostdin']
+        if start_seconds > 0:
+            command += ['-ss', f'{start_seconds:.6f}']
+        command += [
+            '-i', video_path,
+            '-an', '-sn', '-vsync', '0',
+            '-vf', f'scale={size[0]}:{size[1]}:flags=area',
+            '-f', 'rawvideo', '-pix_fmt', 'gray', '-'
+        ]
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL,
+                                        bufsize=self.frame_bytes * 4)
+
+    def isOpened(self) -> bool:
+        return self.process is not None
+
+    def _read_bytes(self) -> Optional[bytes]:
+        data = self.process.stdout.read(self.frame_bytes)
+        if len(data) < self.frame_bytes:
+            return None
+        return data
+
+    def grab(self) -> bool:
+        """跳过一帧"""
+        return self._read_bytes() is not None
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """读取一帧灰度图"""
+        data = self._read_bytes()
+        if data is None:
+            return False, None
+        frame = np.frombuffer(data, dtype=np.uint8).reshape(self.size[1], self.size[0])
+        return True, frame
+
+    def release(self):
+        if self.process is not None:
+            self.process.stdout.close()
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+def open_capture(
+    video_path: str,
+    start_time: str = "0:00",
+    ingest: str = 'opencv',
+    analysis_scale: float = 1.0,
+    start_frame: Optional[int] = None
+):
+    """
+    按读取模式打开视频并定位到开始时间
+    ingest: 'opencv' 解码完整的 BGR 帧；'ffmpeg' 只输出亮度通道并在解码端缩放
+    analysis_scale: 分析分辨率相对源帧的缩放比例
+    start_frame: 开始帧号，给出时代替 start_time
+    返回: (cap, fps, 开始帧号, 源帧尺寸, 分析尺寸)，尺寸均为 (宽, 高)
+    """
+    if ingest not in INGEST_MODES:
+        raise ValueError(f"未知的读取模式: {ingest}")
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError("无法打开视频文件")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    source_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                   int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    size = analysis_size(source_size[0], source_size[1], analysis_scale)
+    if start_frame is None:
+        start_frame = int(time_str_to_seconds(start_time) * fps)
+
+    if ingest == 'ffmpeg':
+        cap.release()
+        cap = FFmpegGrayCapture(video_path, size, start_frame / fps if fps else 0.0)
+    elif start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    return cap, fps, start_frame, source_size, size
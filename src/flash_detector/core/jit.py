@@ -0,0 +1,79 @@
+import numba
+import numpy as np
+
+from ..core.backends import GRAY_SHIFT, GRAY_WEIGHTS
+
+# numba 后端的计算核，只在选择 numba 后端时导入（导入 numba 本身需要数百毫秒）
+
+@numba.njit(cache=True, nogil=True)
+def gray_kernel(frame, out):
+    """BGR 帧转换为灰度图，写入 out"""
+    b_weight, g_weight, r_weight = GRAY_WEIGHTS
+    rounding = 1 << (GRAY_SHIFT - 1)
+    for y in range(out.shape[0]):
+        for x in range(out.shape[1]):
+            value = (np.int32(frame[y, x, 0]) * b_weight + np.int32(frame[y, x, 1]) * g_weight
+                     + np.int32(frame[y, x, 2]) * r_weight + rounding)
+            out[y, x] = value >> GRAY_SHIFT
+
+@numba.njit(cache=True, nogil=True)
+def grid_kernel(gray, region_size, out):
+    """计算网格区域的平均亮度，写入 (grid_h, grid_w) 的 out"""
+    grid_step = region_size // 2
+    grid_h, grid_w = out.shape
+    used_w = (grid_w - 1) * grid_step + region_size
+    area = region_size * region_size
+    sums = np.empty(used_w, dtype=np.int64)
+    columns = np.zeros(used_w + 1, dtype=np.int64)
+    for i in range(grid_h):
+        y0 = i * grid_step
+        # 本行区域各列的像素和（按行连续访问），再做前缀和
+        sums[:] = 0
+        for y in range(y0, y0 + region_size):
+            for x in range(used_w):
+                sums[x] += gray[y, x]
+        for x in range(used_w):
+            columns[x + 1] = columns[x] + sums[x]
+        for j in range(grid_w):
+            x0 = j * grid_step
+            out[i, j] = (columns[x0 + region_size] - columns[x0]) / area
+
+@numba.njit(cache=True, nogil=True)
+def window_kernel(history, head, threshold, ranges, low, sign_changes, candidates):
+    """
+    对 (buffer_size, 区域数) 的环形缓冲区做时序检验，head 为最旧一帧的位置
+    返回: 是否存在亮度范围超过阈值且方向改变至少两次的区域
+    """
+    size, cells = history.shape
+    order = np.empty(size, dtype=np.int64)
+    for k in range(size):
+        order[k] = (head + k) % size
+    # 按时间逐层更新最大、最小值（连续访问，可向量化），ranges 先存放最大值
+    for i in range(cells):
+        ranges[i] = low[i] = np.float32(history[order[0], i])
+    for k in range(1, size):
+        row = history[order[k]]
+        for i in range(cells):
+            value = np.float32(row[i])
+            ranges[i] = max(ranges[i], value)
+            low[i] = min(low[i], value)
+
+    found = False
+    for i in range(cells):
+        value_range = ranges[i] - low[i]
+        ranges[i] = value_range
+        count = 0
+        if value_range > threshold:
+            # 只对超过阈值的区域按时间顺序比较相邻差分的符号
+            previous = (np.float32(history[order[1], i])
+                        - np.float32(history[order[0], i]))
+            for k in range(2, size):
+                current = (np.float32(history[order[k], i])
+                           - np.float32(history[order[k - 1], i]))
+                if previous * current < 0:
+                    count += 1
+                previous = current
+        sign_changes[i] = count
+        candidates[i] = count >= 2
+        found |= count >= 2
+    return found
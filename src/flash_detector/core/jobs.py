@@ -0,0 +1,261 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from ..core.batch import _event_record, probe_video
+from ..core.cache import scan_flashes_cached
+from ..core.detector import LOW_MEMORY_DTYPES, scan_flashes
+from ..core.ingest import INGEST_MODES
+from ..core.profiler import Profiler
+
+# 任务状态，后三种为结束状态
+JOB_STATES = ('queued', 'running', 'done', 'failed', 'cancelled')
+FINISHED_STATES = ('done', 'failed', 'cancelled')
+
+# 任务可以设置的检测参数及其类型，其余参数由服务决定
+JOB_PARAMETERS = {
+    'abs_threshold': float,
+    'rel_threshold': float,
+    'region_size': int,
+    'frame_step': int,
+    'start_time': str,
+    'circularity_threshold': float,
+    'buffer_size': int,
+    'rate_window': float,
+    'analysis_scale': float,
+    'ingest': str,
+    'gate': bool,
+    'hierarchical': bool,
+    'low_memory': str
+}
+
+# 取值限定在若干选项中的参数，与命令行的 choices 一致
+JOB_CHOICES = {
+    'ingest': INGEST_MODES,
+    'low_memory': LOW_MEMORY_DTYPES
+}
+
+class JobRejected(Exception):
+    """排队的任务已满，拒绝新的任务"""
+
+class JobCancelled(Exception):
+    """任务被取消，用于中止正在进行的扫描"""
+
+def validate_params(params: Dict) -> Dict:
+    """
+    检查并转换任务的检测参数
+    返回: 转换类型后的参数，出现未知参数或无法转换的值时抛出 ValueError
+    """
+    unknown = sorted(set(params) - set(JOB_PARAMETERS))
+    if unknown:
+        raise ValueError(f"未知的检测参数: {', '.join(unknown)}")
+    values = {}
+    for key, value in params.items():
+        if value is None:
+            continue
+        kind = JOB_PARAMETERS[key]
+        if kind is bool and not isinstance(value, bool):
+            raise ValueError(f"参数 {key} 应为布尔值")
+        try:
+            values[key] = kind(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"参数 {key} 的值无效: {value!r}")
+        if key in JOB_CHOICES and values[key] not in JOB_CHOICES[key]:
+            raise ValueError(f"参数 {key} 的值无效: {value!r}（可选: {', '.join(JOB_CHOICES[key])}）")
+    return values
+
+class Job:
+    def __init__(self, video_path: str, params: Dict, probe: Dict):
+        """
+        一个检测任务的状态，由工作线程更新，由 HTTP 请求读取
+        frame: 最近分析的帧号，用于计算进度
+        events: 已产出的事件记录（可序列化），扫描中逐个追加
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.video_path = video_path
+        self.params = params
+        self.frames = probe['frames']
+        self.fps = probe['fps']
+        self.status = 'queued'
+        self.frame = None
+        self.events = []
+        self.error = None
+        self.stats = {}
+        self.profile = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        # 事件追加和状态变化时通知等待的请求
+        self.condition = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def progress(self) -> float:
+        """已分析的比例（0-1）"""
+        if self.status == 'done':
+            return 1.0
+        if self.frame is None or self.frames <= 0:
+            return 0.0
+        return min(1.0, (self.frame + 1) / self.frames)
+
+    def progress_info(self) -> Dict:
+        return {
+            'status': self.status,
+            'frame': self.frame,
+            'frames': self.frames,
+            'progress': round(self.progress(), 4)
+        }
+
+    def to_dict(self, events: bool = True) -> Dict:
+        """任务的快照，events 为 False 时只给出事件数"""
+        info = {
+            'id': self.id,
+            'video_path': self.video_path,
+            'params': self.params,
+            'fps': self.fps,
+            'event_count': len(self.events),
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished
+        }
+        info.update(self.progress_info())
+        if events:
+            info['events'] = list(self.events)
+            info['stats'] = dict(self.stats)
+            info['profile'] = self.profile
+        return info
+
+    def _update(self, **values):
+        with self.condition:
+            for key, value in values.items():
+                setattr(self, key, value)
+            self.condition.notify_all()
+
+    def wait(self, event_count: int, timeout: float) -> bool:
+        """
+        等待新事件或任务结束，最多等待 timeout 秒
+        返回: 是否有新事件或任务已结束
+        """
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: len(self.events) > event_count or self.done, timeout)
+
+class JobManager:
+    def __init__(self, workers: int = 1, max_queued: int = 8, cache=None,
+                 max_finished: int = 100):
+        """
+        检测任务管理：有界的工作线程池和准入控制
+        同时运行的任务不超过 workers 个，另有最多 max_queued 个任务排队，
+        超出时 submit 抛出 JobRejected，避免多个任务互相争抢 CPU 而都变慢
+        cache: 可选的 ResultCache，相同视频和参数的任务直接返回缓存结果
+        max_finished: 保留的已结束任务数，超出时删除最早的
+        """
+        self.workers = max(1, workers)
+        self.max_queued = max(0, max_queued)
+        self.cache = cache
+        self.max_finished = max_finished
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix='flash-job')
+
+    def active_count(self) -> int:
+        """排队和运行中的任务数"""
+        with self.lock:
+            return sum(1 for job in self.jobs.values() if not job.done)
+
+    def submit(self, video_path: str, params: Optional[Dict] = None) -> Job:
+        """
+        提交检测任务
+        参数无效或视频无法打开时抛出 ValueError，队列已满时抛出 JobRejected
+        """
+        params = validate_params(params or {})
+        if not os.path.isfile(video_path):
+            raise ValueError(f"视频文件不存在: {video_path}")
+        probe = probe_video(video_path)
+        if probe is None:
+            raise ValueError(f"无法打开视频文件: {video_path}")
+
+        job = Job(video_path, params, probe)
+        with self.lock:
+            active = sum(1 for item in self.jobs.values() if not item.done)
+            if active >= self.workers + self.max_queued:
+                raise JobRejected(f"任务已满: {active} 个任务正在排队或运行")
+            self.jobs[job.id] = job
+            self._prune()
+        self.executor.submit(self._run, job)
+        return job
+
+    def _prune(self):
+        """删除最早的已结束任务，调用方持有锁"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self.lock:
+            return list(self.jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """取消任务：排队的任务不再运行，运行中的任务在下一帧中止"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        with job.condition:
+            job.cancel_requested = True
+            if job.status == 'queued':
+                job.status = 'cancelled'
+                job.finished = time.time()
+            job.condition.notify_all()
+        return job
+
+    def _run(self, job: Job):
+        with job.condition:
+            if job.cancel_requested:
+                return
+            job.status = 'running'
+            job.started = time.time()
+
+        def progress(frame_num):
+            if job.cancel_requested:
+                raise JobCancelled()
+            job.frame = frame_num
+
+        profiler = Profiler()
+        stats = {}
+        params = dict(job.params, stats=stats, profiler=profiler, progress=progress)
+        try:
+            if self.cache is not None:
+                events = scan_flashes_cached(job.video_path, self.cache, **params)
+            else:
+                events = scan_flashes(job.video_path, **params)
+            for event in events:
+                record = _event_record(event, job.fps)
+                with job.condition:
+                    job.events.append(record)
+                    job.condition.notify_all()
+            status, error = 'done', None
+        except JobCancelled:
+            status, error = 'cancelled', None
+        except Exception as e:
+            status, error = 'failed', str(e)
+        job._update(status=status, error=error, stats=stats, profile=profiler.report(),
+                    finished=time.time())
+
+    def shutdown(self):
+        """取消所有未结束的任务并等待工作线程退出"""
+        for job in self.list():
+            if not job.done:
+                self.cancel(job.id)
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,214 @@
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+from collections import deque
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+from ..core.utils import check_circularity
+from ..core.detector import EventMerger, create_detector, flash_region
+from ..core.ingest import analysis_size, resize_gray, scaled_region_size
+
+LIVE_POLICIES = ('drop', 'downsample')
+
+# 降采样策略下分析分辨率的下限
+MIN_LIVE_SCALE = 0.25
+
+# 统计延迟分位数时保留的最近分析帧数，长时间监测时内存占用不随运行时长增长
+LATENCY_WINDOW = 10000
+
+# 直播源结束的标记
+_END = object()
+
+def open_source(source: Union[str, int]) -> cv2.VideoCapture:
+    """打开视频源：文件、设备编号、网络流地址或命名管道"""
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError(f"无法打开视频源: {source}")
+    return cap
+
+def latency_percentiles(latencies: Iterable[float]) -> Dict[str, float]:
+    """计算延迟的分位数（毫秒）"""
+    latencies = list(latencies)
+    if not latencies:
+        return {'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+    values = np.asarray(latencies) * 1000
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {'p50': float(p50), 'p90': float(p90), 'p99': float(p99),
+            'max': float(values.max())}
+
+class LiveCapture:
+    def __init__(self, cap: cv2.VideoCapture, realtime: bool = True, queue_size: int = 4,
+                 stats: Optional[Dict] = None):
+        """
+        在采集线程中读取视频源，为每帧记录到达时间
+        realtime: 是否按视频帧率节奏读取（用于以原速回放本地文件）。
+                  实时模式下队列满时丢弃最旧的帧，不会阻塞采集；
+                  否则队列满时等待分析（离线回放，不丢帧）
+        queue_size: 采集队列长度
+        stats: 统计字典，记录 received（采集的帧数）和 queue_dropped（采集队列中被丢弃的帧数）
+        """
+        self.cap = cap
+        self.realtime = realtime
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.stats = stats if stats is not None else {}
+        self.stats.setdefault('received', 0)
+        self.stats.setdefault('queue_dropped', 0)
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _put(self, item):
+        if not self.realtime:
+            while not self._stop.is_set():
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            return
+
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                # 分析跟不上时丢弃最旧的帧，保证队列中总是最新的画面
+                try:
+                    self.queue.get_nowait()
+                    self.stats['queue_dropped'] += 1
+                except queue.Empty:
+                    pass
+
+    def _run(self):
+        """采集线程"""
+        start = time.perf_counter()
+        frame_num = 0
+        try:
+            while not self._stop.is_set():
+                if self.realtime:
+                    delay = start + frame_num / self.fps - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                self.stats['received'] += 1
+                self._put((frame_num, frame, time.perf_counter()))
+                frame_num += 1
+        finally:
+            self._put(_END)
+
+    def __iter__(self):
+        """产出 (帧号, 帧, 到达时间)"""
+        self._thread.start()
+        try:
+            while True:
+                item = self.queue.get()
+                if item is _END:
+                    return
+                yield item
+        finally:
+            self._stop.set()
+            self._thread.join()
+
+def watch_stream(
+    source: Union[str, int],
+    abs_threshold: float = 20,
+    region_size: int = 20,
+    circularity_threshold: float = 0.5,
+    latency_budget: float = 0.5,
+    policy: str = 'drop',
+    realtime: bool = True,
+    analysis_scale: float = 1.0,
+    merge_gap: Optional[int] = None,
+    stats: Optional[Dict] = None,
+    buffer_size: int = 5
+) -> Iterator[Dict]:
+    """
+    实时监测视频源，检测到新的闪光事件时立即产出告警
+    latency_budget: 端到端延迟预算（秒），帧从到达到开始分析的等待时间超过预算时丢弃
+    policy: 超出预算时的处理策略，'drop' 只丢弃超时的帧；
+            'downsample' 同时把分析分辨率减半（最低 MIN_LIVE_SCALE），
+            切换分辨率后亮度历史重新积累
+    realtime: 是否按视频帧率节奏读取，本地文件以原速回放
+    analysis_scale: 初始分析分辨率相对源帧的缩放比例
+    buffer_size: 时序分析窗口的帧数
+    stats: 统计字典，记录 received、queue_dropped、analyzed、dropped（超时丢弃的帧数）、
+           scale_changes（[(帧号, 新的缩放比例), ...]）、latencies（最近 LATENCY_WINDOW 个被分析帧的端到端延迟，秒）、
+           analysis_time（分析用时合计，秒）和 fps（视频源帧率）
+    返回: 告警字典，包含 frame_num、intensity、position（源帧像素坐标）、frequency、latency（秒）
+    """
+    if policy not in LIVE_POLICIES:
+        raise ValueError(f"未知的延迟处理策略: {policy}")
+
+    stats = stats if stats is not None else {}
+    stats.setdefault('analyzed', 0)
+    stats.setdefault('dropped', 0)
+    stats.setdefault('scale_changes', [])
+    stats.setdefault('latencies', deque(maxlen=LATENCY_WINDOW))
+    stats.setdefault('analysis_time', 0.0)
+
+    cap = open_source(source)
+    source_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                   int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    scale = analysis_scale
+
+    def build(scale):
+        size = analysis_size(source_size[0], source_size[1], scale)
+        return size, create_detector(scaled_region_size(region_size, scale)
+                                     if scale != 1.0 else region_size, abs_threshold,
+                                     buffer_size=buffer_size)
+
+    size, detector = build(scale)
+    merger = EventMerger(merge_gap or detector.buffer_size)
+    capture = LiveCapture(cap, realtime, stats=stats)
+    stats['fps'] = capture.fps
+    frames = iter(capture)
+    try:
+        for frame_num, frame, arrival in frames:
+            if time.perf_counter() - arrival > latency_budget:
+                stats['dropped'] += 1
+                if policy == 'downsample' and scale > MIN_LIVE_SCALE:
+                    scale = max(MIN_LIVE_SCALE, scale / 2)
+                    size, detector = build(scale)
+                    stats['scale_changes'].append((frame_num, scale))
+                continue
+
+            analysis_start = time.perf_counter()
+            # 灰度转换与检测器使用同一计算后端
+            gray = resize_gray(detector.backend.to_gray(frame), size)
+            flash_info = detector.process_frame(gray, frame_num)
+            if flash_info and not check_circularity(
+                    flash_region(gray, flash_info['position'], detector.region_size),
+                    circularity_threshold):
+                flash_info = None
+
+            new_event = flash_info is not None and (
+                merger.current is None or
+                frame_num - merger.current['end_frame'] > merger.merge_gap)
+            merger.update(frame_num, flash_info)
+
+            now = time.perf_counter()
+            latency = now - arrival
+            stats['analysis_time'] += now - analysis_start
+            stats['analyzed'] += 1
+            stats['latencies'].append(latency)
+
+            if new_event:
+                x, y = flash_info['position']
+                yield {
+                    'frame_num': frame_num,
+                    'intensity': flash_info['intensity'],
+                    'position': (int(round(x * source_size[0] / size[0])),
+                                 int(round(y * source_size[1] / size[1]))),
+                    'frequency': flash_info['frequency'],
+                    'latency': latency
+                }
+    finally:
+        frames.close()
+        cap.release()
@@ -0,0 +1,244 @@
+import hashlib
+import cv2
+import numpy as np
+from typing import List, Optional, Sequence, Tuple, Union
+
+from ..core.grid import grid_brightness, grid_brightness_window, grid_shape
+
+# 合并计算网格亮度的分块边长（以区域个数计），同一分块行中相邻的活跃分块合并为一个窗口
+MASK_TILE_SIZE = 16
+# 自动检测黑边时，最亮亮度低于该值的行/列视为黑边
+LETTERBOX_THRESHOLD = 24
+
+Shape = Union[Tuple[int, int, int, int], List[Tuple[int, int]]]
+
+def parse_shape(text: str) -> Shape:
+    """
+    解析命令行中的区域
+    矩形: "x,y,w,h"；多边形: "x1,y1;x2,y2;x3,y3;..."（至少三个顶点）
+    """
+    try:
+        if ';' in text:
+            points = [tuple(int(float(v)) for v in point.split(','))
+                      for point in text.split(';') if point.strip()]
+            if len(points) < 3 or any(len(point) != 2 for point in points):
+                raise ValueError
+            return points
+        values = tuple(int(float(v)) for v in text.split(','))
+        if len(values) != 4 or values[2] <= 0 or values[3] <= 0:
+            raise ValueError
+        return values
+    except ValueError:
+        raise ValueError(f"无效的区域: {text}（矩形为 x,y,w,h，多边形为 x1,y1;x2,y2;x3,y3）")
+
+class CellMask:
+    def __init__(self, active: np.ndarray, region_size: int, frame_shape: Tuple[int, int]):
+        """
+        编译好的网格区域掩码：活跃区域的索引和计算它们所需的网格窗口
+        active: (grid_h, grid_w) 的布尔数组，True 为参与分析的区域
+        frame_shape: 掩码对应的帧尺寸 (高, 宽)
+        """
+        self.active = active
+        self.region_size = region_size
+        self.frame_shape = tuple(frame_shape)
+        grid_h, grid_w = active.shape
+        # 活跃区域按行优先顺序的平铺索引，以及对应的 (grid_y, grid_x)
+        self.index = np.flatnonzero(active)
+        self.cells = np.column_stack(np.unravel_index(self.index, active.shape))
+        position = np.full(active.size, -1, dtype=np.int64)
+        position[self.index] = np.arange(self.index.size)
+
+        # 同一分块行中相邻的活跃分块合并为一个窗口，列范围相同的相邻窗口再纵向合并
+        tile = MASK_TILE_SIZE
+        spans = []
+        for grid_y0 in range(0, grid_h, tile):
+            grid_y1 = min(grid_y0 + tile, grid_h)
+            tiles = [active[grid_y0:grid_y1, x:x + tile].any() for x in range(0, grid_w, tile)]
+            start = None
+            for t, used in enumerate(tiles + [False]):
+                if used and start is None:
+                    start = t
+                elif not used and start is not None:
+                    span = [grid_y0, grid_y1, start * tile, min(t * tile, grid_w)]
+                    above = [s for s in spans if s[1] == grid_y0 and s[2:] == span[2:]]
+                    if above:
+                        above[0][1] = grid_y1
+                    else:
+                        spans.append(span)
+                    start = None
+
+        # 窗口收缩到其中活跃区域的外接矩形，记录活跃区域在窗口内和输出中的位置
+        self.windows = []
+        for grid_y0, grid_y1, grid_x0, grid_x1 in spans:
+            rows = np.flatnonzero(active[grid_y0:grid_y1, grid_x0:grid_x1].any(axis=1))
+            cols = np.flatnonzero(active[grid_y0:grid_y1, grid_x0:grid_x1].any(axis=0))
+            grid_y0, grid_y1 = grid_y0 + int(rows[0]), grid_y0 + int(rows[-1]) + 1
+            grid_x0, grid_x1 = grid_x0 + int(cols[0]), grid_x0 + int(cols[-1]) + 1
+            block = active[grid_y0:grid_y1, grid_x0:grid_x1]
+            local = np.flatnonzero(block)
+            rows, cols = np.unravel_index(local, block.shape)
+            target = position[(rows + grid_y0) * grid_w + cols + grid_x0]
+            self.windows.append(((grid_y0, grid_y1, grid_x0, grid_x1), local, target))
+
+    @property
+    def size(self) -> int:
+        """活跃区域数"""
+        return int(self.index.size)
+
+    @property
+    def coverage(self) -> float:
+        """活跃区域占全部网格区域的比例"""
+        return self.size / self.active.size if self.active.size else 0.0
+
+    def brightness(self, gray: np.ndarray) -> np.ndarray:
+        """
+        只计算活跃区域的平均亮度，计算量与活跃分块的面积成正比
+        返回: 长度为 size 的 float64 数组，与 grid_brightness(gray)[active] 逐位一致
+        """
+        if gray.shape[:2] != self.frame_shape:
+            raise ValueError(f"帧尺寸 {gray.shape[:2]} 与区域掩码 {self.frame_shape} 不一致")
+        if len(self.windows) == 1 and self.coverage == 1.0:
+            return grid_brightness(gray, self.region_size).ravel()
+        values = np.empty(self.size, dtype=np.float64)
+        for (grid_y0, grid_y1, grid_x0, grid_x1), local, target in self.windows:
+            block = grid_brightness_window(gray, self.region_size,
+                                           grid_y0, grid_y1, grid_x0, grid_x1)
+            values[target] = block.ravel()[local]
+        return values
+
+class RegionMask:
+    def __init__(self, include: Optional[Sequence[Shape]] = None,
+                 exclude: Optional[Sequence[Shape]] = None,
+                 mask_image: Optional[Union[str, np.ndarray]] = None):
+        """
+        分析区域与排除区域（源帧像素坐标）
+        include: 只分析这些矩形 (x, y, w, h) 或多边形 [(x, y), ...] 内的区域，默认整帧
+        exclude: 不分析的区域，如滚动字幕、台标、黑边
+        mask_image: 掩码图像（路径或数组），非零像素为分析区域，尺寸不同时缩放到帧尺寸
+        只有完全落在允许范围内的检测区域参与分析
+        """
+        self.include = [parse_shape(s) if isinstance(s, str) else s for s in include or []]
+        self.exclude = [parse_shape(s) if isinstance(s, str) else s for s in exclude or []]
+        if isinstance(mask_image, str):
+            image = cv2.imread(mask_image, cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                raise IOError(f"无法读取掩码图像: {mask_image}")
+            mask_image = image
+        self.mask_image = mask_image
+
+    def __bool__(self) -> bool:
+        return bool(self.include or self.exclude or self.mask_image is not None)
+
+    def fingerprint(self) -> str:
+        """区域定义的指纹，用于缓存键和检查点参数"""
+        digest = hashlib.blake2b(repr((self.include, self.exclude)).encode(), digest_size=8)
+        if self.mask_image is not None:
+            digest.update(str(self.mask_image.shape).encode())
+            digest.update(np.ascontiguousarray(self.mask_image).tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _draw(canvas: np.ndarray, shape: Shape, scale: Tuple[float, float], value: int):
+        sx, sy = scale
+        if len(shape) == 4 and not isinstance(shape[0], (tuple, list)):
+            # 矩形覆盖 [x, x + w) x [y, y + h) 的像素
+            x, y, w, h = shape
+            canvas[max(0, round(y * sy)):max(0, round((y + h) * sy)),
+                   max(0, round(x * sx)):max(0, round((x + w) * sx))] = value
+            return
+        polygon = np.array([[round(px * sx), round(py * sy)] for px, py in shape],
+                           dtype=np.int32)
+        cv2.fillPoly(canvas, [polygon], value)
+
+    def pixel_mask(self, height: int, width: int,
+                   source_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        生成 (height, width) 的像素掩码，非零为允许分析的像素
+        source_size: 区域坐标所在的源帧尺寸 (宽, 高)，分析分辨率不同时按比例缩放
+        """
+        source_w, source_h = source_size or (width, height)
+        scale = (width / source_w, height / source_h)
+        if self.include:
+            mask = np.zeros((height, width), dtype=np.uint8)
+            for shape in self.include:
+                self._draw(mask, shape, scale, 255)
+        else:
+            mask = np.full((height, width), 255, dtype=np.uint8)
+        for shape in self.exclude:
+            self._draw(mask, shape, scale, 0)
+        if self.mask_image is not None:
+            image = self.mask_image
+            if image.ndim == 3:
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if image.shape != (height, width):
+                image = cv2.resize(image, (width, height), interpolation=cv2.INTER_NEAREST)
+            mask[image == 0] = 0
+        return mask
+
+    def compile(self, height: int, width: int, region_size: int,
+                source_size: Optional[Tuple[int, int]] = None) -> CellMask:
+        """
+        编译为 (height, width) 帧上的网格区域掩码，只计算一次
+        检测区域内的像素全部允许分析时该区域为活跃区域
+        """
+        mask = self.pixel_mask(height, width, source_size)
+        grid_h, grid_w = grid_shape(height, width, region_size)
+        # 区域内允许像素的比例，全部允许时均值恰好为 255
+        active = grid_brightness(mask, region_size) >= 255
+        return CellMask(active.reshape(grid_h, grid_w), region_size, (height, width))
+
+def detect_letterbox(video_path: str, seconds: float = 3.0, samples: int = 12,
+                     threshold: float = LETTERBOX_THRESHOLD) -> Optional[Tuple[int, int, int, int]]:
+    """
+    从视频开头几秒自动检测黑边（上下或左右的黑条）
+    取 samples 个均匀分布的帧，每行/列在所有样本中的最高亮度都低于 threshold 时视为黑边
+    返回: 画面区域 (x, y, w, h)，没有黑边或无法读取时返回 None
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return None
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        last = int(seconds * fps)
+        if total > 0:
+            last = min(last, total - 1)
+        targets = sorted(set(np.linspace(0, max(last, 0), samples).astype(int)))
+
+        row_max = col_max = None
+        frame_num = 0
+        for target in targets:
+            while frame_num < target:
+                if not cap.grab():
+                    break
+                frame_num += 1
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_num += 1
+            gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            rows, cols = gray.max(axis=1), gray.max(axis=0)
+            row_max = rows if row_max is None else np.maximum(row_max, rows)
+            col_max = cols if col_max is None else np.maximum(col_max, cols)
+    finally:
+        cap.release()
+
+    if row_max is None:
+        return None
+    rows = np.flatnonzero(row_max >= threshold)
+    cols = np.flatnonzero(col_max >= threshold)
+    if rows.size == 0 or cols.size == 0:
+        return None
+    y0, y1 = int(rows[0]), int(rows[-1]) + 1
+    x0, x1 = int(cols[0]), int(cols[-1]) + 1
+    if (x0, y0, x1, y1) == (0, 0, col_max.size, row_max.size):
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
+
+def letterbox_exclusions(content: Tuple[int, int, int, int],
+                         width: int, height: int) -> List[Tuple[int, int, int, int]]:
+    """将画面区域 (x, y, w, h) 之外的黑边转换为排除矩形"""
+    x, y, w, h = content
+    bars = [(0, 0, width, y), (0, y + h, width, height - y - h),
+            (0, y, x, h), (x + w, y, width - x - w, h)]
+    return [bar for bar in bars if bar[2] > 0 and bar[3] > 0]
@@ -0,0 +1,162 @@
+import os
+import cv2
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..core.utils import time_str_to_seconds
+from ..core.detector import (EventMerger, add_gate_stats, analyze_frames,
+                             create_debug_images, create_detector, read_frame)
+from ..core.ingest import open_capture, scaled_region_size
+
+def plan_segments(
+    start_frame: int,
+    total_frames: int,
+    segment_frames: int,
+    frame_step: int = 1
+) -> List[Tuple[int, Optional[int]]]:
+    """
+    将视频划分为若干时间段
+    每段的起点都落在 start_frame + k * frame_step 上，保证与串行扫描分析同一批帧
+    返回: [(段起始帧, 段结束帧), ...]，最后一段的结束帧为 None（读到视频末尾）
+    """
+    segment_frames = max(frame_step, segment_frames - segment_frames % frame_step)
+    segments = []
+    seg_start = start_frame
+    while True:
+        seg_end = seg_start + segment_frames
+        if seg_end >= total_frames:
+            segments.append((seg_start, None))
+            return segments
+        segments.append((seg_start, seg_end))
+        seg_start = seg_end
+
+def _scan_segment(
+    video_path: str,
+    params: Dict,
+    seg_start: int,
+    seg_end: Optional[int],
+    scan_start: int
+) -> Tuple[List[Tuple[int, Dict]], Dict]:
+    """
+    在工作进程中扫描一个时间段
+    从 seg_start 之前的预热帧开始读取，只返回落在 [seg_start, seg_end) 内的检测结果
+    返回: (检测结果列表, 帧数统计)
+    """
+    frame_step = params['frame_step']
+    region_size = params['region_size']
+    detector = create_detector(region_size, params['abs_threshold'], params['gate'],
+                               params['hierarchical'], params['buffer_size'])
+
+    # 预热帧数按被分析帧计算，换算成视频帧时乘以步长
+    warmup_start = max(scan_start, seg_start - detector.warmup_frames * frame_step)
+
+    cap, _, _, source_size, size = open_capture(
+        video_path, ingest=params['ingest'], analysis_scale=params['analysis_scale'],
+        start_frame=warmup_start)
+    scaled = size != source_size
+    if scaled:
+        detector = create_detector(scaled_region_size(region_size, size[0] / source_size[0]),
+                                   params['abs_threshold'], params['gate'],
+                                   params['hierarchical'], params['buffer_size'])
+
+    detections = []
+    stats = {}
+    try:
+        frames = analyze_frames(cap, detector, warmup_start, frame_step,
+                                params['circularity_threshold'], seg_end, stats,
+                                params['prefetch'], size if scaled else None,
+                                source_size)
+        for frame_num, flash_info, _ in frames:
+            if flash_info and frame_num >= seg_start:
+                detections.append((frame_num, flash_info))
+    finally:
+        cap.release()
+        add_gate_stats(stats, detector)
+        detector.clear_cache()
+
+    return detections, stats
+
+def scan_flashes_parallel(
+    video_path: str,
+    abs_threshold: float = 20,
+    rel_threshold: float = 0.3,
+    region_size: int = 20,
+    frame_step: int = 1,
+    start_time: str = "0:00",
+    circularity_threshold: float = 0.5,
+    merge_gap: Optional[int] = None,
+    debug_images: bool = False,
+    workers: Optional[int] = None,
+    segment_seconds: float = 60.0,
+    stats: Optional[Dict] = None,
+    prefetch: int = 0,
+    analysis_scale: float = 1.0,
+    ingest: str = 'opencv',
+    gate: bool = False,
+    hierarchical: bool = False,
+    buffer_size: int = 5
+) -> Iterator[Dict]:
+    """
+    将视频分段后在多个进程中并行扫描，按帧序合并后逐个产出闪光事件
+    结果与 scan_flashes 的串行扫描完全一致
+    workers: 工作进程数，默认为 CPU 核数
+    segment_seconds: 每段的时长（秒）
+    stats: 可选的统计字典，汇总各段读取和分析的帧数（包含预热帧）
+    prefetch: 每个工作进程内的预取队列长度
+    analysis_scale, ingest, gate, hierarchical, buffer_size: 与 scan_flashes 相同
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError("无法打开视频文件")
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    start_frame = int(time_str_to_seconds(start_time) * fps)
+    segments = plan_segments(start_frame, total_frames,
+                             int(segment_seconds * fps), frame_step)
+    params = {
+        'abs_threshold': abs_threshold,
+        'region_size': region_size,
+        'frame_step': frame_step,
+        'circularity_threshold': circularity_threshold,
+        'prefetch': prefetch,
+        'analysis_scale': analysis_scale,
+        'ingest': ingest,
+        'gate': gate,
+        'hierarchical': hierarchical,
+        'buffer_size': buffer_size
+    }
+
+    merger = EventMerger(merge_gap or buffer_size * frame_step)
+
+    def finish(event):
+        if debug_images:
+            frame = read_frame(video_path, event['peak_frame'])
+            if frame is not None:
+                event['debug_images'] = create_debug_images(
+                    frame, event['position'], region_size)
+        return event
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [
+            executor.submit(_scan_segment, video_path, params,
+                            seg_start, seg_end, start_frame)
+            for seg_start, seg_end in segments
+        ]
+
+        # 按段的先后顺序收集结果，保证事件按帧序合并
+        for future in futures:
+            detections, segment_stats = future.result()
+            if stats is not None:
+                for key, value in segment_stats.items():
+                    stats[key] = stats.get(key, 0) + value
+
+            for frame_num, flash_info in detections:
+                closed = merger.update(frame_num, flash_info)
+                if closed is not None:
+                    yield finish(closed)
+
+    closed = merger.flush()
+    if closed is not None:
+        yield finish(closed)
@@ -0,0 +1,85 @@
+import cv2
+import queue
+import threading
+import time
+import numpy as np
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+# 解码线程结束的标记
+_END = object()
+
+class _PrefetchError:
+    """解码线程中抛出的异常，转交给分析线程重新抛出"""
+    def __init__(self, error: BaseException):
+        self.error = error
+
+def to_gray(frame: np.ndarray) -> np.ndarray:
+    """转换为灰度图，已经是灰度图时直接返回"""
+    if frame.ndim == 3:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return frame
+
+class FramePrefetcher:
+    def __init__(self, frames: Iterable[Tuple[int, np.ndarray]], queue_size: int = 8,
+                 stats: Optional[Dict] = None,
+                 convert: Callable[[np.ndarray], np.ndarray] = to_gray):
+        """
+        在独立的解码线程中读取帧并转换为灰度图，通过有界队列交给分析阶段
+        frames: 产出 (帧号, 帧) 的帧源，在解码线程中迭代
+        queue_size: 预取队列长度，队列满时解码线程阻塞等待（背压）
+        stats: 可选的统计字典，记录 decode_wait（分析阶段等待解码的时间）
+               和 analysis_wait（解码阶段等待队列空位的时间），单位秒
+        convert: 在解码线程中把帧转换为分析用灰度图的函数
+        """
+        self.frames = frames
+        self.convert = convert
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.stats = stats if stats is not None else {}
+        self.stats.setdefault('decode_wait', 0.0)
+        self.stats.setdefault('analysis_wait', 0.0)
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _put(self, item) -> bool:
+        """放入队列，分析阶段已退出时返回 False"""
+        start = time.perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.stats['analysis_wait'] += time.perf_counter() - start
+
+    def _run(self):
+        """解码线程"""
+        try:
+            for frame_num, frame in self.frames:
+                if not self._put((frame_num, frame, self.convert(frame))):
+                    return
+            self._put(_END)
+        except BaseException as e:
+            self._put(_PrefetchError(e))
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """产出 (帧号, 原始帧, 灰度帧)"""
+        self._thread.start()
+        try:
+            while True:
+                start = time.perf_counter()
+                item = self.queue.get()
+                self.stats['decode_wait'] += time.perf_counter() - start
+
+                if item is _END:
+                    return
+                if isinstance(item, _PrefetchError):
+                    raise item.error
+                yield item
+        finally:
+            # 通知解码线程退出，并等待它释放对视频的访问
+            self._stop.set()
+            self._thread.join()
@@ -0,0 +1,103 @@
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# 报告中各阶段的顺序和名称
+STAGES = {
+    'decode': '解码',
+    'color': '颜色转换/缩放',
+    'gate': '变化门限',
+    'grid': '网格亮度',
+    'temporal': '时序分析',
+    'circularity': '圆形度检查',
+    'debug_images': '调试图像'
+}
+
+def peak_memory_mb() -> Optional[float]:
+    """进程的峰值常驻内存（MB），无法获取时返回 None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # macOS 上单位为字节，Linux 上为 KB
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+class Profiler:
+    def __init__(self):
+        """
+        按阶段累计耗时和调用次数，并记录帧计数
+        启用预取时解码和颜色转换在解码线程中计时，与分析阶段的时间重叠
+        """
+        self.timings = {name: 0.0 for name in STAGES}
+        self.calls = {name: 0 for name in STAGES}
+        self.counters = {}
+        self.start = time.perf_counter()
+
+    def add(self, name: str, seconds: float, calls: int = 1):
+        """累加一个阶段的耗时"""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def count(self, name: str, value: int = 1):
+        """累加计数器"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def stage(self, name: str):
+        """对 with 语句块计时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def report(self) -> Dict:
+        """
+        生成性能报告
+        返回: wall_time（秒）、stages（各阶段的 seconds / calls / ms_per_call / percent）、
+              counters 和 peak_memory_mb
+        """
+        wall_time = time.perf_counter() - self.start
+        stages = {}
+        for name, seconds in self.timings.items():
+            calls = self.calls.get(name, 0)
+            if not calls:
+                continue
+            stages[name] = {
+                'seconds': seconds,
+                'calls': calls,
+                'ms_per_call': seconds * 1000 / calls,
+                'percent': seconds * 100 / wall_time if wall_time > 0 else 0.0
+            }
+        return {
+            'wall_time': wall_time,
+            'stages': stages,
+            'counters': dict(self.counters),
+            'peak_memory_mb': peak_memory_mb()
+        }
+
+def format_profile(report: Dict) -> str:
+    """将性能报告格式化为文本表格"""
+    lines = [f"{'用时(秒)':>8}{'调用次数':>8}{'毫秒/次':>9}{'占比':>8}  阶段"]
+    for name, stage in report['stages'].items():
+        lines.append(f"{stage['seconds']:>12.3f}{stage['calls']:>12d}{stage['ms_per_call']:>12.3f}"
+                     f"{stage['percent']:>9.1f}%  {STAGES.get(name, name)}")
+    lines.append(f"总用时: {report['wall_time']:.3f}秒")
+    for name, value in report['counters'].items():
+        lines.append(f"{name}: {value}")
+    if report['peak_memory_mb'] is not None:
+        lines.append(f"峰值内存: {report['peak_memory_mb']:.1f} MB")
+    return "\n".join(lines)
+
+def write_profile(report: Dict, path: str):
+    """将性能报告写入 JSON 文件"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,128 @@
+import itertools
+from typing import Dict, List, Optional
+
+from ..core.utils import calculate_circularity
+from ..core.grid import grid_brightness
+from ..core.detector import (EventMerger, create_detector, flash_region,
+                             iter_gray_frames, open_video)
+
+# 支持扫描的参数及其类型
+SWEEP_PARAMETERS = {
+    'abs_threshold': float,
+    'region_size': int,
+    'circularity_threshold': float
+}
+
+def parse_sweep(spec: str) -> Dict[str, List]:
+    """
+    解析参数网格描述
+    格式: "abs_threshold=15,20,25;region_size=16,20;circularity_threshold=0.5,0.7"
+    """
+    grid = {}
+    for part in spec.split(';'):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, values = part.partition('=')
+        name = name.strip()
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"不支持扫描的参数: {name}")
+        grid[name] = [SWEEP_PARAMETERS[name](v) for v in values.split(',') if v.strip()]
+        if not grid[name]:
+            raise ValueError(f"参数 {name} 没有取值")
+    return grid
+
+def expand_sweep(grid: Dict[str, List], defaults: Optional[Dict] = None) -> List[Dict]:
+    """
+    将参数网格展开为参数组合列表（笛卡尔积）
+    defaults: 网格中未给出的参数取值
+    """
+    base = {'abs_threshold': 20, 'region_size': 20, 'circularity_threshold': 0.5}
+    base.update(defaults or {})
+    names = list(grid)
+    configs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        config = dict(base)
+        config.update(zip(names, values))
+        configs.append(config)
+    return configs
+
+def sweep_flashes(
+    video_path: str,
+    configs: List[Dict],
+    frame_step: int = 1,
+    start_time: str = "0:00",
+    merge_gap: Optional[int] = None,
+    stats: Optional[Dict] = None,
+    prefetch: int = 0,
+    buffer_size: int = 5
+) -> List[Dict]:
+    """
+    一次解码评估多组检测参数，每组的结果与单独运行 scan_flashes 一致
+    每种 region_size 只计算一次网格亮度和时序分析：最强闪烁区域与 abs_threshold 无关，
+    阈值只决定它是否成立，因此所有阈值变体共享同一个检测器。
+    圆形度按 (region_size, 位置) 在同一帧内共享
+    configs: 参数组合列表，每项包含 abs_threshold、region_size、circularity_threshold
+    返回: [{'config': 参数组合, 'events': 事件列表}, ...]，顺序与 configs 相同
+    """
+    # 每种区域大小一个不设阈值的检测器，返回每帧最强的闪烁区域
+    detectors = {}
+    for config in configs:
+        region_size = config['region_size']
+        if region_size not in detectors:
+            detectors[region_size] = create_detector(region_size, float('-inf'),
+                                                     buffer_size=buffer_size)
+
+    runs = []
+    for config in configs:
+        runs.append({
+            'config': config,
+            'merger': EventMerger(merge_gap or buffer_size * frame_step),
+            'events': []
+        })
+
+    cap, fps, start_frame = open_video(video_path, start_time)
+    frames = iter_gray_frames(cap, start_frame, frame_step, stats=stats, prefetch=prefetch)
+    try:
+        for frame_num, frame, gray in frames:
+            strongest = {
+                region_size: detector.process_brightness(
+                    grid_brightness(gray, region_size), frame_num)
+                for region_size, detector in detectors.items()
+            }
+            circularity = {}
+
+            for run in runs:
+                config = run['config']
+                region_size = config['region_size']
+                flash_info = strongest[region_size]
+                if flash_info and flash_info['intensity'] <= config['abs_threshold']:
+                    flash_info = None
+
+                if flash_info:
+                    key = (region_size, flash_info['position'])
+                    if key not in circularity:
+                        try:
+                            circularity[key] = calculate_circularity(
+                                flash_region(gray, flash_info['position'], region_size))
+                        except Exception as e:
+                            print(f"圆形度检查失败: {str(e)}")
+                            circularity[key] = None
+                    value = circularity[key]
+                    if value is None or value < config['circularity_threshold']:
+                        flash_info = None
+
+                closed = run['merger'].update(frame_num, flash_info)
+                if closed is not None:
+                    run['events'].append(closed)
+
+        for run in runs:
+            closed = run['merger'].flush()
+            if closed is not None:
+                run['events'].append(closed)
+
+    finally:
+        frames.close()
+        cap.release()
+
+    return [{'config': run['config'], 'events': run['events']} for run in runs]
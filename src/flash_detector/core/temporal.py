@@ -0,0 +1,162 @@
+import numpy as np
+from typing import Dict, Tuple
+
+# 事件中记录的闪烁频率指标
+RATE_KEYS = ('flash_rate', 'transitions', 'swing')
+
+class FlashRateAnalyzer:
+    def __init__(self, window: int, fps: float, threshold: float, dtype=np.float32):
+        """
+        整个网格的闪烁频率分析
+        在最近 window 帧的滑动窗口上统计每个区域的亮度跳变次数、每秒闪光次数和平均亮度摆幅。
+        跳变：亮度相对上一个转折点反向变化超过 threshold；一对相反的跳变为一次闪光。
+        每帧只做与网格大小成正比的增量更新，开销与窗口长度无关
+        window: 滑动窗口长度（分析帧数）
+        fps: 分析帧率（源帧率除以帧步长），用于换算每秒闪光次数
+        threshold: 计为一次跳变的最小亮度变化
+        dtype: 窗口内跳变幅度的存储类型，低内存模式下为 float16 或 uint8（四舍五入）
+        """
+        if window < 1:
+            raise ValueError("闪烁频率窗口至少为 1 帧")
+        self.window = window
+        self.fps = fps
+        self.threshold = threshold
+        self.dtype = np.dtype(dtype)
+        self.shape = None
+
+    def _allocate(self, brightness: np.ndarray):
+        """按网格大小分配状态，以第一帧亮度作为初始转折点"""
+        shape = brightness.shape
+        self.shape = shape
+        # 上一次跳变的方向：1 变亮，-1 变暗，0 尚无跳变
+        self._direction = np.zeros(shape, dtype=np.int8)
+        # 上一个转折点以来的最高和最低亮度
+        self._high = brightness.astype(np.float32)
+        self._low = brightness.astype(np.float32)
+        # 窗口内每帧的跳变标记和跳变幅度（环形缓冲区）
+        self._events = np.zeros((self.window,) + shape, dtype=np.uint8)
+        self._amplitudes = np.zeros((self.window,) + shape, dtype=self.dtype)
+        # 窗口内的跳变次数和跳变幅度之和，随窗口滑动增量更新
+        self.transitions = np.zeros(shape, dtype=np.int32)
+        self._swing_sum = np.zeros(shape, dtype=np.float64)
+        self.index = 0
+        self.frames = 0
+
+        self._rise = np.empty(shape, dtype=np.float32)
+        self._fall = np.empty(shape, dtype=np.float32)
+        self._up = np.empty(shape, dtype=bool)
+        self._down = np.empty(shape, dtype=bool)
+        self._mask = np.empty(shape, dtype=bool)
+
+    def update(self, brightness: np.ndarray):
+        """输入一帧网格亮度，更新跳变状态和滑动窗口计数"""
+        if self.shape != brightness.shape:
+            # 分辨率变化时状态不再可比
+            self._allocate(brightness)
+
+        high, low = self._high, self._low
+        rise, fall = self._rise, self._fall
+        up, down, mask = self._up, self._down, self._mask
+        np.maximum(high, brightness, out=high)
+        np.minimum(low, brightness, out=low)
+        np.subtract(brightness, low, out=rise)
+        np.subtract(high, brightness, out=fall)
+
+        # 上一次不是变亮且亮度比转折点后的最低值高出阈值：变亮跳变；变暗同理
+        np.greater(rise, self.threshold, out=up)
+        np.less_equal(self._direction, 0, out=mask)
+        np.logical_and(up, mask, out=up)
+        np.greater(fall, self.threshold, out=down)
+        np.greater_equal(self._direction, 0, out=mask)
+        np.logical_and(down, mask, out=down)
+        np.logical_and(down, ~up, out=down)
+
+        self._direction[up] = 1
+        self._direction[down] = -1
+        np.logical_or(up, down, out=mask)
+        # 跳变后以当前亮度作为新的转折点
+        np.copyto(high, brightness, where=mask)
+        np.copyto(low, brightness, where=mask)
+
+        # 滑动窗口：移出最旧一帧的跳变，写入当前帧
+        slot = self.index
+        self.transitions -= self._events[slot]
+        self._swing_sum -= self._amplitudes[slot]
+        self._events[slot] = mask
+        amplitudes = self._amplitudes[slot]
+        amplitudes.fill(0)
+        if self.dtype == np.uint8:
+            np.rint(rise, out=rise)
+            np.rint(fall, out=fall)
+        np.copyto(amplitudes, rise, where=up, casting='unsafe')
+        np.copyto(amplitudes, fall, where=down, casting='unsafe')
+        self.transitions += self._events[slot]
+        self._swing_sum += amplitudes
+        self.index = (slot + 1) % self.window
+        self.frames += 1
+
+    @property
+    def window_seconds(self) -> float:
+        """
+        窗口实际覆盖的时长（秒）
+        窗口尚未填满时（视频开头）只按已分析的帧数计算，避免低报开头的闪光频率
+        """
+        return max(1, min(self.frames, self.window)) / self.fps
+
+    def flash_rate(self) -> np.ndarray:
+        """每个区域在窗口内的每秒闪光次数"""
+        if self.shape is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return (self.transitions / 2 / self.window_seconds).astype(np.float32)
+
+    def swing(self) -> np.ndarray:
+        """每个区域在窗口内跳变的平均亮度摆幅"""
+        if self.shape is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return (self._swing_sum / np.maximum(self.transitions, 1)).astype(np.float32)
+
+    def summary(self, cell: Tuple[int, ...]) -> Dict:
+        """
+        单个区域的闪烁频率指标
+        cell: 网格坐标 (grid_y, grid_x)，检测器设置了区域掩码时为 (活跃区域序号,)
+        返回: flash_rate（每秒闪光次数）、transitions（窗口内跳变次数）和 swing（平均亮度摆幅）
+        """
+        transitions = int(self.transitions[cell])
+        return {
+            'flash_rate': transitions / 2 / self.window_seconds,
+            'transitions': transitions,
+            'swing': float(self._swing_sum[cell] / max(transitions, 1))
+        }
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """导出分析状态（用于检查点）"""
+        if self.shape is None:
+            return {}
+        return {
+            'direction': self._direction.copy(),
+            'high': self._high.copy(),
+            'low': self._low.copy(),
+            'events': self._events.copy(),
+            'amplitudes': self._amplitudes.copy(),
+            'index': np.array(self.index),
+            'frames': np.array(self.frames)
+        }
+
+    def set_state(self, state: Dict[str, np.ndarray]):
+        """从 get_state 导出的状态恢复"""
+        if not state:
+            self.shape = None
+            return
+        self._allocate(state['high'])
+        self._direction[:] = state['direction']
+        self._low[:] = state['low']
+        self._events[:] = state['events']
+        self._amplitudes[:] = state['amplitudes']
+        self.transitions[:] = self._events.sum(axis=0)
+        self._swing_sum[:] = self._amplitudes.sum(axis=0, dtype=np.float64)
+        self.index = int(state['index'])
+        self.frames = int(state['frames'])
+
+    def reset(self):
+        """清除状态"""
+        self.shape = None
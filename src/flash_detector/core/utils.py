@@ -1,6 +1,8 @@
+import os
 import cv2
+import hashlib
 import numpy as np
-from typing import Tuple
+from typing import Optional, Tuple
 
 def time_str_to_seconds(time_str: str) -> float:
     """将时间字符串(分:秒)转换为秒数"""
@@ -18,36 +20,75 @@ def format_time(seconds: float) -> str:
     seconds = seconds % 60
     return f"{minutes:02d}:{seconds:05.2f}"
 
-def check_circularity(region: np.ndarray, threshold: float) -> bool:
-    """检查区域的圆形度"""
-    try:
-        # 转换为灰度图
-        if len(region.shape) == 3:
-            gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+def video_fingerprint(video_path: str, block_size: int = 1 << 20, blocks: int = 8) -> str:
+    """
+    计算视频文件的快速内容指纹
+    只读取文件中均匀分布的若干数据块，与文件大小一起做哈希，不需要读取整个文件
+    """
+    size = os.path.getsize(video_path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(video_path, 'rb') as f:
+        if size <= block_size * blocks:
+            digest.update(f.read())
         else:
-            gray = region
+            for i in range(blocks):
+                f.seek((size - block_size) * i // (blocks - 1))
+                digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+# 圆形度计算方法的版本，二值化规则改变时递增，使缓存的圆形度和检测结果失效
+CIRCULARITY_VERSION = 2
+# 区域内亮度对比低于该值时视为均匀区域，退回固定阈值
+MIN_REGION_CONTRAST = 20
+FIXED_BINARY_THRESHOLD = 127
+
+def region_threshold(gray: np.ndarray) -> float:
+    """
+    圆形度检查的二值化阈值：区域最亮和最暗亮度的中点，
+    使暗背景上的弱闪光和亮背景上的闪光都能分离出光斑；
+    对比低于 MIN_REGION_CONTRAST 的均匀区域使用固定阈值 127
+    """
+    low, high = cv2.minMaxLoc(gray)[:2]
+    if high - low < MIN_REGION_CONTRAST:
+        return FIXED_BINARY_THRESHOLD
+    return (low + high) / 2
 
-        # 二值化
-        _, binary = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
+def calculate_circularity(region: np.ndarray) -> Optional[float]:
+    """计算区域内最大轮廓的圆形度，没有有效轮廓时返回 None"""
+    # 转换为灰度图
+    if len(region.shape) == 3:
+        gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = region
+    if gray.size == 0:
+        return None
 
-        # 找到轮廓
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL,
-                                     cv2.CHAIN_APPROX_SIMPLE)
+    # 按区域亮度二值化
+    _, binary = cv2.threshold(gray, region_threshold(gray), 255, cv2.THRESH_BINARY)
 
-        if not contours:
-            return False
+    # 找到轮廓
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL,
+                                 cv2.CHAIN_APPROX_SIMPLE)
 
-        # 获取最大轮廓
-        contour = max(contours, key=cv2.contourArea)
+    if not contours:
+        return None
 
-        # 计算圆形度
-        area = cv2.contourArea(contour)
-        perimeter = cv2.arcLength(contour, True)
-        if perimeter == 0:
-            return False
+    # 获取最大轮廓
+    contour = max(contours, key=cv2.contourArea)
 
-        circularity = 4 * np.pi * area / (perimeter * perimeter)
-        return circularity >= threshold
+    # 计算圆形度
+    area = cv2.contourArea(contour)
+    perimeter = cv2.arcLength(contour, True)
+    if perimeter == 0:
+        return None
+
+    return 4 * np.pi * area / (perimeter * perimeter)
+
+def check_circularity(region: np.ndarray, threshold: float) -> bool:
+    """检查区域的圆形度"""
+    try:
+        circularity = calculate_circularity(region)
+        return circularity is not None and circularity >= threshold
 
     except Exception as e:
         print(f"圆形度检查失败: {str(e)}")
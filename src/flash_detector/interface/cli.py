@@ -1,13 +1,23 @@
 import argparse
+import os
 import cv2
 import time
-from ..core.detector import detect_flash
+from ..core.backends import BACKENDS, get_backend, select_backend
+from ..core.detector import LOW_MEMORY_DTYPES, scan_flashes
+from ..core.ingest import INGEST_MODES
+from ..core.checkpoint import default_checkpoint_path
+from ..core.profiler import Profiler, format_profile, write_profile
 from ..core.utils import time_str_to_seconds, format_time
+from ..visualization.visualizer import save_debug_images
+
+# 批处理、并行、实时监测、缓存、索引和参数扫描等模式在使用时才导入，
+# 普通的串行扫描不加载 multiprocessing 等用不到的模块
 
 def parse_arguments():
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description='视频闪光检测工具')
-    parser.add_argument('video_path', help='视频文件路径')
+    parser.add_argument('video_path', nargs='*',
+                      help='视频文件路径；批处理时可为多个文件、目录、通配符或清单文件')
     parser.add_argument('--abs_threshold', type=float, default=20,
                       help='绝对差异阈值 (默认: 20)')
     parser.add_argument('--rel_threshold', type=float, default=0.3,
@@ -20,12 +30,315 @@ def parse_arguments():
                       help='开始分析的时间点(分:秒格式，如 1:30)')
     parser.add_argument('--circularity_threshold', type=float, default=0.5,
                       help='圆形度阈值 (默认: 0.5)')
+    parser.add_argument('--buffer_size', type=int, default=5,
+                      help='时序分析窗口的帧数 (默认: 5)')
+    parser.add_argument('--rate_window', type=float, default=0.0,
+                      help='闪烁频率分析的窗口时长(秒)，大于0时为每个事件输出每秒闪光次数、'
+                           '跳变次数和亮度摆幅，只用于串行扫描和批处理 (默认: 0，不启用)')
+    parser.add_argument('--low_memory', nargs='?', const='uint8', choices=list(LOW_MEMORY_DTYPES),
+                      default=None,
+                      help='低内存模式：亮度历史量化存储为 uint8 或 float16，按条带计算网格亮度，'
+                           '调试图像只保留闪光区域，输出每百万像素的内存占用，只用于串行扫描和批处理 '
+                           '(不带值时: uint8)')
+    parser.add_argument('--roi', action='append', default=[],
+                      help='只分析的区域（源帧像素），矩形 x,y,w,h 或多边形 "x1,y1;x2,y2;x3,y3"，'
+                           '可重复指定，只用于串行扫描')
+    parser.add_argument('--exclude', action='append', default=[],
+                      help='不分析的区域（如滚动字幕、台标），格式同 --roi，可重复指定')
+    parser.add_argument('--mask_image', type=str, default=None,
+                      help='掩码图像，非零像素为分析区域，尺寸不同时缩放到帧尺寸')
+    parser.add_argument('--auto_letterbox', action='store_true',
+                      help='从视频开头几秒自动检测黑边并排除')
+    parser.add_argument('--workers', type=int, default=1,
+                      help='并行扫描的工作进程数，大于1时按时间分段并行处理 (默认: 1)')
+    parser.add_argument('--segment_length', type=float, default=60.0,
+                      help='并行扫描时每段的时长(秒) (默认: 60)')
+    parser.add_argument('--bands', type=int, default=0,
+                      help='共享内存分发模式的条带分析进程数：一个进程解码，帧经共享内存分发给'
+                           '按网格水平条带划分的分析进程，大于0时启用 (默认: 0)')
+    parser.add_argument('--slots', type=int, default=8,
+                      help='共享内存分发模式的帧槽位数 (默认: 8)')
+    parser.add_argument('--analysis_scale', type=float, default=1.0,
+                      help='分析分辨率相对源帧的缩放比例，如 0.25 (默认: 1.0)')
+    parser.add_argument('--ingest', choices=list(INGEST_MODES), default='opencv',
+                      help='读取模式: opencv 解码彩色帧; ffmpeg 只读取亮度通道并在解码端缩放 (默认: opencv)')
+    parser.add_argument('--backend', choices=list(BACKENDS), default=None,
+                      help='灰度转换、网格亮度和时序检验的计算后端，各后端结果一致；'
+                           'numba 需要安装 numba (默认: 环境变量 FLASH_DETECTOR_BACKEND，未设置时为 opencv)')
+    parser.add_argument('--gate', action='store_true',
+                      help='启用变化门限，跳过不可能产生闪光的静态帧的网格计算')
+    parser.add_argument('--hierarchical', action='store_true',
+                      help='启用由粗到细的分层定位，只对可能产生闪光的区域做精确计算')
+    parser.add_argument('--index', action='store_true',
+                      help='使用磁盘亮度索引，首次运行时建立索引，之后更换阈值无需重新解码')
+    parser.add_argument('--index_dir', type=str, default=None,
+                      help='亮度索引目录 (默认: ~/.cache/flash_detector/index)')
+    parser.add_argument('--sweep', type=str, default=None,
+                      help='参数扫描网格，一次解码评估所有组合，'
+                           '如 "abs_threshold=15,20,25;region_size=16,20;circularity_threshold=0.5,0.7"')
+    parser.add_argument('--prefetch', type=int, default=8,
+                      help='解码线程的预取队列长度，0表示在分析线程中顺序解码 (默认: 8)')
+    parser.add_argument('--checkpoint', type=str, default=None,
+                      help='检查点文件，扫描中定期保存进度，正常结束后删除')
+    parser.add_argument('--checkpoint_interval', type=int, default=1000,
+                      help='每分析多少帧保存一次检查点 (默认: 1000)')
+    parser.add_argument('--resume', action='store_true',
+                      help='从检查点继续中断的扫描 (默认检查点: 视频路径.checkpoint.npz)')
+    parser.add_argument('--live', action='store_true',
+                      help='实时监测模式，video_path 可为文件（按原速回放）、设备编号、网络流地址或命名管道')
+    parser.add_argument('--latency_budget', type=float, default=0.5,
+                      help='实时监测的延迟预算(秒)，超时的帧被丢弃 (默认: 0.5)')
+    parser.add_argument('--live_policy', choices=['drop', 'downsample'], default='drop',
+                      help='超出延迟预算时的策略: drop 丢弃超时帧; downsample 同时降低分析分辨率 (默认: drop)')
+    parser.add_argument('--cache', action='store_true',
+                      help='使用结果缓存，相同视频和参数再次检测时直接返回结果')
+    parser.add_argument('--cache_dir', type=str, default=None,
+                      help='结果缓存目录 (默认: ~/.cache/flash_detector/results)')
+    parser.add_argument('--cache_size', type=float, default=64,
+                      help='结果缓存容量(MB)，超出时淘汰最久未使用的结果 (默认: 64)')
+    parser.add_argument('--clear_cache', action='store_true',
+                      help='清空结果缓存后退出')
+    parser.add_argument('--debug_images', type=str, default=None, metavar='DIR',
+                      help='为每个闪光事件的峰值帧生成调试图像（原帧、差异热力图、区域放大图）'
+                           '并写入该目录')
+    parser.add_argument('--profile', nargs='?', const='flash_profile.json', default=None,
+                      help='输出各阶段耗时、帧计数和峰值内存，并写入 JSON 报告 (默认文件: flash_profile.json)')
+    parser.add_argument('--serve', action='store_true',
+                      help='以 HTTP/JSON 检测服务运行，不需要图形界面，--workers 为同时运行的任务数')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                      help='检测服务的监听地址 (默认: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765,
+                      help='检测服务的端口 (默认: 8765)')
+    parser.add_argument('--max_queued', type=int, default=8,
+                      help='检测服务中排队任务数的上限，超出时拒绝新任务 (默认: 8)')
+    parser.add_argument('--batch', action='store_true',
+                      help='批处理模式，给出多个路径或目录时自动启用；'
+                           '--workers 为同时处理的视频数')
+    parser.add_argument('--output', type=str, default=None,
+                      help='批处理结果文件，每完成一个视频追加写入 (.jsonl 或 .csv)')
+    parser.add_argument('--output_format', choices=['jsonl', 'csv'], default=None,
+                      help='批处理结果格式 (默认: 按 --output 的扩展名判断)')
+    parser.add_argument('--retries', type=int, default=1,
+                      help='批处理中扫描失败后的重试次数，仍失败时跳过该视频 (默认: 1)')
+
+    args = parser.parse_args()
+    if args.clear_cache or args.serve:
+        return args
+    if not args.video_path:
+        parser.error("需要指定视频文件路径")
+    if (not args.batch and len(args.video_path) == 1
+            and not os.path.isdir(args.video_path[0])):
+        args.video_path = args.video_path[0]
+    else:
+        args.batch = True
+    return args
+
+def print_event(index, event, fps):
+    """输出单个闪光事件"""
+    x, y = event['position']
+    print(f"[{index}] 帧号: {event['start_frame']}-{event['end_frame']}"
+          f" | 峰值帧: {event['peak_frame']}"
+          f" | 时间点: {format_time(event['peak_frame'] / fps)}"
+          f" | 强度: {event['intensity']:.2f}"
+          f" | 位置: ({x}, {y})"
+          + (f" | 闪光频率: {event['flash_rate']:.2f}次/秒"
+             f" | 跳变: {event['transitions']}"
+             f" | 摆幅: {event['swing']:.1f}" if 'flash_rate' in event else ""))
+
+def print_pipeline_stalls(stats):
+    """输出解码/分析流水线两个阶段的等待时间"""
+    decode_wait = stats.get('decode_wait', 0.0)
+    analysis_wait = stats.get('analysis_wait', 0.0)
+    print(f"分析等待解码: {decode_wait:.2f}秒")
+    print(f"解码等待分析: {analysis_wait:.2f}秒")
+    if decode_wait > analysis_wait:
+        print("瓶颈: 解码")
+    else:
+        print("瓶颈: 分析")
+
+def run_sweep(args):
+    """运行参数扫描并输出每组参数的检测结果表"""
+    from ..core.sweep import expand_sweep, parse_sweep, sweep_flashes
+    configs = expand_sweep(parse_sweep(args.sweep), {
+        'abs_threshold': args.abs_threshold,
+        'region_size': args.region_size,
+        'circularity_threshold': args.circularity_threshold
+    })
+    print(f"\n参数扫描: 共 {len(configs)} 组参数")
+
+    start_time = time.time()
+    stats = {}
+    results = sweep_flashes(args.video_path, configs, args.frame_step,
+                            args.start_time, stats=stats, prefetch=args.prefetch,
+                            buffer_size=args.buffer_size)
+    process_time = time.time() - start_time
+
+    print(f"\n{'绝对阈值':>8} {'区域大小':>8} {'圆形度':>8} {'事件数':>6} {'最强强度':>8}  峰值帧")
+    for result in results:
+        config = result['config']
+        events = result['events']
+        strongest = max(events, key=lambda e: e['intensity']) if events else None
+        print(f"{config['abs_threshold']:>12.1f} {config['region_size']:>12d} "
+              f"{config['circularity_threshold']:>11.2f} {len(events):>9d} "
+              f"{strongest['intensity'] if strongest else 0:>12.2f}  "
+              f"{strongest['peak_frame'] if strongest else '-'}")
+
+    print(f"\n处理用时: {process_time:.2f}秒")
+    print(f"读取帧数: {stats.get('decoded_frames', 0)}, 分析帧数: {stats.get('analyzed_frames', 0)}")
 
-    return parser.parse_args()
+def run_batch_cli(args):
+    """批量处理多个视频，逐个输出并写入结果文件"""
+    from ..core.batch import run_batch
+    params = {
+        'abs_threshold': args.abs_threshold,
+        'rel_threshold': args.rel_threshold,
+        'region_size': args.region_size,
+        'frame_step': args.frame_step,
+        'start_time': args.start_time,
+        'circularity_threshold': args.circularity_threshold,
+        'prefetch': args.prefetch,
+        'analysis_scale': args.analysis_scale,
+        'ingest': args.ingest,
+        'gate': args.gate,
+        'hierarchical': args.hierarchical,
+        'buffer_size': args.buffer_size,
+        'rate_window': args.rate_window,
+        'low_memory': args.low_memory
+    }
+    print(f"批处理: {len(args.video_path)} 个输入, 并行视频数: {args.workers}")
+    if args.output:
+        print(f"结果文件: {args.output}")
+
+    start_time = time.time()
+    counts = {'ok': 0, 'failed': 0, 'skipped': 0}
+    event_count = 0
+    total_frames = 0
+    try:
+        for index, result in enumerate(run_batch(args.video_path, params, args.output,
+                                                 args.output_format, args.workers,
+                                                 args.retries), 1):
+            counts[result['status']] += 1
+            if result['status'] == 'ok':
+                event_count += len(result['events'])
+                total_frames += result['frames']
+                print(f"[{index}] {result['video_path']}: {len(result['events'])} 个闪光事件 "
+                      f"(帧数: {result['frames']}, 用时: {result['process_time']:.2f}秒)")
+            else:
+                status = '跳过' if result['status'] == 'skipped' else '失败'
+                print(f"[{index}] {result['video_path']}: {status} - {result['error']}")
+    except Exception as e:
+        print(f"批处理失败: {str(e)}")
+        return
+
+    process_time = time.time() - start_time
+    print(f"\n完成: {counts['ok']} 个, 失败: {counts['failed']} 个, 跳过: {counts['skipped']} 个")
+    print(f"共检测到 {event_count} 个闪光事件")
+    print(f"处理用时: {process_time:.2f}秒")
+    if process_time > 0:
+        print(f"平均速度: {total_frames/process_time:.2f} 帧/秒")
+
+def run_live(args):
+    """实时监测视频源，逐个输出告警，结束（或按 Ctrl+C）后输出延迟统计"""
+    from ..core.live import latency_percentiles, watch_stream
+    print(f"实时监测: {args.video_path}")
+    print(f"- 延迟预算: {args.latency_budget}秒, 策略: {args.live_policy}")
+
+    stats = {}
+    start_time = time.time()
+    try:
+        alerts = watch_stream(args.video_path, args.abs_threshold, args.region_size,
+                              args.circularity_threshold, args.latency_budget,
+                              args.live_policy, analysis_scale=args.analysis_scale,
+                              stats=stats, buffer_size=args.buffer_size)
+        for index, alert in enumerate(alerts, 1):
+            x, y = alert['position']
+            print(f"[告警 {index}] 帧号: {alert['frame_num']}"
+                  f" | 强度: {alert['intensity']:.2f}"
+                  f" | 位置: ({x}, {y})"
+                  f" | 延迟: {alert['latency'] * 1000:.1f}毫秒")
+    except KeyboardInterrupt:
+        print("\n已停止监测")
+    except Exception as e:
+        print(f"监测失败: {str(e)}")
+        return
+
+    process_time = time.time() - start_time
+    percentiles = latency_percentiles(stats.get('latencies', []))
+    print(f"\n监测用时: {process_time:.2f}秒")
+    print(f"接收帧数: {stats.get('received', 0)}, 分析帧数: {stats.get('analyzed', 0)}")
+    print(f"超时丢弃: {stats.get('dropped', 0)} 帧, 队列丢弃: {stats.get('queue_dropped', 0)} 帧")
+    for frame_num, scale in stats.get('scale_changes', []):
+        print(f"帧 {frame_num}: 分析缩放比例降为 {scale}")
+    print(f"端到端延迟: p50 {percentiles['p50']:.1f}毫秒, p90 {percentiles['p90']:.1f}毫秒, "
+          f"p99 {percentiles['p99']:.1f}毫秒, 最大 {percentiles['max']:.1f}毫秒")
+    if stats.get('analyzed'):
+        per_frame = stats['analysis_time'] / stats['analyzed']
+        print(f"单帧分析用时: {per_frame * 1000:.2f}毫秒")
+        if per_frame > 0:
+            print(f"按 {stats['fps']:.2f} FPS 估计单核可同时监测约 "
+                  f"{int(1 / (per_frame * stats['fps']))} 路")
+
+def build_mask(args):
+    """按命令行参数生成分析区域，启用自动黑边检测时把黑边加入排除区域"""
+    from ..core.mask import RegionMask, detect_letterbox, letterbox_exclusions
+    exclude = list(args.exclude)
+    if args.auto_letterbox:
+        content = detect_letterbox(args.video_path)
+        if content is None:
+            print("- 自动黑边检测: 未发现黑边")
+        else:
+            cap = cv2.VideoCapture(args.video_path)
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            cap.release()
+            print(f"- 自动黑边检测: 画面区域 {content}")
+            exclude += letterbox_exclusions(content, width, height)
+    if args.roi:
+        print(f"- 分析区域: {'; '.join(args.roi)}")
+    if args.exclude:
+        print(f"- 排除区域: {'; '.join(args.exclude)}")
+    if args.mask_image:
+        print(f"- 掩码图像: {args.mask_image}")
+    return RegionMask(args.roi, exclude, args.mask_image)
+
+def print_cache_stats(cache, hit=None):
+    """输出结果缓存的命中情况和占用"""
+    cache_stats = cache.stats()
+    if hit is not None:
+        print(f"结果缓存: {'命中' if hit else '未命中'}")
+    print(f"缓存累计命中: {cache_stats['hits']}, 未命中: {cache_stats['misses']}, "
+          f"条目数: {cache_stats['entries']}, "
+          f"占用: {cache_stats['bytes'] / 1024:.1f} KB")
 
 def run_cli():
     """运行命令行界面"""
     args = parse_arguments()
+    if args.clear_cache:
+        from ..core.cache import ResultCache
+        cache = ResultCache(args.cache_dir)
+        print_cache_stats(cache)
+        print(f"已清空结果缓存: 删除 {cache.clear()} 个条目")
+        return
+    try:
+        # 通过环境变量传给批处理、并行扫描和检测服务的工作进程
+        select_backend(args.backend or get_backend().name)
+    except ValueError as e:
+        print(f"错误: {str(e)}")
+        return
+    if args.batch:
+        run_batch_cli(args)
+        return
+    if args.live:
+        run_live(args)
+        return
+    if args.serve:
+        from .server import run_server
+        cache = None
+        if args.cache:
+            from ..core.cache import ResultCache
+            cache = ResultCache(args.cache_dir, int(args.cache_size * 1024 * 1024))
+        run_server(args.host, args.port, args.workers, args.max_queued, cache)
+        return
     print(f"开始处理视频: {args.video_path}")
 
     try:
@@ -47,40 +360,180 @@ def run_cli():
         print(f"- 圆形度阈值: {args.circularity_threshold}")
         print(f"- 检测区域大小: {args.region_size}")
         print(f"- 帧比较步长: {args.frame_step}")
+        print(f"- 时序分析窗口: {args.buffer_size}帧")
+        print(f"- 计算后端: {get_backend().name}")
+        if args.rate_window > 0:
+            print(f"- 闪烁频率窗口: {args.rate_window}秒")
+        if args.low_memory:
+            print(f"- 低内存模式: {args.low_memory}")
+        if args.analysis_scale != 1.0 or args.ingest != 'opencv':
+            print(f"- 分析缩放比例: {args.analysis_scale}")
+            print(f"- 读取模式: {args.ingest}")
+        if args.workers > 1:
+            print(f"- 并行进程数: {args.workers}")
+            print(f"- 分段时长: {args.segment_length}秒")
+        elif args.bands > 0:
+            print(f"- 条带分析进程数: {args.bands}")
+            print(f"- 共享内存槽位数: {args.slots}")
+
+        if args.sweep:
+            run_sweep(args)
+            return
 
-        # 开始检测
+        # 开始检测，逐个输出闪光事件
         start_time = time.time()
-        results = detect_flash(
-            args.video_path,
-            args.abs_threshold,
-            args.rel_threshold,
-            args.region_size,
-            args.frame_step,
-            args.start_time,
-            args.circularity_threshold
-        )
+        stats = {}
+        detection_params = {
+            'abs_threshold': args.abs_threshold,
+            'rel_threshold': args.rel_threshold,
+            'region_size': args.region_size,
+            'frame_step': args.frame_step,
+            'start_time': args.start_time,
+            'circularity_threshold': args.circularity_threshold,
+            'buffer_size': args.buffer_size
+        }
+        parallel = args.index or args.workers > 1 or args.bands > 0
+        if args.rate_window > 0 and parallel:
+            print("闪烁频率分析只用于串行扫描，已忽略 --rate_window")
+        if args.low_memory and parallel:
+            print("低内存模式只用于串行扫描，已忽略 --low_memory")
+        mask = None
+        if args.roi or args.exclude or args.mask_image or args.auto_letterbox:
+            if parallel:
+                print("分析区域只用于串行扫描，已忽略 --roi/--exclude/--mask_image/--auto_letterbox")
+            else:
+                mask = build_mask(args)
+        if args.index:
+            from ..core.index import scan_index
+            if args.checkpoint or args.resume:
+                print("亮度索引模式不支持检查点，已忽略 --checkpoint/--resume")
+            # 索引按源分辨率的完整网格亮度建立，与读取模式、缩放和门限无关
+            if args.analysis_scale != 1.0 or args.ingest != 'opencv':
+                print("亮度索引按源分辨率建立，已忽略 --analysis_scale/--ingest")
+            if args.gate or args.hierarchical:
+                print("亮度索引模式读取完整的网格亮度，已忽略 --gate/--hierarchical")
+            if args.cache:
+                print("亮度索引本身可复用，不使用结果缓存，已忽略 --cache")
+            scan = scan_index
+            scan_params = {'index_dir': args.index_dir, 'prefetch': args.prefetch}
+        elif args.workers > 1:
+            from ..core.parallel import scan_flashes_parallel
+            if args.checkpoint or args.resume:
+                print("并行扫描不支持检查点，已忽略 --checkpoint/--resume")
+            scan = scan_flashes_parallel
+            scan_params = {
+                'workers': args.workers,
+                'segment_seconds': args.segment_length,
+                'prefetch': args.prefetch,
+                'analysis_scale': args.analysis_scale,
+                'ingest': args.ingest,
+                'gate': args.gate,
+                'hierarchical': args.hierarchical
+            }
+        elif args.bands > 0:
+            from ..core.fanout import scan_flashes_shared
+            if args.checkpoint or args.resume:
+                print("共享内存分发模式不支持检查点，已忽略 --checkpoint/--resume")
+            scan = scan_flashes_shared
+            scan_params = {
+                'bands': args.bands,
+                'slots': args.slots,
+                'analysis_scale': args.analysis_scale,
+                'ingest': args.ingest,
+                'gate': args.gate,
+                'hierarchical': args.hierarchical
+            }
+        else:
+            checkpoint = args.checkpoint
+            if args.resume and checkpoint is None:
+                checkpoint = default_checkpoint_path(args.video_path)
+            if checkpoint:
+                print(f"- 检查点: {checkpoint}")
+            scan = scan_flashes
+            scan_params = {
+                'prefetch': args.prefetch,
+                'analysis_scale': args.analysis_scale,
+                'ingest': args.ingest,
+                'gate': args.gate,
+                'hierarchical': args.hierarchical,
+                'checkpoint': checkpoint,
+                'checkpoint_interval': args.checkpoint_interval,
+                'resume': args.resume,
+                'rate_window': args.rate_window,
+                'low_memory': args.low_memory,
+                'mask': mask
+            }
+
+        profiler = None
+        if args.profile:
+            if scan is scan_flashes:
+                profiler = Profiler()
+                scan_params['profiler'] = profiler
+            else:
+                print("性能分析只用于串行扫描，已忽略 --profile")
+
+        if args.debug_images:
+            scan_params['debug_images'] = True
+
+        cache = None
+        if args.cache and not args.index:
+            from ..core.cache import ResultCache, scan_flashes_cached
+            cache = ResultCache(args.cache_dir, int(args.cache_size * 1024 * 1024))
+            events = scan_flashes_cached(args.video_path, cache, scan, stats=stats,
+                                         **detection_params, **scan_params)
+        else:
+            events = scan(args.video_path, stats=stats, **detection_params, **scan_params)
+
+        event_count = 0
+        for event in events:
+            if event_count == 0:
+                print("\n检测到闪光:")
+            event_count += 1
+            print_event(event_count, event, fps)
+            if args.debug_images and 'debug_images' in event:
+                save_debug_images(event.pop('debug_images'), args.debug_images,
+                                  f"event_{event_count:03d}")
         process_time = time.time() - start_time
 
         # 输出结果
-        if results and isinstance(results, list):
-            print("\n检测到闪光:")
-            if len(results) >= 1:
-                flash_info = results[0]
-                if isinstance(flash_info, tuple) and len(flash_info) == 3:
-                    frame_num, intensity, position = flash_info
-                    time_point = frame_num / fps
-                    print(f"- 帧号: {frame_num}")
-                    print(f"- 时间点: {format_time(time_point)}")
-                    print(f"- 强度: {intensity:.2f}")
-                    print(f"- 位置: ({position[0]}, {position[1]})")
-                else:
-                    print("闪光信息格式不正确")
-
-            print(f"\n处理用时: {process_time:.2f}秒")
-            print(f"处理速度: {total_frames/process_time:.2f} 帧/秒")
+        if event_count:
+            print(f"\n共检测到 {event_count} 个闪光事件")
         else:
             print("\n未检测到闪光")
 
+        decoded_frames = stats.get('decoded_frames', 0)
+        analyzed_frames = stats.get('analyzed_frames', 0)
+        print(f"\n处理用时: {process_time:.2f}秒")
+        print(f"读取帧数: {decoded_frames}, 分析帧数: {analyzed_frames}")
+        print(f"读取速度: {decoded_frames/process_time:.2f} 帧/秒")
+        print(f"分析速度: {analyzed_frames/process_time:.2f} 帧/秒")
+        if 'band_fps' in stats:
+            print(f"各阶段吞吐: 解码 {stats['decode_fps']:.2f} 帧/秒, "
+                  f"合并 {stats['merge_fps']:.2f} 帧/秒")
+            for index, band_fps in enumerate(stats['band_fps']):
+                print(f"- 条带 {index}: {band_fps:.2f} 帧/秒")
+        elif args.prefetch > 0:
+            print_pipeline_stalls(stats)
+        if 'gate_skipped' in stats:
+            print(f"变化门限跳过: {stats['gate_skipped']} 帧, "
+                  f"节省约 {max(stats['gate_saved'], 0.0):.2f}秒")
+        if 'bytes_per_megapixel' in stats:
+            print(f"检测器内存: {stats['detector_bytes'] / (1024 * 1024):.2f} MB, "
+                  f"每百万像素 {stats['bytes_per_megapixel'] / 1024:.1f} KB")
+        if args.debug_images and event_count:
+            print(f"调试图像已写入: {args.debug_images}")
+        if 'active_cells' in stats:
+            print(f"分析区域: {stats['active_cells']}/{stats['total_cells']} 个区域 "
+                  f"({stats['active_cells'] / max(stats['total_cells'], 1):.1%})")
+        if cache is not None:
+            print_cache_stats(cache, stats.get('cache_hit'))
+        if profiler is not None:
+            report = profiler.report()
+            print("\n性能分析:")
+            print(format_profile(report))
+            write_profile(report, args.profile)
+            print(f"性能报告已写入: {args.profile}")
+
     except Exception as e:
         print(f"处理失败: {str(e)}")
         import traceback
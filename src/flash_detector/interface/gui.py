@@ -1,11 +1,20 @@
 import gradio as gr
 import time
-import psutil
-import os
-import cv2
-from ..core.detector import detect_flash
+from ..core.cache import ResultCache, attach_debug_images
+from ..core.jobs import JobManager
+from ..core.profiler import STAGES
 from ..core.utils import time_str_to_seconds, format_time
-from ..visualization.visualizer import create_diff_map, create_region_detail
+from .server import ServiceClient, start_server
+
+# 界面提交任务的检测服务地址，未指定时在第一次检测前启动本进程内的服务
+_service = {'url': None}
+
+def service_url() -> str:
+    """检测服务地址，需要时启动本地服务（同时只运行一个任务，结果使用缓存）"""
+    if _service['url'] is None:
+        _, _service['url'] = start_server(JobManager(workers=1, max_queued=4,
+                                                     cache=ResultCache()))
+    return _service['url']
 
 def process_video_gradio(
     video_input,
@@ -17,52 +26,94 @@ def process_video_gradio(
     start_time,
     progress=gr.Progress()
 ):
-    """处理Gradio界面的视频输入"""
+    """处理Gradio界面的视频输入：作为检测服务的客户端提交任务并显示实时进度"""
     try:
         # 性能统计开始
         start_time_proc = time.time()
-        process = psutil.Process(os.getpid())
-        memory_start = process.memory_info()
-
-        # 获取视频信息
-        cap = cv2.VideoCapture(video_input)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        cap.release()
-
-        # 检测闪光
-        results = detect_flash(
-            video_input,
-            abs_threshold,
-            rel_threshold,
-            region_size,
-            frame_step,
-            start_time,
-            circularity_threshold
-        )
+
+        # 提交任务，相同视频和参数由服务直接返回缓存结果
+        client = ServiceClient(service_url())
+        job = client.submit(video_input, {
+            'abs_threshold': abs_threshold,
+            'rel_threshold': rel_threshold,
+            'region_size': region_size,
+            'frame_step': frame_step,
+            'start_time': start_time,
+            'circularity_threshold': circularity_threshold
+        })
+        progress(0, desc="排队中")
+        flashes = 0
+        for name, data in client.stream(job['id']):
+            if name == 'progress':
+                progress(data['progress'],
+                         desc=f"已分析 {(data['frame'] or 0) + 1}/{data['frames']} 帧，"
+                              f"检测到 {flashes} 个闪光")
+            elif name == 'flash':
+                flashes += 1
+        job = client.job(job['id'])
+        if job['status'] != 'done':
+            raise RuntimeError(job['error'] or f"任务未完成: {job['status']}")
+
+        total_frames = job['frames']
+        fps = job['fps']
+        events = job['events']
+        for event in events:
+            event['position'] = tuple(event['position'])
+
+        # 只为最强事件生成调试图像
+        report = job['profile']
+        strongest = max(events, key=lambda e: e['intensity']) if events else None
+        if strongest is not None:
+            start = time.perf_counter()
+            attach_debug_images(video_input, strongest, region_size)
+            seconds = time.perf_counter() - start
+            report['stages']['debug_images'] = {
+                'seconds': seconds, 'calls': 1, 'ms_per_call': seconds * 1000,
+                'percent': seconds * 100 / report['wall_time'] if report['wall_time'] > 0 else 0.0
+            }
 
         # 计算性能统计
         process_time = time.time() - start_time_proc
-        memory_end = process.memory_info()
-        memory_used = (memory_end.rss - memory_start.rss) / 1024 / 1024  # MB
+        stage_rows = "\n".join(
+            f"| {STAGES.get(name, name)} | {stage['seconds']:.3f} | {stage['calls']} | "
+            f"{stage['ms_per_call']:.3f} | {stage['percent']:.1f}% |"
+            for name, stage in report['stages'].items()
+        )
+        counters = report['counters']
+        peak_memory = report['peak_memory_mb']
+        peak_memory_text = f"{peak_memory:.1f} MB" if peak_memory is not None else "未知"
 
         # 准备性能报告
         performance_report = f"""
 ### 性能统计
 - 处理时间: {process_time:.2f}秒
-- 内存使用: {memory_used:.1f} MB
-- CPU使用率: {process.cpu_percent()}%
+- 峰值内存: {peak_memory_text}
+- 分析帧数: {counters.get('analyzed_frames', 0)}，按步长跳过: {counters.get('skipped_frames', 0)}
 - 处理速度: {total_frames/process_time:.1f} 帧/秒
-"""
+- 结果缓存: {'命中' if job['stats'].get('cache_hit') else '未命中'}
 
-        if results and len(results) >= 2:
-            flash_info = results[0]
-            debug_images = results[1]
+| 阶段 | 用时(秒) | 调用次数 | 毫秒/次 | 占比 |
+|---|---|---|---|---|
+{stage_rows}
+"""
 
-            frame_num, intensity, (x, y) = flash_info
+        if strongest is not None:
+            debug_images = strongest['debug_images']
+            frame_num = strongest['peak_frame']
+            intensity = strongest['intensity']
+            x, y = strongest['position']
 
             # 基本信息
-            basic_info = f"检测到闪光！\n帧号: {frame_num}\n位置: ({x}, {y})"
+            basic_info = (f"检测到 {len(events)} 个闪光事件！\n"
+                          f"最强闪光帧号: {frame_num}\n位置: ({x}, {y})")
+
+            # 事件列表
+            event_rows = "\n".join(
+                f"| {i} | {e['start_frame']}-{e['end_frame']} | "
+                f"{e['peak_frame']/fps:.3f} | ({e['position'][0]}, {e['position'][1]}) | "
+                f"{e['intensity']:.2f} |"
+                for i, e in enumerate(events, 1)
+            )
 
             # 详细信息
             detailed_info = f"""
@@ -72,13 +123,18 @@ def process_video_gradio(
 - **闪光强度**: {intensity:.2f}
 - **相对变化**: {intensity/255:.2f}
 
+### 闪光事件
+| 序号 | 帧范围 | 峰值时间(秒) | 位置 | 强度 |
+|---|---|---|---|---|
+{event_rows}
+
 {performance_report}
 """
 
-            # 获取图像
-            frame_rgb = debug_images.get('curr_frame')
-            diff_map = debug_images.get('diff_map')
-            region_detail = create_region_detail(frame_rgb, x, y, region_size)
+            # 获取图像（热力图和放大图在此时才绘制）
+            frame_rgb = debug_images['curr_frame']
+            diff_map = debug_images['diff_map']
+            region_detail = debug_images['region_detail']
 
             return (basic_info, detailed_info, frame_rgb, diff_map, region_detail)
 
@@ -93,8 +149,14 @@ def process_video_gradio(
         error_msg = f"处理失败: {str(e)}\n{traceback.format_exc()}"
         return (error_msg, error_msg, None, None, None)
 
-def create_gradio_interface():
-    """创建Gradio界面"""
+def create_gradio_interface(service_url: str = None):
+    """
+    创建Gradio界面
+    service_url: 已运行的检测服务地址（python -m flash_detector --serve），
+                 默认在本进程内启动服务
+    """
+    if service_url:
+        _service['url'] = service_url
     with gr.Blocks() as demo:
         gr.Markdown("# 视频闪光检测工具")
 
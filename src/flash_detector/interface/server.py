@@ -0,0 +1,228 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Tuple
+
+from ..core.jobs import JobManager, JobRejected
+
+# 事件流中进度消息的最短间隔（秒）
+PROGRESS_INTERVAL = 0.25
+# 队列已满时建议客户端重试的等待时间（秒）
+RETRY_AFTER = 5
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    检测任务的 HTTP/JSON 接口
+    POST   /jobs              提交任务 {"video_path": ..., "params": {...}}，返回 202
+    GET    /jobs              任务列表（不含事件）
+    GET    /jobs/<id>         任务状态、进度、事件、统计和性能报告
+    GET    /jobs/<id>/stream  server-sent events：progress（进度）、flash（新事件）、done（结束）
+    DELETE /jobs/<id>         取消任务
+    GET    /health            服务状态
+    """
+    manager: JobManager = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # 不在终端逐条输出请求日志
+        pass
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str, headers: Optional[Dict] = None):
+        self._send_json(status, {'error': message}, headers)
+
+    def _route(self) -> Tuple[str, Optional[str], Optional[str]]:
+        """拆分路径为 (资源, 任务 ID, 子资源)"""
+        parts = [part for part in self.path.split('?')[0].split('/') if part]
+        parts += [None] * (3 - len(parts))
+        return parts[0] or '', parts[1], parts[2]
+
+    def do_GET(self):
+        resource, job_id, sub = self._route()
+        if resource == 'health':
+            self._send_json(200, {'status': 'ok', 'workers': self.manager.workers,
+                                  'max_queued': self.manager.max_queued,
+                                  'active': self.manager.active_count()})
+        elif resource == 'jobs' and job_id is None:
+            self._send_json(200, {'jobs': [job.to_dict(events=False)
+                                           for job in self.manager.list()]})
+        elif resource == 'jobs':
+            job = self.manager.get(job_id)
+            if job is None:
+                self._send_error(404, f"任务不存在: {job_id}")
+            elif sub is None:
+                self._send_json(200, job.to_dict())
+            elif sub == 'stream':
+                self._stream(job)
+            else:
+                self._send_error(404, f"未知的路径: {self.path}")
+        else:
+            self._send_error(404, f"未知的路径: {self.path}")
+
+    def do_POST(self):
+        resource, job_id, _ = self._route()
+        if resource != 'jobs' or job_id is not None:
+            self._send_error(404, f"未知的路径: {self.path}")
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(body, dict) or not isinstance(body.get('video_path'), str):
+                raise ValueError("请求中缺少 video_path")
+            params = body.get('params') or {}
+            if not isinstance(params, dict):
+                raise ValueError("params 应为对象")
+            job = self.manager.submit(body['video_path'], params)
+        except JobRejected as e:
+            self._send_error(503, str(e), {'Retry-After': str(RETRY_AFTER)})
+            return
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+        self._send_json(202, job.to_dict(events=False), {'Location': f"/jobs/{job.id}"})
+
+    def do_DELETE(self):
+        resource, job_id, sub = self._route()
+        if resource != 'jobs' or job_id is None or sub is not None:
+            self._send_error(404, f"未知的路径: {self.path}")
+            return
+        job = self.manager.cancel(job_id)
+        if job is None:
+            self._send_error(404, f"任务不存在: {job_id}")
+        else:
+            self._send_json(200, job.to_dict(events=False))
+
+    def _write_event(self, name: str, data: Dict):
+        payload = json.dumps(data, ensure_ascii=False)
+        self.wfile.write(f"event: {name}\ndata: {payload}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def _stream(self, job):
+        """
+        以 server-sent events 推送任务进度和事件，直到任务结束
+        连接建立时先补发已有的事件；之后新事件立即推送，进度每 PROGRESS_INTERVAL 秒最多推送一次
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        sent = 0
+        last_progress = None
+        try:
+            while True:
+                job.wait(sent, PROGRESS_INTERVAL)
+                events = job.events[sent:]
+                for event in events:
+                    self._write_event('flash', event)
+                sent += len(events)
+
+                progress = job.progress_info()
+                if progress != last_progress:
+                    self._write_event('progress', progress)
+                    last_progress = progress
+                if job.done and sent == len(job.events):
+                    self._write_event('done', job.to_dict(events=False))
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端断开不影响任务本身
+            pass
+
+def create_server(manager: JobManager, host: str = '127.0.0.1',
+                  port: int = 8765) -> ThreadingHTTPServer:
+    """创建绑定到 manager 的 HTTP 服务，port 为 0 时自动选择空闲端口"""
+    handler = type('BoundJobRequestHandler', (JobRequestHandler,), {'manager': manager})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def start_server(manager: JobManager, host: str = '127.0.0.1',
+                 port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    在后台线程中启动服务（图形界面和测试使用）
+    返回: (服务对象, 服务地址)
+    """
+    server = create_server(manager, host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+class ServiceClient:
+    def __init__(self, url: str, timeout: float = 30.0):
+        """
+        检测服务的客户端
+        url: 服务地址，如 http://127.0.0.1:8765
+        """
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, body: Optional[Dict] = None) -> Dict:
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', str(e))
+            except ValueError:
+                message = str(e)
+            raise RuntimeError(message) from None
+
+    def submit(self, video_path: str, params: Optional[Dict] = None) -> Dict:
+        """提交任务，返回任务信息（含 id）"""
+        return self._request('POST', '/jobs', {'video_path': video_path,
+                                               'params': params or {}})
+
+    def job(self, job_id: str) -> Dict:
+        """任务的完整状态"""
+        return self._request('GET', f"/jobs/{job_id}")
+
+    def cancel(self, job_id: str) -> Dict:
+        return self._request('DELETE', f"/jobs/{job_id}")
+
+    def stream(self, job_id: str) -> Iterator[Tuple[str, Dict]]:
+        """读取任务的事件流，产出 (消息类型, 数据)，任务结束后停止"""
+        request = urllib.request.Request(f"{self.url}/jobs/{job_id}/stream")
+        with urllib.request.urlopen(request) as response:
+            name, data = None, []
+            for line in response:
+                line = line.decode('utf-8').rstrip('\r\n')
+                if line.startswith('event:'):
+                    name = line[6:].strip()
+                elif line.startswith('data:'):
+                    data.append(line[5:].strip())
+                elif not line and name is not None:
+                    yield name, json.loads('\n'.join(data))
+                    if name == 'done':
+                        return
+                    name, data = None, []
+
+def run_server(host: str = '127.0.0.1', port: int = 8765, workers: int = 1,
+               max_queued: int = 8, cache=None):
+    """在前台运行检测服务，直到被中断"""
+    manager = JobManager(workers, max_queued, cache)
+    server = create_server(manager, host, port)
+    print(f"检测服务已启动: http://{host}:{server.server_address[1]}")
+    print(f"- 同时运行的任务数: {manager.workers}, 排队上限: {manager.max_queued}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n正在停止检测服务")
+    finally:
+        server.server_close()
+        manager.shutdown()
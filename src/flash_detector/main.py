@@ -1,14 +1,19 @@
 import sys
-from .interface.cli import run_cli
-from .interface.gui import create_gradio_interface
 
 def main():
-    """主程序入口"""
+    """主程序入口，只导入所选模式用到的模块"""
     if len(sys.argv) > 1:
         # 命令行模式
+        from .interface.cli import run_cli
         run_cli()
     else:
         # GUI模式
+        try:
+            from .interface.gui import create_gradio_interface
+        except ImportError as e:
+            print(f"无法启动图形界面: {str(e)}")
+            print("请安装图形界面依赖: pip install flash_detector[gui]")
+            sys.exit(1)
         demo = create_gradio_interface()
         demo.launch()
 
@@ -1,26 +1,30 @@
+import os
 import cv2
 import numpy as np
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 
 def create_diff_map(frame: np.ndarray, position: Tuple[int, int],
                    region_size: int) -> Optional[np.ndarray]:
-    """创建差异热力图"""
+    """创建差异热力图，只在闪光位置周围的区域计算和着色，其余像素为零值的颜色"""
     try:
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        diff_map = np.zeros_like(gray, dtype=np.float32)
-
+        height, width = frame.shape[:2]
         x, y = position
         x1 = max(0, x - region_size)
         y1 = max(0, y - region_size)
-        x2 = min(gray.shape[1], x + region_size)
-        y2 = min(gray.shape[0], y + region_size)
-
-        Y, X = np.ogrid[y1:y2, x1:x2]
-        dist_from_center = ((X - x)**2 + (Y - y)**2) / (region_size**2)
-        diff_map[y1:y2, x1:x2] = np.exp(-dist_from_center) * 255
+        x2 = min(width, x + region_size)
+        y2 = min(height, y + region_size)
 
-        diff_map = diff_map.astype(np.uint8)
-        return cv2.applyColorMap(diff_map, cv2.COLORMAP_JET)
+        # 按行整体填充零值的颜色，比逐像素广播快得多
+        background = cv2.applyColorMap(np.zeros((1, 1), dtype=np.uint8), cv2.COLORMAP_JET)
+        diff_map = np.empty((height, width * 3), dtype=np.uint8)
+        diff_map[:] = np.tile(background.reshape(3), width)
+        diff_map = diff_map.reshape(height, width, 3)
+        if x2 > x1 and y2 > y1:
+            Y, X = np.ogrid[y1:y2, x1:x2]
+            dist_from_center = ((X - x)**2 + (Y - y)**2) / (region_size**2)
+            region = (np.exp(-dist_from_center) * 255).astype(np.float32).astype(np.uint8)
+            diff_map[y1:y2, x1:x2] = cv2.applyColorMap(region, cv2.COLORMAP_JET)
+        return diff_map
 
     except Exception as e:
         print(f"创建差异热力图失败: {str(e)}")
@@ -48,3 +52,20 @@ def create_region_detail(frame: np.ndarray, x: int, y: int,
     except Exception as e:
         print(f"创建区域细节图失败: {str(e)}")
         return None
+
+def save_debug_images(images, directory: str, prefix: str) -> List[str]:
+    """
+    将调试图像写入目录，文件名为 <prefix>_<图像名>.png
+    images: create_debug_images 返回的调试图像，按需绘制的图像在写入时才生成
+    返回: 写入的文件路径列表
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name in ('curr_frame', 'diff_map', 'region_detail'):
+        image = images.get(name)
+        if image is None:
+            continue
+        path = os.path.join(directory, f"{prefix}_{name}.png")
+        if cv2.imwrite(path, image):
+            paths.append(path)
+    return paths
@@ -0,0 +1,87 @@
+import os
+import unittest
+from unittest import mock
+import numpy as np
+import cv2
+from flash_detector.core.backends import (BACKEND_ENV, available_backends, get_backend,
+                                          select_backend)
+from flash_detector.core.detector import FlashDetectorBuffer
+from flash_detector.core.grid import grid_brightness
+from flash_detector.core.mask import RegionMask
+
+class TestBackends(unittest.TestCase):
+    def test_kernels_match(self):
+        """测试各后端的灰度转换和网格亮度与 OpenCV 逐位一致"""
+        rng = np.random.default_rng(3)
+        frame = rng.integers(0, 256, (97, 131, 3), dtype=np.uint8)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        for name in available_backends():
+            backend = get_backend(name)
+            np.testing.assert_array_equal(backend.to_gray(frame), gray)
+            for region_size in (8, 20, 21):
+                np.testing.assert_array_equal(backend.grid_brightness(gray, region_size),
+                                              grid_brightness(gray, region_size))
+            self.assertEqual(backend.grid_brightness(gray[:10, :10], 20).shape, (0, 0))
+
+    def test_grid_brightness_large_frame(self):
+        """测试 4K 全白帧的网格亮度（int32 积分图的上限附近）仍然精确"""
+        gray = np.full((2160, 3840), 255, dtype=np.uint8)
+        self.assertTrue((grid_brightness(gray, 20) == 255).all())
+        gray = np.full((2161, 3841), 255, dtype=np.uint8)
+        self.assertTrue((grid_brightness(gray, 20) == 255).all())
+
+    def test_backends_match_loop(self):
+        """测试各后端的检测结果与逐区域循环的参考实现完全一致，包括量化存储和区域掩码"""
+        for name in available_backends():
+            for history_dtype in ('float32', 'uint8'):
+                rng = np.random.default_rng(11)
+                # 量化存储与 NumPy 后端的量化存储对照
+                reference = (FlashDetectorBuffer(buffer_size=5, region_size=20, diff_threshold=30,
+                                                 engine='loop')
+                             if history_dtype == 'float32' else
+                             FlashDetectorBuffer(buffer_size=5, region_size=20, diff_threshold=30,
+                                                 history_dtype=history_dtype, backend='numpy'))
+                detector = FlashDetectorBuffer(buffer_size=5, region_size=20, diff_threshold=30,
+                                               history_dtype=history_dtype, backend=name)
+                detections = 0
+                for frame_num in range(40):
+                    frame = rng.integers(40, 80, (120, 160, 3), dtype=np.uint8)
+                    if frame_num % 2 == 0:
+                        cx, cy = 30 + (frame_num % 7) * 15, 25 + (frame_num % 5) * 12
+                        cv2.circle(frame, (cx, cy), 12, (255, 255, 255), -1)
+                    expected = reference.process_frame(frame, frame_num)
+                    self.assertEqual(expected, detector.process_frame(frame, frame_num))
+                    if expected:
+                        detections += 1
+                self.assertGreater(detections, 0)
+
+            # 区域掩码下的一维亮度历史
+            rng = np.random.default_rng(12)
+            reference = FlashDetectorBuffer(buffer_size=5, region_size=20, diff_threshold=30,
+                                            backend='numpy')
+            masked = FlashDetectorBuffer(buffer_size=5, region_size=20, diff_threshold=30,
+                                         backend=name)
+            reference.set_mask(RegionMask(exclude=[(0, 0, 40, 40)]).compile(120, 160, 20))
+            masked.set_mask(RegionMask(exclude=[(0, 0, 40, 40)]).compile(120, 160, 20))
+            for frame_num in range(20):
+                frame = rng.integers(40, 80, (120, 160), dtype=np.uint8)
+                if frame_num % 2 == 0:
+                    cv2.circle(frame, (100, 70), 12, 255, -1)
+                self.assertEqual(reference.process_frame(frame, frame_num),
+                                 masked.process_frame(frame, frame_num))
+
+    def test_select_backend(self):
+        """测试按名称和环境变量选择计算后端"""
+        with mock.patch.dict(os.environ, {BACKEND_ENV: 'numpy'}):
+            self.assertEqual(FlashDetectorBuffer().backend.name, 'numpy')
+            self.assertEqual(FlashDetectorBuffer(backend='opencv').backend.name, 'opencv')
+            select_backend('opencv')
+            self.assertEqual(os.environ[BACKEND_ENV], 'opencv')
+        with mock.patch.dict(os.environ, {BACKEND_ENV: 'unknown'}):
+            with self.assertRaises(ValueError):
+                FlashDetectorBuffer()
+        with self.assertRaises(ValueError):
+            select_backend('unknown')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from flash_detector.core import batch
+from flash_detector.core.batch import collect_videos, plan_jobs, run_batch
+from flash_detector.core.detector import scan_flashes
+from .test_scan import write_flash_video
+
+_run_job = batch.run_job
+
+def _crashing_run_job(video_path, probe, params, retries=1):
+    """模拟解码器崩溃：处理 a_short.avi 的工作进程直接退出"""
+    if os.path.basename(video_path) == 'a_short.avi':
+        os._exit(139)
+    return _run_job(video_path, probe, params, retries)
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.short_path = os.path.join(self.tmpdir, 'a_short.avi')
+        self.long_path = os.path.join(self.tmpdir, 'sub', 'b_long.avi')
+        self.corrupt_path = os.path.join(self.tmpdir, 'c_corrupt.avi')
+        os.makedirs(os.path.dirname(self.long_path))
+        write_flash_video(self.short_path, [(10, 22, (80, 60))], num_frames=40)
+        write_flash_video(self.long_path, [(10, 22, (40, 40)), (50, 62, (80, 60))],
+                          num_frames=80)
+        with open(self.corrupt_path, 'wb') as f:
+            f.write(b'not a video' * 100)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_collect_videos(self):
+        """测试目录、通配符和清单文件的展开"""
+        self.assertEqual(collect_videos([self.tmpdir]),
+                         [self.short_path, self.corrupt_path, self.long_path])
+        self.assertEqual(collect_videos([os.path.join(self.tmpdir, '*_short.avi'),
+                                         self.short_path]),
+                         [self.short_path])
+
+        manifest = os.path.join(self.tmpdir, 'videos.txt')
+        with open(manifest, 'w') as f:
+            f.write("# 清单\nsub/b_long.avi\n\na_short.avi\n")
+        self.assertEqual(collect_videos([manifest]), [self.long_path, self.short_path])
+
+    def test_longest_job_first(self):
+        """测试按帧数从多到少排序，无法打开的视频排在最后"""
+        jobs = plan_jobs([self.corrupt_path, self.short_path, self.long_path])
+        self.assertEqual([job['video_path'] for job in jobs],
+                         [self.long_path, self.short_path, self.corrupt_path])
+        self.assertEqual(jobs[0]['probe']['frames'], 80)
+        self.assertIsNone(jobs[2]['probe'])
+
+    def test_batch_jsonl(self):
+        """测试批处理结果与单独扫描一致，损坏的文件被跳过"""
+        output = os.path.join(self.tmpdir, 'results.jsonl')
+        for workers in (1, 2):
+            results = list(run_batch([self.tmpdir], {}, output, workers=workers))
+            with open(output) as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual(len(records), 3)
+
+            by_path = {record['video_path']: record for record in records}
+            self.assertEqual(by_path[self.corrupt_path]['status'], 'skipped')
+            for path in (self.short_path, self.long_path):
+                self.assertEqual(by_path[path]['status'], 'ok')
+                expected = [event['peak_frame'] for event in scan_flashes(path)]
+                self.assertEqual([event['peak_frame'] for event in by_path[path]['events']],
+                                 expected)
+                self.assertTrue(expected)
+            self.assertEqual(sorted(r['video_path'] for r in results), sorted(by_path))
+
+    def test_batch_csv(self):
+        """测试 CSV 输出每个事件一行"""
+        output = os.path.join(self.tmpdir, 'results.csv')
+        results = list(run_batch([self.short_path, self.corrupt_path], {}, output))
+        with open(output, newline='') as f:
+            rows = list(csv.DictReader(f))
+
+        events = sum(len(result['events']) for result in results)
+        self.assertEqual(len(rows), events + 1)
+        self.assertEqual(rows[-1]['status'], 'skipped')
+        self.assertTrue(all(row['x'] for row in rows if row['status'] == 'ok'))
+
+    def test_worker_crash(self):
+        """测试工作进程崩溃只影响它正在处理的视频，其余视频正常完成"""
+        with mock.patch.object(batch, 'run_job', _crashing_run_job):
+            results = list(run_batch([self.tmpdir], {}, workers=2, retries=1))
+        by_path = {result['video_path']: result for result in results}
+        self.assertEqual(len(results), 3)
+        self.assertEqual(by_path[self.short_path]['status'], 'failed')
+        self.assertEqual(by_path[self.short_path]['attempts'], 2)
+        self.assertIn('139', by_path[self.short_path]['error'])
+        self.assertEqual(by_path[self.long_path]['status'], 'ok')
+        self.assertTrue(by_path[self.long_path]['events'])
+        self.assertEqual(by_path[self.corrupt_path]['status'], 'skipped')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import copy
+import unittest
+import numpy as np
+from flash_detector.benchmark.runner import bench_backends, compare_to_baseline, run_benchmarks
+from flash_detector.benchmark.synthetic import default_flashes, synthetic_frames
+
+class TestBenchmark(unittest.TestCase):
+    def test_synthetic_deterministic(self):
+        """测试相同参数和种子生成完全相同的帧，闪光按频率亮暗交替"""
+        first = list(synthetic_frames((160, 120), num_frames=30, seed=1))
+        second = list(synthetic_frames((160, 120), num_frames=30, seed=1))
+        self.assertEqual(len(first), 30)
+        for a, b in zip(first, second):
+            np.testing.assert_array_equal(a, b)
+
+        flash = default_flashes((160, 120), 30)[0]
+        x, y = flash['position']
+        start = flash['start_frame']
+        self.assertEqual(first[start][y, x, 0], 255)
+        self.assertLess(first[start + 1][y, x, 0], 255)
+        self.assertLess(first[start - 1][y, x, 0], 255)
+
+    def test_run_and_compare(self):
+        """测试基准测试检出全部注入的闪光，并能发现吞吐回归"""
+        results = run_benchmarks(resolutions=[(160, 120)], region_sizes=[8],
+                                 frame_steps=[1], num_frames=40)
+        metrics = results['results']['160x120/r8/s1']
+        self.assertEqual(metrics['scan_flashes']['found'], metrics['scan_flashes']['expected'])
+        self.assertEqual(metrics['process_frame']['frames'], 40)
+        self.assertGreater(metrics['process_frame']['peak_memory_mb'], 0)
+        self.assertIsNotNone(metrics['detect_flash']['first_flash_frame'])
+        self.assertEqual(compare_to_baseline(results, results), [])
+
+        slower = copy.deepcopy(results)
+        slower['results']['160x120/r8/s1']['process_frame']['fps'] /= 2
+        regressions = compare_to_baseline(slower, results)
+        self.assertEqual([item['metric'] for item in regressions], ['process_frame.fps'])
+
+    def test_bench_backends(self):
+        """测试计算后端比较：各后端结果一致，并给出最快的后端"""
+        results = bench_backends(resolutions=[(160, 120)], region_sizes=[8], num_frames=20)
+        backends = results['results']['160x120/r8']
+        self.assertIn('opencv', backends)
+        self.assertTrue(all(metrics['matches'] for metrics in backends.values()))
+        self.assertIn(results['fastest']['160x120/r8'], backends)
+
+if __name__ == '__main__':
+    unittest.main()
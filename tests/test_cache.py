@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from flash_detector.core.cache import ResultCache, normalize_params, scan_flashes_cached
+from flash_detector.core.detector import scan_flashes
+from .test_scan import write_flash_video
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        write_flash_video(self.video_path, [(10, 22, (80, 60)), (40, 52, (40, 40))])
+        self.cache = ResultCache(os.path.join(self.tmpdir, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_normalize_params(self):
+        """测试等价参数得到相同的缓存键，不影响结果的参数不参与缓存键"""
+        self.assertEqual(normalize_params({'region_size': 20.0, 'start_time': '0:00'}),
+                         normalize_params({'merge_gap': 5, 'gate': True, 'prefetch': 8}))
+        self.assertNotEqual(self.cache.key(self.video_path, {'abs_threshold': 20}),
+                            self.cache.key(self.video_path, {'abs_threshold': 25}))
+
+    def test_hit_returns_same_events(self):
+        """测试命中时返回与重新扫描相同的事件，并重新生成调试图像"""
+        expected = list(scan_flashes(self.video_path))
+        stats = {}
+        first = list(scan_flashes_cached(self.video_path, self.cache, stats=stats))
+        self.assertFalse(stats['cache_hit'])
+        self.assertEqual(first, expected)
+
+        stats = {}
+        second = list(scan_flashes_cached(self.video_path, self.cache, stats=stats,
+                                          debug_images=True))
+        self.assertTrue(stats['cache_hit'])
+        for event in second:
+            self.assertIn('curr_frame', event.pop('debug_images'))
+        self.assertEqual(second, expected)
+
+        cache_stats = self.cache.stats()
+        self.assertEqual((cache_stats['hits'], cache_stats['misses']), (1, 1))
+        self.assertEqual(cache_stats['entries'], 1)
+
+        self.assertEqual(self.cache.clear(), 1)
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最久未使用的条目"""
+        events = list(scan_flashes(self.video_path))
+        self.cache.put('a', events)
+        self.cache.max_bytes = os.path.getsize(os.path.join(self.cache.cache_dir, 'a.json')) * 2
+        time.sleep(0.01)
+        self.cache.put('b', events)
+        time.sleep(0.01)
+        self.assertIsNotNone(self.cache.get('a'))
+        time.sleep(0.01)
+        self.cache.put('c', events)
+
+        self.assertIsNotNone(self.cache.get('a'))
+        self.assertIsNone(self.cache.get('b'))
+        self.assertIsNotNone(self.cache.get('c'))
+
+    def test_concurrent_record(self):
+        """测试多个线程共用缓存目录时不丢失命中/未命中计数"""
+        caches = [ResultCache(self.cache.cache_dir) for _ in range(4)]
+        threads = [threading.Thread(target=lambda c=cache: [c._record('misses') for _ in range(25)])
+                   for cache in caches]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.stats()['misses'], 100)
+        self.assertEqual([name for name in os.listdir(self.cache.cache_dir)
+                          if name.endswith('.tmp')], [])
+
+    def test_hit_low_memory_debug_images(self):
+        """测试低内存模式命中时与未命中时一样只生成闪光位置周围的调试图像"""
+        first = list(scan_flashes_cached(self.video_path, self.cache, debug_images=True,
+                                         low_memory='uint8'))
+        second = list(scan_flashes_cached(self.video_path, self.cache, debug_images=True,
+                                          low_memory='uint8'))
+        self.assertEqual(len(first), len(second))
+        for miss, hit in zip(first, second):
+            self.assertEqual(hit['debug_images']['roi'], miss['debug_images']['roi'])
+            self.assertEqual(hit['debug_images']['curr_frame'].shape,
+                             miss['debug_images']['curr_frame'].shape)
+
+if __name__ == '__main__':
+    unittest.main()
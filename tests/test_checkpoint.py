@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import cv2
+from flash_detector.core.detector import FlashDetectorBuffer, scan_flashes
+from .test_scan import write_flash_video
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        self.checkpoint = os.path.join(self.tmpdir, 'scan.checkpoint.npz')
+        write_flash_video(self.video_path, [
+            (8, 20, (80, 60)),
+            (40, 52, (40, 40)),
+            (70, 84, (120, 80)),
+        ], num_frames=100)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_detector_state_roundtrip(self):
+        """测试检测器状态导出后在新的检测器中恢复，结果与未中断时一致"""
+        for options in ({}, {'gate': True}, {'hierarchical': True, 'tile_size': 2},
+                        {'engine': 'loop'}):
+            rng = np.random.default_rng(5)
+            frames = []
+            for frame_num in range(60):
+                frame = rng.integers(40, 80, (120, 160), dtype=np.uint8)
+                if frame_num % 2 == 0 and not 25 <= frame_num < 35:
+                    cv2.circle(frame, (30 + frame_num * 2, 60), 12, 255, -1)
+                frames.append(frame)
+
+            reference = FlashDetectorBuffer(buffer_size=5, region_size=20,
+                                            diff_threshold=30, **options)
+            expected = [reference.process_frame(f, n) for n, f in enumerate(frames)]
+
+            for split in (3, 12, 29, 40):
+                first = FlashDetectorBuffer(buffer_size=5, region_size=20,
+                                            diff_threshold=30, **options)
+                actual = [first.process_frame(f, n) for n, f in enumerate(frames[:split])]
+                second = FlashDetectorBuffer(buffer_size=5, region_size=20,
+                                             diff_threshold=30, **options)
+                second.set_state(first.get_state())
+                actual += [second.process_frame(f, n + split)
+                           for n, f in enumerate(frames[split:])]
+                self.assertEqual(actual, expected)
+            self.assertTrue(any(expected))
+
+    def test_resume_matches_uninterrupted(self):
+        """测试扫描中断后从检查点恢复，产出的事件与未中断的扫描一致"""
+        for frame_step, options in ((1, {}), (3, {}), (1, {'hierarchical': True})):
+            expected = list(scan_flashes(self.video_path, frame_step=frame_step, **options))
+            self.assertTrue(expected)
+
+            # 模拟在第一个事件之后被终止
+            events = scan_flashes(self.video_path, frame_step=frame_step,
+                                  checkpoint=self.checkpoint, checkpoint_interval=7,
+                                  stats={}, **options)
+            next(events)
+            events.close()
+            with np.load(self.checkpoint) as data:
+                self.assertIn('"next_frame": ', str(data['metadata']))
+                self.assertIn('state_history', data.files)
+
+            stats = {}
+            resumed = list(scan_flashes(self.video_path, frame_step=frame_step,
+                                        checkpoint=self.checkpoint, checkpoint_interval=7,
+                                        resume=True, stats=stats, **options))
+            self.assertEqual(resumed, expected)
+            # 恢复后只读取检查点之后的帧，统计中包含中断前保存的帧数
+            self.assertEqual(stats['analyzed_frames'], len(range(0, 100, frame_step)))
+            self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resume_rejects_other_parameters(self):
+        """测试检查点与当前参数不一致时拒绝恢复"""
+        events = scan_flashes(self.video_path, checkpoint=self.checkpoint,
+                              checkpoint_interval=5)
+        next(events)
+        events.close()
+        with self.assertRaises(ValueError):
+            list(scan_flashes(self.video_path, abs_threshold=25,
+                              checkpoint=self.checkpoint, resume=True))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,8 @@ import unittest
 import numpy as np
 import cv2
 from flash_detector.core.detector import FlashDetectorBuffer
+from flash_detector.core.grid import (grid_brightness, grid_brightness_banded,
+                                      grid_brightness_window, grid_shape)
 
 class TestFlashDetector(unittest.TestCase):
     def setUp(self):
@@ -17,8 +19,9 @@ class TestFlashDetector(unittest.TestCase):
         self.assertEqual(self.detector.buffer_size, 5)
         self.assertEqual(self.detector.region_size, 20)
         self.assertEqual(self.detector.diff_threshold, 30)
-        self.assertEqual(len(self.detector.frame_buffer), 0)
-        self.assertEqual(len(self.detector.brightness_cache), 0)
+        self.assertIsNone(self.detector.frame_buffer)
+        self.assertIsNone(self.detector.history)
+        self.assertEqual(self.detector.frames_seen, 0)
 
     def test_calculate_region_brightness(self):
         """测试区域亮度计算"""
@@ -31,10 +34,154 @@ class TestFlashDetector(unittest.TestCase):
         """测试缓存清理"""
         # 添加一些测试数据
         test_frame = np.ones((100, 100), dtype=np.uint8)
-        self.detector.process_frame(test_frame, 0)
+        for frame_num in range(self.detector.buffer_size):
+            self.detector.process_frame(test_frame, frame_num)
+        self.assertEqual(self.detector.history.shape, (5, 8, 8))
         self.detector.clear_cache()
-        self.assertEqual(len(self.detector.frame_buffer), 0)
-        self.assertEqual(len(self.detector.brightness_cache), 0)
+        self.assertIsNone(self.detector.history)
+        self.assertEqual(self.detector.history_len, 0)
+        self.assertEqual(self.detector.frames_seen, 0)
+
+    def test_keep_frames(self):
+        """测试可选的帧缓冲区"""
+        detector = FlashDetectorBuffer(buffer_size=3, keep_frames=True)
+        test_frame = np.ones((100, 100), dtype=np.uint8)
+        for frame_num in range(5):
+            detector.process_frame(test_frame, frame_num)
+        self.assertEqual(len(detector.frame_buffer), 3)
+        detector.clear_cache()
+        self.assertEqual(len(detector.frame_buffer), 0)
+
+    def test_grid_brightness_matches_region_mean(self):
+        """测试积分图网格亮度与逐区域均值一致"""
+        rng = np.random.default_rng(0)
+        test_frame = rng.integers(0, 256, (97, 131), dtype=np.uint8)
+        brightness = grid_brightness(test_frame, 20)
+        self.assertEqual(brightness.shape, grid_shape(97, 131, 20))
+        for i in range(brightness.shape[0]):
+            for j in range(brightness.shape[1]):
+                expected = self.detector._calculate_region_brightness(
+                    test_frame, j * 10, i * 10)
+                self.assertEqual(brightness[i, j], expected)
+
+    def test_vectorized_engine_matches_loop(self):
+        """测试向量化引擎与逐区域循环的检测结果完全一致"""
+        for buffer_size in (4, 5, 8):
+            rng = np.random.default_rng(buffer_size)
+            loop = FlashDetectorBuffer(buffer_size=buffer_size, region_size=20,
+                                       diff_threshold=30, engine='loop')
+            vectorized = FlashDetectorBuffer(buffer_size=buffer_size, region_size=20,
+                                             diff_threshold=30, engine='vectorized')
+
+            detections = 0
+            for frame_num in range(40):
+                frame = rng.integers(40, 80, (120, 160, 3), dtype=np.uint8)
+                # 在不同位置注入明暗交替的闪光
+                if frame_num % 2 == 0:
+                    cx, cy = 30 + (frame_num % 7) * 15, 25 + (frame_num % 5) * 12
+                    cv2.circle(frame, (cx, cy), 12, (255, 255, 255), -1)
+
+                expected = loop.process_frame(frame, frame_num)
+                actual = vectorized.process_frame(frame, frame_num)
+                self.assertEqual(expected, actual)
+                if expected:
+                    detections += 1
+
+            self.assertGreater(detections, 0)
+
+    def test_gate_matches_ungated(self):
+        """测试变化门限跳过静态帧且检测结果不变"""
+        rng = np.random.default_rng(7)
+        plain = FlashDetectorBuffer(buffer_size=5, region_size=20, diff_threshold=30)
+        gated = FlashDetectorBuffer(buffer_size=5, region_size=20, diff_threshold=30,
+                                    gate=True)
+
+        background = rng.integers(40, 80, (120, 160, 3), dtype=np.uint8)
+        detections = 0
+        for frame_num in range(80):
+            frame = background.copy()
+            # 静态画面中穿插两段闪烁
+            if 20 <= frame_num < 30 or 55 <= frame_num < 62:
+                if frame_num % 2 == 0:
+                    cv2.circle(frame, (40 + frame_num, 60), 12, (255, 255, 255), -1)
+
+            expected = plain.process_frame(frame, frame_num)
+            self.assertEqual(expected, gated.process_frame(frame, frame_num))
+            if expected:
+                detections += 1
+
+        self.assertGreater(detections, 0)
+        summary = gated.gate_summary()
+        self.assertGreater(summary['gate_skipped'], 0)
+        self.assertIn('gate_saved', summary)
+
+    def test_grid_brightness_window(self):
+        """测试局部网格亮度与整帧网格亮度的对应部分一致"""
+        rng = np.random.default_rng(3)
+        test_frame = rng.integers(0, 256, (97, 131), dtype=np.uint8)
+        brightness = grid_brightness(test_frame, 20)
+        grid_h, grid_w = brightness.shape
+        for y0, y1, x0, x1 in ((0, 2, 0, 3), (3, grid_h, 5, grid_w), (0, grid_h, 0, grid_w)):
+            np.testing.assert_array_equal(
+                grid_brightness_window(test_frame, 20, y0, y1, x0, x1),
+                brightness[y0:y1, x0:x1])
+
+    def test_hierarchical_matches_flat(self):
+        """测试分层定位与整帧扫描的检测结果完全一致"""
+        for tile_size in (1, 3, 8):
+            rng = np.random.default_rng(tile_size)
+            flat = FlashDetectorBuffer(buffer_size=5, region_size=20, diff_threshold=30)
+            hierarchical = FlashDetectorBuffer(buffer_size=5, region_size=20, diff_threshold=30,
+                                               hierarchical=True, tile_size=tile_size)
+
+            detections = 0
+            for frame_num in range(90):
+                frame = rng.integers(40, 80, (120, 160, 3), dtype=np.uint8)
+                # 闪光在画面中移动并跨越分块边界，中间有一段静止
+                if frame_num % 2 == 0 and not 40 <= frame_num < 55:
+                    cx, cy = 20 + (frame_num * 7) % 120, 20 + (frame_num * 5) % 80
+                    cv2.circle(frame, (cx, cy), 12, (255, 255, 255), -1)
+
+                expected = flat.process_frame(frame, frame_num)
+                actual = hierarchical.process_frame(frame, frame_num)
+                self.assertEqual(expected, actual)
+                if expected:
+                    detections += 1
+                    # 位置为 Python int，事件可以直接序列化为 JSON
+                    self.assertEqual([type(v) for v in actual['position']], [int, int])
+
+            self.assertGreater(detections, 0)
+
+    def test_low_memory_history(self):
+        """测试量化存储的亮度历史：整数亮度下与 float32 存储结果一致，常驻内存更小"""
+        rng = np.random.default_rng(5)
+        plain = FlashDetectorBuffer(buffer_size=8, region_size=20, diff_threshold=30)
+        compact = {dtype: FlashDetectorBuffer(buffer_size=8, region_size=20, diff_threshold=30,
+                                              history_dtype=dtype, band_rows=2)
+                   for dtype in ('float16', 'uint8')}
+        detections = 0
+        for frame_num in range(40):
+            frame = rng.integers(40, 80, (120, 160), dtype=np.uint8)
+            if frame_num % 2 == 0:
+                cv2.circle(frame, (30 + frame_num * 2, 60), 12, 255, -1)
+            brightness = np.rint(grid_brightness(frame, 20))
+            np.testing.assert_array_equal(grid_brightness_banded(frame, 20, 2),
+                                          grid_brightness(frame, 20))
+
+            expected = plain.process_brightness(brightness, frame_num)
+            for detector in compact.values():
+                self.assertEqual(expected, detector.process_brightness(brightness, frame_num))
+            if expected:
+                detections += 1
+
+        self.assertGreater(detections, 0)
+        self.assertLess(compact['uint8'].memory_bytes(), compact['float16'].memory_bytes())
+        self.assertLess(compact['float16'].memory_bytes(), plain.memory_bytes() / 2)
+
+    def test_unknown_engine(self):
+        """测试未知计算引擎"""
+        with self.assertRaises(ValueError):
+            FlashDetectorBuffer(engine='unknown')
 
 if __name__ == '__main__':
     unittest.main()
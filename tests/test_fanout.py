@@ -0,0 +1,70 @@
+import os
+import shutil
+import signal
+import tempfile
+import unittest
+from unittest import mock
+from flash_detector.core import fanout
+from flash_detector.core.detector import scan_flashes
+from flash_detector.core.fanout import plan_bands, scan_flashes_shared
+from flash_detector.core.grid import grid_shape
+from .test_scan import write_flash_video
+
+_band_worker = fanout._band_worker
+
+def _killed_band_worker(index, *args):
+    """第二个条带分析进程启动后立即被杀死，模拟 OOM 或段错误"""
+    if index == 1:
+        os.kill(os.getpid(), signal.SIGKILL)
+    _band_worker(index, *args)
+
+class TestSharedFanout(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        # 闪光分布在画面上、中、下部，跨越条带边界
+        write_flash_video(self.video_path, [
+            (4, 14, (40, 20)),
+            (18, 30, (100, 60)),
+            (34, 46, (60, 62)),
+            (48, 58, (120, 100)),
+        ], num_frames=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_plan_bands(self):
+        """测试条带覆盖全部网格行，像素范围恰好重叠跨边界的一行区域"""
+        grid_h, _ = grid_shape(120, 160, 20)
+        for bands in (1, 2, 3, 20):
+            plan = plan_bands(120, 20, bands)
+            self.assertEqual(len(plan), min(bands, grid_h))
+            self.assertEqual(plan[0][0], 0)
+            self.assertEqual(plan[-1][1], grid_h)
+            self.assertLessEqual(plan[-1][3], 121)
+            for upper, lower in zip(plan, plan[1:]):
+                self.assertEqual(upper[1], lower[0])
+                self.assertEqual(upper[3] - lower[2], 20 - 10 + 1)
+
+    def test_shared_matches_serial(self):
+        """测试共享内存分发扫描与串行扫描结果一致，并输出各阶段吞吐"""
+        serial = list(scan_flashes(self.video_path, circularity_threshold=0.3))
+        self.assertGreater(len(serial), 0)
+        for bands in (2, 3):
+            stats = {}
+            shared = list(scan_flashes_shared(self.video_path, circularity_threshold=0.3,
+                                              bands=bands, slots=4, stats=stats))
+            self.assertEqual(serial, shared)
+            self.assertEqual(stats['analyzed_frames'], 60)
+            self.assertEqual(len(stats['band_fps']), bands)
+            self.assertGreater(stats['decode_fps'], 0)
+            self.assertGreater(stats['merge_fps'], 0)
+
+    def test_dead_band_raises(self):
+        """测试条带分析进程被杀死时扫描报错退出，而不是一直等待"""
+        with mock.patch.object(fanout, '_band_worker', _killed_band_worker):
+            with self.assertRaisesRegex(RuntimeError, '条带 1'):
+                list(scan_flashes_shared(self.video_path, bands=2, slots=4))
+
+if __name__ == '__main__':
+    unittest.main()
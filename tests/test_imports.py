@@ -0,0 +1,46 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# 命令行入口的导入用时上限（秒），主要是 numpy 和 cv2，留足余量避免在慢机器上误报
+CLI_IMPORT_SECONDS = 5.0
+
+def import_in_subprocess(module):
+    """在新的解释器中导入模块，返回导入用时（秒）和已加载的模块名"""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(json.dumps({'seconds': time.perf_counter() - start, "
+        "'modules': sorted(sys.modules)}))\n"
+    )
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [SRC_DIR, env.get('PYTHONPATH')]))
+    output = subprocess.run([sys.executable, '-c', code], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+class TestImports(unittest.TestCase):
+    def test_cli_does_not_load_gui(self):
+        """测试命令行入口不导入 gradio、psutil 和只在特定模式下使用的模块，并测量导入用时"""
+        for module in ('flash_detector.main', 'flash_detector.interface.cli'):
+            result = import_in_subprocess(module)
+            loaded = set(result['modules'])
+            for name in ('gradio', 'psutil', 'flash_detector.interface.gui',
+                         'concurrent.futures.process', 'flash_detector.core.batch',
+                         'flash_detector.core.parallel', 'flash_detector.core.live'):
+                self.assertNotIn(name, loaded, f"{module} 导入了 {name}")
+            self.assertLess(result['seconds'], CLI_IMPORT_SECONDS)
+
+    def test_core_import(self):
+        """测试核心检测模块不依赖界面模块"""
+        result = import_in_subprocess('flash_detector.core.detector')
+        self.assertFalse([name for name in result['modules']
+                          if name.startswith('flash_detector.interface')])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from flash_detector.core.detector import scan_flashes
+from flash_detector.core.index import build_index, load_index, scan_index
+from .test_scan import write_flash_video
+
+class TestBrightnessIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.index_dir = os.path.join(self.tmpdir, 'index')
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        write_flash_video(self.video_path, [(10, 22, (80, 60)), (40, 52, (40, 40))])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_build_and_load(self):
+        """测试建立并读取索引"""
+        self.assertIsNone(load_index(self.video_path, 20, self.index_dir))
+        build_index(self.video_path, 20, self.index_dir)
+        brightness, metadata, _ = load_index(self.video_path, 20, self.index_dir)
+        self.assertEqual(brightness.shape, (60, 10, 14))
+        self.assertEqual(brightness.dtype, np.float32)
+        self.assertEqual(metadata['frame_count'], 60)
+        self.assertEqual(metadata['grid_step'], 10)
+        self.assertIsNone(load_index(self.video_path, 30, self.index_dir))
+
+    def test_index_scan_matches_direct_scan(self):
+        """测试基于索引的扫描与直接扫描结果一致"""
+        for abs_threshold, frame_step in ((20, 1), (150, 1), (20, 3)):
+            expected = list(scan_flashes(self.video_path, abs_threshold=abs_threshold,
+                                         frame_step=frame_step,
+                                         circularity_threshold=0.3))
+            actual = list(scan_index(self.video_path, abs_threshold=abs_threshold,
+                                     frame_step=frame_step, circularity_threshold=0.3,
+                                     index_dir=self.index_dir))
+            self.assertEqual(expected, actual)
+
+    def test_rescan_without_decoding(self):
+        """测试更换阈值重新分析时不再解码视频"""
+        list(scan_index(self.video_path, circularity_threshold=0.3,
+                        index_dir=self.index_dir))
+
+        stats = {}
+        events = list(scan_index(self.video_path, abs_threshold=100,
+                                 circularity_threshold=0.5,
+                                 index_dir=self.index_dir, stats=stats))
+        self.assertGreater(len(events), 0)
+        self.assertEqual(stats['decoded_frames'], 0)
+        self.assertEqual(stats['analyzed_frames'], 60)
+
+if __name__ == '__main__':
+    unittest.main()
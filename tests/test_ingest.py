@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from flash_detector.core.detector import scan_flashes
+from flash_detector.core.ingest import analysis_size, resize_gray, scaled_region_size
+from .test_scan import write_flash_video
+
+class TestIngest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        write_flash_video(self.video_path, [(10, 22, (160, 120)), (40, 52, (80, 80))],
+                          size=(320, 240))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_sizes(self):
+        """测试分析分辨率换算"""
+        self.assertEqual(analysis_size(3840, 2160, 0.25), (960, 540))
+        self.assertEqual(scaled_region_size(20, 0.25), 5)
+        self.assertEqual(scaled_region_size(20, 0.05), 2)
+        gray = np.zeros((240, 320), dtype=np.uint8)
+        self.assertIs(resize_gray(gray, (320, 240)), gray)
+        self.assertEqual(resize_gray(gray, (160, 120)).shape, (120, 160))
+
+    def assert_events_near(self, events, expected, tolerance):
+        self.assertEqual(len(events), len(expected))
+        for event, (x, y) in zip(events, expected):
+            self.assertLessEqual(abs(event['position'][0] - x), tolerance)
+            self.assertLessEqual(abs(event['position'][1] - y), tolerance)
+
+    def test_reduced_resolution(self):
+        """测试降低分析分辨率后位置仍以源帧像素报告"""
+        events = list(scan_flashes(self.video_path, region_size=40,
+                                   circularity_threshold=0.3, analysis_scale=0.5,
+                                   debug_images=True))
+        self.assert_events_near(events, [(160, 120), (80, 80)], 20)
+        self.assertEqual(events[0]['debug_images']['curr_frame'].shape, (240, 320, 3))
+
+    @unittest.skipIf(shutil.which('ffmpeg') is None, "需要 ffmpeg")
+    def test_ffmpeg_luma_ingest(self):
+        """测试 ffmpeg 亮度通道读取模式"""
+        stats = {}
+        events = list(scan_flashes(self.video_path, region_size=40,
+                                   circularity_threshold=0.3, analysis_scale=0.5,
+                                   ingest='ffmpeg', debug_images=True, stats=stats))
+        self.assert_events_near(events, [(160, 120), (80, 80)], 20)
+        self.assertEqual(stats['analyzed_frames'], 60)
+        self.assertEqual(events[0]['debug_images']['curr_frame'].shape, (240, 320, 3))
+
+if __name__ == '__main__':
+    unittest.main()
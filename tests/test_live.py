@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from flash_detector.core import live
+from flash_detector.core.detector import scan_flashes
+from flash_detector.core.live import latency_percentiles, watch_stream
+from .test_scan import write_flash_video
+
+class TestLive(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        write_flash_video(self.video_path, [(10, 22, (80, 60)), (40, 52, (40, 40))])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_latency_percentiles(self):
+        """测试延迟分位数（毫秒）"""
+        percentiles = latency_percentiles([i / 1000 for i in range(1, 101)])
+        self.assertAlmostEqual(percentiles['p50'], 50.5)
+        self.assertAlmostEqual(percentiles['max'], 100.0)
+        self.assertEqual(latency_percentiles([])['p99'], 0.0)
+
+    def test_alerts_match_scan(self):
+        """测试不丢帧时每个事件在开始的帧产生一次告警"""
+        stats = {}
+        alerts = list(watch_stream(self.video_path, latency_budget=60.0, realtime=False,
+                                   stats=stats))
+        events = list(scan_flashes(self.video_path))
+        self.assertEqual([alert['frame_num'] for alert in alerts],
+                         [event['start_frame'] for event in events])
+        self.assertEqual(stats['received'], 60)
+        self.assertEqual(stats['analyzed'], 60)
+        self.assertEqual(stats['dropped'], 0)
+        self.assertEqual(len(stats['latencies']), 60)
+
+    def test_over_budget(self):
+        """测试超出延迟预算的帧被丢弃并记录，降采样策略逐级降低分辨率"""
+        stats = {}
+        list(watch_stream(self.video_path, latency_budget=-1.0, realtime=False, stats=stats))
+        self.assertEqual(stats['dropped'], 60)
+        self.assertEqual(stats['analyzed'], 0)
+
+        stats = {}
+        list(watch_stream(self.video_path, latency_budget=-1.0, policy='downsample',
+                          realtime=False, stats=stats))
+        self.assertEqual([scale for _, scale in stats['scale_changes']], [0.5, 0.25])
+
+    def test_latency_window(self):
+        """测试延迟记录只保留最近的分析帧，内存占用有界"""
+        stats = {}
+        with mock.patch.object(live, 'LATENCY_WINDOW', 16):
+            list(watch_stream(self.video_path, latency_budget=60.0, realtime=False,
+                              stats=stats))
+        self.assertEqual(stats['analyzed'], 60)
+        self.assertEqual(len(stats['latencies']), 16)
+        self.assertGreater(latency_percentiles(stats['latencies'])['max'], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
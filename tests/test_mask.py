@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import cv2
+from flash_detector.core.detector import scan_flashes
+from flash_detector.core.grid import grid_brightness
+from flash_detector.core.mask import (RegionMask, detect_letterbox, letterbox_exclusions,
+                                      parse_shape)
+from .test_scan import write_flash_video
+
+class TestRegionMask(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_parse_shape(self):
+        """测试解析矩形和多边形"""
+        self.assertEqual(parse_shape("10,20,30,40"), (10, 20, 30, 40))
+        self.assertEqual(parse_shape("0,0;10,0;5,8"), [(0, 0), (10, 0), (5, 8)])
+        for text in ("1,2,3", "0,0;1,1", "1,2,0,4", "a,b,c,d"):
+            with self.assertRaises(ValueError):
+                parse_shape(text)
+
+    def test_active_cells(self):
+        """测试只有完全落在允许范围内的区域为活跃区域，活跃区域的亮度与整帧网格逐位一致"""
+        gray = np.random.default_rng(0).integers(0, 256, (240, 320), dtype=np.uint8)
+        cells = RegionMask(exclude=[(0, 200, 320, 40)]).compile(240, 320, 20)
+        # 区域 y 起点为 grid_y * 10，y + 20 <= 200 时不与排除区域重叠
+        self.assertTrue(cells.active[:19].all())
+        self.assertFalse(cells.active[19:].any())
+
+        mask = RegionMask(include=[[(20, 20), (300, 40), (160, 220)]],
+                          exclude=["200,50,60,60"])
+        cells = mask.compile(240, 320, 20)
+        self.assertGreater(cells.size, 0)
+        self.assertLess(cells.coverage, 0.5)
+        np.testing.assert_array_equal(cells.brightness(gray),
+                                      grid_brightness(gray, 20)[cells.active])
+
+        # 掩码图像与源帧尺寸不同、分析分辨率减半时按比例缩放
+        image = np.zeros((120, 160), dtype=np.uint8)
+        image[:, :80] = 255
+        cells = RegionMask(mask_image=image).compile(120, 160, 20, source_size=(320, 240))
+        self.assertTrue(cells.active[:, :7].all())
+        self.assertFalse(cells.active[:, 7:].any())
+
+    def test_scan_excludes_region(self):
+        """测试排除区域中的闪光不再报告，其余事件与不设掩码时一致"""
+        video_path = os.path.join(self.tmpdir, 'flash.avi')
+        write_flash_video(video_path, [(4, 14, (40, 40)), (30, 40, (120, 80))])
+        expected = list(scan_flashes(video_path, circularity_threshold=0.3))
+        self.assertEqual(len(expected), 2)
+
+        stats = {}
+        events = list(scan_flashes(video_path, circularity_threshold=0.3, stats=stats,
+                                   mask=RegionMask(exclude=[(90, 50, 70, 70)])))
+        self.assertEqual(events, expected[:1])
+        self.assertLess(stats['active_cells'], stats['total_cells'])
+
+    def test_detect_letterbox(self):
+        """测试从视频开头检测上下黑边"""
+        video_path = os.path.join(self.tmpdir, 'letterbox.avi')
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (160, 120))
+        for _ in range(30):
+            frame = np.zeros((120, 160, 3), dtype=np.uint8)
+            frame[20:100] = 90
+            writer.write(frame)
+        writer.release()
+
+        x, y, w, h = detect_letterbox(video_path, seconds=0.5)
+        self.assertEqual((x, w), (0, 160))
+        self.assertAlmostEqual(y, 20, delta=2)
+        self.assertAlmostEqual(y + h, 100, delta=2)
+        self.assertEqual(letterbox_exclusions((0, 20, 160, 80), 160, 120),
+                         [(0, 0, 160, 20), (0, 100, 160, 20)])
+
+if __name__ == '__main__':
+    unittest.main()
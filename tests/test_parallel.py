@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+import unittest
+from flash_detector.core.detector import scan_flashes
+from flash_detector.core.parallel import plan_segments, scan_flashes_parallel
+from .test_scan import write_flash_video
+
+class TestParallelScan(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        # 闪光跨越 0.5 秒（15 帧）的分段边界
+        write_flash_video(self.video_path, [
+            (8, 20, (80, 60)),
+            (26, 40, (40, 40)),
+            (55, 75, (120, 80)),
+        ], num_frames=100)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_plan_segments(self):
+        """测试分段边界与帧步长对齐"""
+        self.assertEqual(plan_segments(0, 100, 40), [(0, 40), (40, 80), (80, None)])
+        self.assertEqual(plan_segments(3, 30, 10, frame_step=3),
+                         [(3, 12), (12, 21), (21, None)])
+        self.assertEqual(plan_segments(0, 10, 40), [(0, None)])
+
+    def test_parallel_matches_serial(self):
+        """测试并行分段扫描与串行扫描结果一致"""
+        for frame_step in (1, 3):
+            serial = list(scan_flashes(self.video_path, frame_step=frame_step,
+                                       circularity_threshold=0.3))
+            parallel = list(scan_flashes_parallel(self.video_path, frame_step=frame_step,
+                                                  circularity_threshold=0.3,
+                                                  workers=2, segment_seconds=0.5))
+            self.assertGreater(len(serial), 0)
+            self.assertEqual(serial, parallel)
+
+    def test_parallel_debug_images(self):
+        """测试并行扫描重新读取峰值帧生成调试图像"""
+        events = list(scan_flashes_parallel(self.video_path, circularity_threshold=0.3,
+                                            workers=2, segment_seconds=0.5,
+                                            debug_images=True))
+        self.assertEqual(events[0]['debug_images']['curr_frame'].shape, (120, 160, 3))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from flash_detector.core.detector import scan_flashes
+from flash_detector.core.pipeline import FramePrefetcher
+from .test_scan import write_flash_video
+
+class TestFramePrefetcher(unittest.TestCase):
+    def test_prefetch_order_and_gray(self):
+        """测试预取保持帧序并输出灰度图"""
+        frames = ((i, np.full((4, 4, 3), i, dtype=np.uint8)) for i in range(20))
+        stats = {}
+        items = list(FramePrefetcher(frames, queue_size=2, stats=stats))
+        self.assertEqual([item[0] for item in items], list(range(20)))
+        self.assertEqual(items[5][2].shape, (4, 4))
+        self.assertIn('decode_wait', stats)
+        self.assertIn('analysis_wait', stats)
+
+    def test_error_propagation(self):
+        """测试解码线程中的异常在分析线程重新抛出"""
+        def frames():
+            yield 0, np.zeros((4, 4), dtype=np.uint8)
+            raise IOError("decode failed")
+
+        with self.assertRaises(IOError):
+            list(FramePrefetcher(frames(), queue_size=2))
+
+    def test_early_exit_stops_thread(self):
+        """测试分析阶段提前退出时解码线程随之结束"""
+        frames = ((i, np.zeros((4, 4), dtype=np.uint8)) for i in range(1000))
+        prefetcher = FramePrefetcher(frames, queue_size=2)
+        iterator = iter(prefetcher)
+        next(iterator)
+        iterator.close()
+        self.assertFalse(prefetcher._thread.is_alive())
+
+class TestPrefetchScan(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        write_flash_video(self.video_path, [(10, 22, (80, 60)), (40, 52, (40, 40))])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_prefetch_matches_sequential(self):
+        """测试流水线扫描与顺序扫描结果一致"""
+        expected = list(scan_flashes(self.video_path, circularity_threshold=0.3))
+        stats = {}
+        actual = list(scan_flashes(self.video_path, circularity_threshold=0.3,
+                                   prefetch=4, stats=stats))
+        self.assertEqual(expected, actual)
+        self.assertEqual(stats['analyzed_frames'], 60)
+        self.assertGreaterEqual(stats['decode_wait'], 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from flash_detector.core.detector import scan_flashes
+from flash_detector.core.profiler import Profiler, format_profile, write_profile
+from .test_scan import write_flash_video
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        write_flash_video(self.video_path, [(10, 22, (80, 60))])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_scan_stages(self):
+        """测试扫描时记录各阶段耗时和帧计数，且不改变检测结果"""
+        profiler = Profiler()
+        stats = {}
+        events = list(scan_flashes(self.video_path, debug_images=True, stats=stats,
+                                   profiler=profiler))
+        for event in events:
+            event.pop('debug_images')
+        self.assertEqual(events, list(scan_flashes(self.video_path)))
+
+        report = profiler.report()
+        for name in ('decode', 'color', 'grid', 'temporal', 'circularity', 'debug_images'):
+            self.assertIn(name, report['stages'])
+        self.assertEqual(report['stages']['decode']['calls'], 60)
+        self.assertEqual(report['counters']['analyzed_frames'], stats['analyzed_frames'])
+        self.assertEqual(report['counters']['events'], len(events))
+        self.assertIn('时序分析', format_profile(report))
+
+        path = os.path.join(self.tmpdir, 'profile.json')
+        write_profile(report, path)
+        with open(path) as f:
+            self.assertEqual(json.load(f)['counters'], report['counters'])
+
+    def test_skipped_frames(self):
+        """测试按步长跳过和变化门限跳过的帧数"""
+        profiler = Profiler()
+        list(scan_flashes(self.video_path, frame_step=2, gate=True, profiler=profiler))
+        counters = profiler.report()['counters']
+        self.assertEqual(counters['skipped_frames'], 30)
+        self.assertEqual(counters['analyzed_frames'], 30)
+        self.assertIn('gate_skipped_frames', counters)
+
+if __name__ == '__main__':
+    unittest.main()
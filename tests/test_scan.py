@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import cv2
+from flash_detector.core.detector import EventMerger, detect_flash, scan_flashes
+
+def write_flash_video(path, flashes, num_frames=60, size=(160, 120), fps=30):
+    """
+    写入测试视频
+    flashes: [(开始帧, 结束帧, (x, y)), ...]，区间内的偶数帧出现白色圆形
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    for frame_num in range(num_frames):
+        frame = np.full((size[1], size[0], 3), 40, dtype=np.uint8)
+        for start, end, center in flashes:
+            if start <= frame_num < end and frame_num % 2 == 0:
+                cv2.circle(frame, center, 12, (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+class TestEventMerger(unittest.TestCase):
+    def test_merge_consecutive_detections(self):
+        """测试相邻检测合并为事件"""
+        merger = EventMerger(merge_gap=1)
+        flash = lambda intensity, position: {
+            'intensity': intensity, 'position': position, 'frequency': 2}
+
+        self.assertIsNone(merger.update(0, None))
+        self.assertIsNone(merger.update(1, flash(40, (10, 10))))
+        self.assertIsNone(merger.update(2, flash(60, (20, 20))))
+        self.assertIsNone(merger.update(3, flash(50, (30, 30))))
+
+        event = merger.update(4, None)
+        self.assertEqual(event['start_frame'], 1)
+        self.assertEqual(event['end_frame'], 3)
+        self.assertEqual(event['peak_frame'], 2)
+        self.assertEqual(event['intensity'], 60)
+        self.assertEqual(event['position'], (20, 20))
+        self.assertEqual(event['detections'], 3)
+
+        self.assertIsNone(merger.update(6, flash(30, (5, 5))))
+        event = merger.flush()
+        self.assertEqual((event['start_frame'], event['end_frame']), (6, 6))
+        self.assertIsNone(merger.flush())
+
+    def test_merge_gap(self):
+        """测试帧步长大于1时的合并"""
+        merger = EventMerger(merge_gap=2)
+        flash = {'intensity': 40, 'position': (0, 0), 'frequency': 2}
+        self.assertIsNone(merger.update(0, flash))
+        self.assertIsNone(merger.update(2, flash))
+        event = merger.update(6, flash)
+        self.assertEqual((event['start_frame'], event['end_frame']), (0, 2))
+
+class TestScanFlashes(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        write_flash_video(self.video_path, [
+            (10, 22, (80, 60)),
+            (40, 52, (40, 40)),
+        ])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_scan_all_events(self):
+        """测试单次遍历检测全部闪光事件"""
+        events = list(scan_flashes(self.video_path, circularity_threshold=0.3))
+        self.assertEqual(len(events), 2)
+        self.assertLess(events[0]['end_frame'], events[1]['start_frame'])
+        self.assertTrue(10 <= events[0]['peak_frame'] < 22)
+        self.assertTrue(40 <= events[1]['peak_frame'] < 52)
+        self.assertNotIn('debug_images', events[0])
+
+    def test_scan_debug_images(self):
+        """测试事件调试图像，热力图和放大图在访问时才绘制"""
+        events = list(scan_flashes(self.video_path, circularity_threshold=0.3,
+                                   debug_images=True))
+        images = events[0]['debug_images']
+        self.assertEqual(images.rendered(), [])
+        self.assertEqual(images['curr_frame'].shape, (120, 160, 3))
+        self.assertEqual(images['diff_map'].shape, (120, 160, 3))
+        self.assertEqual(images.rendered(), ['diff_map'])
+        self.assertIsNotNone(images['region_detail'])
+        self.assertEqual(set(images), {'curr_frame', 'diff_map', 'region_detail'})
+
+    def test_low_memory(self):
+        """测试低内存模式：事件与普通扫描一致，调试图像只保留闪光区域，并报告内存占用"""
+        expected = list(scan_flashes(self.video_path, circularity_threshold=0.3))
+        stats = {}
+        events = list(scan_flashes(self.video_path, circularity_threshold=0.3,
+                                   debug_images=True, stats=stats, low_memory='uint8'))
+        self.assertEqual([(e['start_frame'], e['end_frame'], e['position']) for e in events],
+                         [(e['start_frame'], e['end_frame'], e['position']) for e in expected])
+        self.assertEqual(events[0]['debug_images']['roi'], (0, 0))
+        self.assertIsNotNone(events[0]['debug_images']['diff_map'])
+        self.assertGreater(stats['bytes_per_megapixel'], 0)
+
+    def test_frame_step_skips_decode(self):
+        """测试帧步长大于1时只分析被选中的帧"""
+        stats = {}
+        events = list(scan_flashes(self.video_path, frame_step=3,
+                                   circularity_threshold=0.3, stats=stats))
+        self.assertEqual(stats, {'decoded_frames': 60, 'analyzed_frames': 20})
+        self.assertGreater(len(events), 0)
+        for event in events:
+            self.assertEqual(event['peak_frame'] % 3, 0)
+
+    def test_detect_flash_returns_first_event(self):
+        """测试 detect_flash 返回第一个闪光"""
+        events = list(scan_flashes(self.video_path, circularity_threshold=0.3))
+        results = detect_flash(self.video_path, circularity_threshold=0.3)
+        frame_num, intensity, position = results[0]
+        self.assertEqual(frame_num, events[0]['start_frame'])
+
+if __name__ == '__main__':
+    unittest.main()
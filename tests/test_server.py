@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from flash_detector.core.batch import _event_record, probe_video
+from flash_detector.core.detector import scan_flashes
+from flash_detector.core.jobs import JobManager, JobRejected, validate_params
+from flash_detector.interface.server import ServiceClient, start_server
+from .test_scan import write_flash_video
+
+class TestJobService(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        write_flash_video(self.video_path, [(4, 14, (40, 40)), (30, 40, (100, 60))])
+        self.manager = JobManager(workers=1, max_queued=1)
+
+    def tearDown(self):
+        self.manager.shutdown()
+        shutil.rmtree(self.tmpdir)
+
+    def test_admission_control(self):
+        """测试排队已满时拒绝任务，排队中的任务可以取消"""
+        # 占用唯一的工作线程，使提交的任务保持排队
+        release = threading.Event()
+        self.manager.executor.submit(release.wait)
+        first = self.manager.submit(self.video_path)
+        second = self.manager.submit(self.video_path)
+        with self.assertRaises(JobRejected):
+            self.manager.submit(self.video_path)
+        with self.assertRaises(ValueError):
+            self.manager.submit(self.video_path, {'unknown': 1})
+
+        self.assertEqual(self.manager.cancel(second.id).status, 'cancelled')
+        release.set()
+        while not first.done:
+            first.wait(len(first.events), 30)
+        self.assertEqual(first.status, 'done')
+        self.assertEqual(second.status, 'cancelled')
+        self.assertEqual(self.manager.active_count(), 0)
+
+    def test_validate_choices(self):
+        """测试 ingest 和 low_memory 只接受命令行中的可选值"""
+        self.assertEqual(validate_params({'ingest': 'ffmpeg', 'low_memory': 'float16'}),
+                         {'ingest': 'ffmpeg', 'low_memory': 'float16'})
+        for params in ({'ingest': 'foo'}, {'low_memory': 'int4'}):
+            with self.assertRaises(ValueError):
+                validate_params(params)
+
+    def test_http_stream(self):
+        """测试通过 HTTP 提交任务，事件流推送进度和事件，结果与直接扫描一致"""
+        server, url = start_server(self.manager)
+        try:
+            client = ServiceClient(url)
+            params = {'circularity_threshold': 0.3}
+            job = client.submit(self.video_path, params)
+            messages = list(client.stream(job['id']))
+            names = [name for name, _ in messages]
+            self.assertIn('progress', names)
+            self.assertEqual(names[-1], 'done')
+
+            fps = probe_video(self.video_path)['fps']
+            expected = [_event_record(event, fps)
+                        for event in scan_flashes(self.video_path, **params)]
+            self.assertEqual([data for name, data in messages if name == 'flash'], expected)
+
+            result = client.job(job['id'])
+            self.assertEqual(result['status'], 'done')
+            self.assertEqual(result['progress'], 1.0)
+            self.assertEqual(result['events'], expected)
+
+            with self.assertRaises(RuntimeError):
+                client.job('missing')
+            with self.assertRaises(RuntimeError):
+                client.submit(os.path.join(self.tmpdir, 'missing.avi'))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import shutil
+import tempfile
+import unittest
+from flash_detector.core.detector import scan_flashes
+from flash_detector.core.sweep import expand_sweep, parse_sweep, sweep_flashes
+from .test_scan import write_flash_video
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        write_flash_video(self.video_path, [(10, 22, (80, 60)), (40, 52, (40, 40))])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_parse_and_expand(self):
+        """测试参数网格解析与展开"""
+        grid = parse_sweep("abs_threshold=15,20; region_size=16")
+        self.assertEqual(grid, {'abs_threshold': [15.0, 20.0], 'region_size': [16]})
+
+        configs = expand_sweep(grid, {'circularity_threshold': 0.7})
+        self.assertEqual(configs, [
+            {'abs_threshold': 15.0, 'region_size': 16, 'circularity_threshold': 0.7},
+            {'abs_threshold': 20.0, 'region_size': 16, 'circularity_threshold': 0.7},
+        ])
+
+        with self.assertRaises(ValueError):
+            parse_sweep("frame_step=1,2")
+
+    def test_sweep_matches_individual_scans(self):
+        """测试一次解码的参数扫描与逐组单独扫描结果一致"""
+        configs = expand_sweep(parse_sweep(
+            "abs_threshold=20,150,250;region_size=16,20;circularity_threshold=0.3,0.8"))
+        stats = {}
+        results = sweep_flashes(self.video_path, configs, stats=stats)
+        self.assertEqual(stats['decoded_frames'], 60)
+
+        for result in results:
+            config = result['config']
+            expected = list(scan_flashes(
+                self.video_path,
+                abs_threshold=config['abs_threshold'],
+                region_size=config['region_size'],
+                circularity_threshold=config['circularity_threshold']))
+            self.assertEqual(result['events'], expected)
+
+        self.assertTrue(any(result['events'] for result in results))
+
+if __name__ == '__main__':
+    unittest.main()
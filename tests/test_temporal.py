@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from flash_detector.core.detector import FlashDetectorBuffer, scan_flashes
+from flash_detector.core.temporal import FlashRateAnalyzer
+from .test_scan import write_flash_video
+
+def reference_transitions(values, threshold):
+    """逐个样本计算跳变（参考实现），返回 [(帧序号, 幅度), ...]"""
+    transitions = []
+    direction = 0
+    high = low = values[0]
+    for i, value in enumerate(values):
+        high, low = max(high, value), min(low, value)
+        if direction <= 0 and value - low > threshold:
+            transitions.append((i, value - low))
+            direction, high, low = 1, value, value
+        elif direction >= 0 and high - value > threshold:
+            transitions.append((i, high - value))
+            direction, high, low = -1, value, value
+    return transitions
+
+class TestFlashRate(unittest.TestCase):
+    def test_matches_reference(self):
+        """测试增量更新的窗口统计与逐区域重新计算的结果一致"""
+        rng = np.random.default_rng(0)
+        frames = rng.uniform(0, 100, (120, 3, 4)).astype(np.float32)
+        window = 17
+        analyzer = FlashRateAnalyzer(window, fps=30.0, threshold=30)
+        for i, brightness in enumerate(frames):
+            analyzer.update(brightness)
+            for cell in np.ndindex(3, 4):
+                recent = [amplitude for index, amplitude in
+                          reference_transitions(frames[:i + 1, cell[0], cell[1]], 30)
+                          if index > i - window]
+                summary = analyzer.summary(cell)
+                self.assertEqual(summary['transitions'], len(recent))
+                self.assertAlmostEqual(summary['swing'],
+                                       float(np.mean(recent)) if recent else 0.0, places=3)
+                self.assertAlmostEqual(summary['flash_rate'],
+                                       len(recent) / 2 / (min(i + 1, window) / 30))
+
+    def test_square_wave_rate(self):
+        """测试 5Hz 方波（30 FPS 下亮暗各 3 帧）的闪光频率"""
+        analyzer = FlashRateAnalyzer(30, fps=30.0, threshold=20)
+        for i in range(90):
+            analyzer.update(np.full((2, 2), 200.0 if (i // 3) % 2 else 50.0, dtype=np.float32))
+        self.assertEqual(analyzer.summary((0, 0))['flash_rate'], 5.0)
+        self.assertEqual(analyzer.summary((0, 0))['swing'], 150.0)
+        np.testing.assert_array_equal(analyzer.flash_rate(), np.full((2, 2), 5.0))
+
+    def test_rate_before_window_full(self):
+        """测试窗口尚未填满时按已分析的时长计算频率，视频开头的闪光不被低报"""
+        analyzer = FlashRateAnalyzer(90, fps=30.0, threshold=20)
+        for i in range(30):
+            analyzer.update(np.full((2, 2), 200.0 if (i // 3) % 2 else 50.0, dtype=np.float32))
+        # 第一秒的 5Hz 方波有 9 次跳变（第一帧本身不是跳变），按 1 秒而不是 3 秒计算
+        self.assertEqual(analyzer.summary((0, 0))['flash_rate'], 4.5)
+        np.testing.assert_array_equal(analyzer.flash_rate(), np.full((2, 2), 4.5))
+
+    def test_loop_engine_matches(self):
+        """测试逐区域循环引擎附加的闪烁频率指标与向量化引擎一致"""
+        rng = np.random.default_rng(1)
+        frames = rng.integers(0, 256, (20, 60, 80), dtype=np.uint8)
+        vectorized = FlashDetectorBuffer(region_size=20, rate_window=10)
+        loop = FlashDetectorBuffer(region_size=20, engine='loop', rate_window=10)
+        for frame_num, frame in enumerate(frames):
+            self.assertEqual(vectorized.process_frame(frame, frame_num),
+                             loop.process_frame(frame, frame_num))
+
+class TestScanFlashRate(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.video_path = os.path.join(self.tmpdir, 'flash.avi')
+        write_flash_video(self.video_path, [(10, 40, (80, 60))], num_frames=60)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_scan_with_rate(self):
+        """测试扫描结果附加闪烁频率，事件本身不变；buffer_size 可配置"""
+        plain = list(scan_flashes(self.video_path))
+        rated = list(scan_flashes(self.video_path, rate_window=1.0))
+        self.assertEqual(len(rated), 1)
+        # 逐帧亮暗交替：30 FPS 下每秒 15 次闪光
+        self.assertGreaterEqual(rated[0]['flash_rate'], 10)
+        self.assertGreater(rated[0]['swing'], 20)
+        for event in rated:
+            for key in ('flash_rate', 'transitions', 'swing'):
+                event.pop(key)
+        self.assertEqual(rated, plain)
+
+        events = list(scan_flashes(self.video_path, buffer_size=9))
+        self.assertEqual(len(events), 1)
+        self.assertGreaterEqual(events[0]['start_frame'], plain[0]['start_frame'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -29,5 +29,18 @@ class TestUtils(unittest.TestCase):
         cv2.rectangle(img, (25, 25), (75, 75), 255, -1)
         self.assertFalse(check_circularity(img, 0.8))
 
+    def test_circularity_region_threshold(self):
+        """测试二值化阈值随区域亮度变化：暗背景上的弱闪光和亮背景上的闪光都能识别"""
+        img = np.full((60, 60), 30, dtype=np.uint8)
+        cv2.circle(img, (30, 30), 15, 90, -1)
+        self.assertTrue(check_circularity(img, 0.8))
+
+        img = np.full((60, 60), 180, dtype=np.uint8)
+        cv2.circle(img, (30, 30), 15, 255, -1)
+        self.assertTrue(check_circularity(img, 0.8))
+
+        # 均匀区域退回固定阈值
+        self.assertFalse(check_circularity(np.full((60, 60), 90, dtype=np.uint8), 0.5))
+
 if __name__ == '__main__':
     unittest.main()